@@ -1,6 +1,8 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import threading
+import time
+from dataclasses import dataclass, field
 from typing import Sequence
 
 import numpy as np
@@ -9,6 +11,8 @@ import requests
 from .openai import OpenAIEmbeddingsHttpClient
 
 VALID_EMBEDDING_MODES = ("http",)
+HEALTH_CACHE_SECONDS = 30.0
+_POOL_SIZE = 16
 
 
 def _normalize_mode(mode: str) -> str:
@@ -25,6 +29,14 @@ def _resolve_http_endpoint(base_url: str) -> str:
     return f"{root}/v1/embeddings"
 
 
+def _new_session() -> requests.Session:
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=_POOL_SIZE, pool_maxsize=_POOL_SIZE)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
 @dataclass(frozen=True)
 class EmbeddingClient:
     """Embedding client for OpenAI-compatible HTTP endpoints."""
@@ -34,20 +46,47 @@ class EmbeddingClient:
     timeout_s: float | None = None
     max_retries: int = 2
 
+    _session: requests.Session = field(default_factory=_new_session, init=False, repr=False, compare=False)
+    _healthy_at: list[float] = field(default_factory=list, init=False, repr=False, compare=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False, compare=False)
+    _http: OpenAIEmbeddingsHttpClient = field(init=False, repr=False, compare=False)
+
     def __post_init__(self) -> None:
         object.__setattr__(self, "mode", _normalize_mode(self.mode))
         object.__setattr__(self, "base_url", self.base_url.rstrip("/"))
+        # vectors travel as base64 float32 when the endpoint supports it; the
+        # HTTP client falls back to JSON floats (and remembers it) otherwise
+        object.__setattr__(
+            self,
+            "_http",
+            OpenAIEmbeddingsHttpClient(
+                endpoint=self._http_endpoint,
+                timeout=float(self.timeout_s) if self.timeout_s is not None else 10.0,
+                max_retries=self.max_retries,
+                session=self._session,
+                encoding_format="base64",
+            ),
+        )
 
     @property
     def _http_endpoint(self) -> str:
         return _resolve_http_endpoint(self.base_url)
 
     def health(self) -> bool:
+        """Probe the endpoint; a positive answer is trusted for ``HEALTH_CACHE_SECONDS``."""
+
+        now = time.monotonic()
+        with self._lock:
+            if self._healthy_at and now - self._healthy_at[0] < HEALTH_CACHE_SECONDS:
+                return True
         try:
-            response = requests.options(self._http_endpoint, timeout=2.0)
-            return response.status_code < 500
+            response = self._session.options(self._http_endpoint, timeout=2.0)
+            healthy = response.status_code < 500
         except Exception:
-            return False
+            healthy = False
+        with self._lock:
+            self._healthy_at[:] = [now] if healthy else []
+        return healthy
 
     def embed_texts(
         self,
@@ -59,20 +98,20 @@ class EmbeddingClient:
         dtype: str,
         show_progress: bool,
     ) -> np.ndarray:
-        client = OpenAIEmbeddingsHttpClient(
-            endpoint=self._http_endpoint,
-            timeout=float(self.timeout_s) if self.timeout_s is not None else 10.0,
-            max_retries=self.max_retries,
-        )
-        response = client.embed_texts(
+        # normalize once, in place on the response matrix (private to this call),
+        # instead of round-tripping the vectors through Python lists
+        response = self._http.embed_texts(
             list(texts),
             model=model_name,
             hints={"normalize": bool(normalize)},
             extra={"max_seq_length": int(max_seq_length)},
-            normalize=bool(normalize),
+            normalize=False,
         )
-        array = np.asarray(response.vectors, dtype=np.float32)
+        array = response.as_array()
+        if normalize:
+            norms = np.linalg.norm(array, axis=1, keepdims=True)
+            np.divide(array, norms, out=array, where=norms > 0.0)
 
         if dtype.lower() == "float16":
             return array.astype(np.float16)
-        return array.astype(np.float32)
+        return np.ascontiguousarray(array)
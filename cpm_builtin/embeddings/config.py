@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import copy
 import os
 import yaml
 from dataclasses import dataclass, field
@@ -13,6 +14,9 @@ if TYPE_CHECKING:
 CONFIG_FILENAME = "embeddings.yml"
 DEFAULT_DISCOVERY_TTL_SECONDS = 900
 
+# parsed embeddings.yml per absolute path, reused while (mtime_ns, size) is unchanged
+_RAW_CONFIG_CACHE: dict[str, tuple[tuple[int, int], Any]] = {}
+
 
 def _ensure_mapping(data: Any) -> Mapping[str, Any]:
     if isinstance(data, Mapping):
@@ -292,11 +296,12 @@ class EmbeddingsConfigService:
         self.config_dir = self.config_path.parent
         self.config_dir.mkdir(parents=True, exist_ok=True)
         self._config = self._load()
+        self._sorted_providers: tuple[EmbeddingProviderConfig, ...] | None = None
 
     def _load(self) -> EmbeddingsConfig:
-        if not self.config_path.exists():
+        raw = _read_config(self.config_path)
+        if raw is None:
             return EmbeddingsConfig()
-        raw = yaml.safe_load(self.config_path.read_text(encoding="utf-8")) or {}
         default = raw.get("default")
         providers_raw = raw.get("providers") or {}
         providers: dict[str, EmbeddingProviderConfig] = {}
@@ -312,6 +317,7 @@ class EmbeddingsConfigService:
         return EmbeddingsConfig(default=default, providers=providers)
 
     def _persist(self) -> None:
+        self._sorted_providers = None
         payload = {
             "default": self._config.default,
             "providers": {
@@ -332,9 +338,11 @@ class EmbeddingsConfigService:
         return base / "cache" / "embeddings" / "discovery.json"
 
     def list_providers(self) -> list[EmbeddingProviderConfig]:
-        return sorted(
-            self._config.providers.values(), key=lambda provider: provider.name
-        )
+        if self._sorted_providers is None:
+            self._sorted_providers = tuple(
+                sorted(self._config.providers.values(), key=lambda provider: provider.name)
+            )
+        return list(self._sorted_providers)
 
     def get_provider(self, name: str) -> EmbeddingProviderConfig:
         try:
@@ -413,6 +421,22 @@ class EmbeddingsConfigService:
         return load_cache(self.discovery_cache_path)
 
 
+def _read_config(path: Path) -> Any:
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    key = os.path.abspath(path)
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    cached = _RAW_CONFIG_CACHE.get(key)
+    if cached is None or cached[0] != stamp:
+        raw = yaml.safe_load(path.read_text(encoding="utf-8")) or {}
+        cached = (stamp, raw)
+        _RAW_CONFIG_CACHE[key] = cached
+    # providers may keep references into the parsed tree, so hand out a copy
+    return copy.deepcopy(cached[1])
+
+
 def _resolve_config_path(config_dir: Path | str | None) -> Path:
     if config_dir is None:
         return Path(".cpm") / "config" / CONFIG_FILENAME
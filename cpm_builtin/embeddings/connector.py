@@ -27,9 +27,12 @@ class HttpEmbeddingConnector:
         provider: EmbeddingProviderConfig,
         *,
         max_retries: int = 2,
+        session: requests.Session | None = None,
     ) -> None:
         self.provider = provider
         self.max_retries = max(1, max_retries)
+        # one session per connector keeps the connection alive across batches
+        self.session = session if session is not None else requests.Session()
         self._headers, self._auth = self._build_session_auth()
         self.endpoint = f"{provider.resolved_http_base_url}{provider.resolved_http_path}"
 
@@ -100,7 +103,7 @@ class HttpEmbeddingConnector:
         last_error: Exception | None = None
         for attempt in range(1, self.max_retries + 1):
             try:
-                resp = requests.post(
+                resp = self.session.post(
                     self.endpoint,
                     json=payload,
                     headers=self._headers,
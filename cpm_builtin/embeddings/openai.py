@@ -1,6 +1,8 @@
 from __future__ import annotations
 
+import base64
 import logging
+import threading
 import time
 from collections.abc import Mapping, Sequence
 from typing import Any
@@ -82,12 +84,41 @@ def serialize_openai_request(request: EmbedRequestIR) -> dict[str, Any]:
     return payload
 
 
-def parse_openai_response(body: Mapping[str, Any]) -> EmbedResponseIR:
+def _decode_base64_embedding(value: str) -> np.ndarray:
+    # OpenAI "base64" encoding: packed little-endian float32
+    return np.frombuffer(base64.b64decode(value), dtype="<f4")
+
+
+# statuses a server uses to reject an unknown field or value: 400 from most
+# OpenAI-compatible servers, 422 from FastAPI/pydantic validation
+_FIELD_REJECTION_STATUSES = ("bad request (status=400)", "bad request (status=422)")
+
+
+def _rejects_encoding_format(exc: ValueError) -> bool:
+    # only a field rejection that names encoding_format means the endpoint
+    # cannot do base64; auth failures, rate limits and other 4xx surface unchanged
+    message = str(exc)
+    return message.startswith(_FIELD_REJECTION_STATUSES) and "encoding_format" in message
+
+
+def _stack_rows(rows: list[list[float] | np.ndarray]) -> list[list[float]] | np.ndarray:
+    # keep base64-decoded rows as one float32 matrix; mixed payloads fall back to lists
+    decoded = [row for row in rows if isinstance(row, np.ndarray)]
+    if len(decoded) != len(rows):
+        return [row.tolist() if isinstance(row, np.ndarray) else row for row in rows]
+    if len({row.shape for row in decoded}) != 1:
+        raise ValueError("response.data embeddings have inconsistent dimensions")
+    return np.stack(decoded)
+
+
+def parse_openai_response(
+    body: Mapping[str, Any], *, encoding_format: str = "float"
+) -> EmbedResponseIR:
     data = body.get("data")
     if not isinstance(data, list):
         raise TypeError("response.data must be a list")
 
-    indexed_vectors: list[tuple[int, list[float]]] = []
+    indexed_vectors: list[tuple[int, list[float] | np.ndarray]] = []
     for item in data:
         if not isinstance(item, Mapping):
             raise TypeError("response.data entries must be mappings")
@@ -99,7 +130,9 @@ def parse_openai_response(body: Mapping[str, Any]) -> EmbedResponseIR:
         if not isinstance(index, int):
             raise TypeError("response.data entry index must be int")
         embedding = item["embedding"]
-        if not isinstance(embedding, list):
+        if encoding_format == "base64" and isinstance(embedding, str):
+            embedding = _decode_base64_embedding(embedding)
+        elif not isinstance(embedding, list):
             raise TypeError("response.data entry embedding must be a list")
         indexed_vectors.append((index, embedding))
 
@@ -122,7 +155,7 @@ def parse_openai_response(body: Mapping[str, Any]) -> EmbedResponseIR:
 
     extra = {k: v for k, v in body.items() if k not in {"data", "model", "usage"}}
     return EmbedResponseIR(
-        vectors=[embedding for _, embedding in indexed_vectors],
+        vectors=_stack_rows([embedding for _, embedding in indexed_vectors]),
         model=model,
         usage=dict(usage) if isinstance(usage, Mapping) else None,
         extra=extra or None,
@@ -144,8 +177,14 @@ class OpenAIEmbeddingsHttpClient:
         max_retries: int = 2,
         backoff_seconds: float = 0.1,
         static_headers: Mapping[str, str] | None = None,
+        session: requests.Session | None = None,
+        encoding_format: str = "float",
     ) -> None:
         self.endpoint = endpoint.rstrip("/")
+        self.session = session
+        self.encoding_format = encoding_format
+        # one client may serve several threads; the base64 -> float downgrade happens once
+        self._format_lock = threading.Lock()
         self.timeout = float(timeout)
         self.max_retries = max(1, int(max_retries))
         self.backoff_seconds = max(0.0, float(backoff_seconds))
@@ -174,6 +213,26 @@ class OpenAIEmbeddingsHttpClient:
 
     def embed(self, request: EmbedRequestIR, *, normalize: bool = False) -> EmbedResponseIR:
         payload = serialize_openai_request(request)
+        with self._format_lock:
+            use_base64 = self.encoding_format == "base64"
+        if use_base64 and "encoding_format" not in payload:
+            try:
+                return self._embed(
+                    request, {**payload, "encoding_format": "base64"}, normalize=normalize
+                )
+            except ValueError as exc:
+                if not _rejects_encoding_format(exc):
+                    raise
+                # endpoint does not accept encoding_format; stay on JSON floats
+                with self._format_lock:
+                    if self.encoding_format == "base64":
+                        logger.info("openai embeddings endpoint rejected base64 encoding, using float")
+                        self.encoding_format = "float"
+        return self._embed(request, payload, normalize=normalize)
+
+    def _embed(
+        self, request: EmbedRequestIR, payload: dict[str, Any], *, normalize: bool
+    ) -> EmbedResponseIR:
         hint_headers = _build_hint_headers(request.hints, model=request.model)
         headers = {**self.headers, **hint_headers}
         last_error: Exception | None = None
@@ -186,7 +245,7 @@ class OpenAIEmbeddingsHttpClient:
                     self.endpoint,
                     len(request.texts),
                 )
-                response = requests.post(
+                response = (self.session or requests).post(
                     self.endpoint,
                     json=payload,
                     headers=headers,
@@ -202,12 +261,15 @@ class OpenAIEmbeddingsHttpClient:
                     raise RuntimeError(f"upstream error status={status}")
 
                 response.raise_for_status()
-                parsed = parse_openai_response(response.json())
+                parsed = parse_openai_response(
+                    response.json(),
+                    encoding_format=str(payload.get("encoding_format", "float")),
+                )
                 parsed.validate_against_request(request)
                 if not normalize:
                     return parsed
                 return EmbedResponseIR(
-                    vectors=normalize_embeddings(parsed.vectors),
+                    vectors=l2_normalize(parsed.as_array()).tolist(),
                     model=parsed.model,
                     usage=parsed.usage,
                     extra=parsed.extra,
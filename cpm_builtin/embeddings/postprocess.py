@@ -9,11 +9,13 @@ def l2_normalize(matrix: np.ndarray) -> np.ndarray:
     """L2-normalize each row of a 2D matrix, preserving zero vectors."""
     if matrix.ndim != 2:
         raise ValueError("vectors must be a 2D matrix")
-    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
-    non_zero = norms.squeeze(axis=1) > 0.0
-    matrix = matrix.copy()
-    matrix[non_zero] = matrix[non_zero] / norms[non_zero]
-    return matrix
+    # one output copy; the row norms are reduced, rooted and applied in place
+    out = np.array(matrix, dtype=np.result_type(matrix.dtype, np.float32))
+    norms = np.einsum("ij,ij->i", out, out)
+    np.sqrt(norms, out=norms)
+    norms = norms[:, None]
+    np.divide(out, norms, out=out, where=norms > 0.0)
+    return out
 
 
 def is_l2_normalized(matrix: np.ndarray, *, tolerance: float = 1e-3) -> bool:
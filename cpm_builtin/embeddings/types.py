@@ -9,6 +9,22 @@ from __future__ import annotations
 from dataclasses import dataclass, field
 from typing import Any
 
+import numpy as np
+
+# Array kinds produced by np.asarray when every element is a Python int/float/bool
+_NUMERIC_KINDS = frozenset("biuf")
+
+
+def _numeric_matrix(vectors: list[list[Any]]) -> np.ndarray | None:
+    """Return ``vectors`` as a 2D numeric array, or None if any element is not a number."""
+    try:
+        matrix = np.asarray(vectors)
+    except (TypeError, ValueError):
+        return None
+    if matrix.ndim != 2 or matrix.dtype.kind not in _NUMERIC_KINDS:
+        return None
+    return matrix
+
 
 @dataclass(frozen=True)
 class EmbedRequestIR:
@@ -105,7 +121,8 @@ class EmbedResponseIR:
 
     Attributes:
         vectors: List of embedding vectors (one per input text)
-                 Each vector is a list of floats (not yet converted to numpy)
+                 Each vector is a list of floats (not yet converted to numpy);
+                 binary-decoded responses pass a 2D float32 matrix instead
         model: Optional model identifier that produced these embeddings
         usage: Optional token usage statistics (prompt_tokens, total_tokens, etc.)
         extra: Optional provider-specific metadata
@@ -118,13 +135,43 @@ class EmbedResponseIR:
         ... )
     """
 
-    vectors: list[list[float]]
+    vectors: list[list[float]] | np.ndarray
     model: str | None = None
     usage: dict[str, Any] | None = None
     extra: dict[str, Any] | None = None
+    _array: np.ndarray = field(init=False, repr=False, compare=False)
 
     def __post_init__(self) -> None:
         """Validate response fields."""
+        if isinstance(self.vectors, np.ndarray):
+            matrix = self._validate_matrix(self.vectors)
+        else:
+            matrix = self._validate_lists()
+        object.__setattr__(self, "_array", np.ascontiguousarray(matrix, dtype=np.float32))
+
+        # Validate model is string or None
+        if self.model is not None and not isinstance(self.model, str):
+            raise TypeError(f"model must be str or None, got {type(self.model).__name__}")
+
+        # Validate usage is dict or None
+        if self.usage is not None and not isinstance(self.usage, dict):
+            raise TypeError(f"usage must be dict or None, got {type(self.usage).__name__}")
+
+        # Validate extra is dict or None
+        if self.extra is not None and not isinstance(self.extra, dict):
+            raise TypeError(f"extra must be dict or None, got {type(self.extra).__name__}")
+
+    @staticmethod
+    def _validate_matrix(matrix: np.ndarray) -> np.ndarray:
+        """Check a pre-decoded matrix; it is used as is, without a round trip through Python floats."""
+        if matrix.ndim != 2 or not matrix.shape[0] or not matrix.shape[1]:
+            raise ValueError(f"vectors must be a non-empty 2D matrix, got shape {matrix.shape}")
+        if matrix.dtype.kind not in _NUMERIC_KINDS:
+            raise TypeError(f"vectors must be numeric, got dtype {matrix.dtype}")
+        return matrix
+
+    def _validate_lists(self) -> np.ndarray:
+        """Check a list of lists and convert it to a matrix."""
         # Validate vectors is a non-empty list of lists
         if not isinstance(self.vectors, list):
             raise TypeError(f"vectors must be a list, got {type(self.vectors).__name__}")
@@ -132,7 +179,17 @@ class EmbedResponseIR:
         if not self.vectors:
             raise ValueError("vectors cannot be empty")
 
-        # Validate each vector is a list of floats with consistent dimensions
+        # Fast path: one C-level conversion checks shape and element types, and
+        # map(type, ...) confirms every row is a plain list. Anything else falls
+        # through to the per-row walk, which also builds the error message.
+        matrix = _numeric_matrix(self.vectors)
+        if matrix is None or not matrix.shape[1] or set(map(type, self.vectors)) != {list}:
+            self._validate_vectors()
+            matrix = np.asarray(self.vectors, dtype=np.float64)
+        return matrix
+
+    def _validate_vectors(self) -> None:
+        """Check each row and element, raising on the first invalid entry."""
         first_dim: int | None = None
         for idx, vec in enumerate(self.vectors):
             if not isinstance(vec, list):
@@ -150,7 +207,7 @@ class EmbedResponseIR:
                     f"expected {first_dim} (inconsistent dimensions)"
                 )
 
-            # Validate all elements are numeric
+        for idx, vec in enumerate(self.vectors):
             for elem_idx, elem in enumerate(vec):
                 if not isinstance(elem, (int, float)):
                     raise TypeError(
@@ -158,17 +215,16 @@ class EmbedResponseIR:
                         f"got {type(elem).__name__}"
                     )
 
-        # Validate model is string or None
-        if self.model is not None and not isinstance(self.model, str):
-            raise TypeError(f"model must be str or None, got {type(self.model).__name__}")
+    def as_array(self) -> np.ndarray:
+        """Return the vectors as a C-contiguous float32 matrix.
 
-        # Validate usage is dict or None
-        if self.usage is not None and not isinstance(self.usage, dict):
-            raise TypeError(f"usage must be dict or None, got {type(self.usage).__name__}")
+        The matrix is built once during validation and shared between calls;
+        copy it before modifying it in place.
 
-        # Validate extra is dict or None
-        if self.extra is not None and not isinstance(self.extra, dict):
-            raise TypeError(f"extra must be dict or None, got {type(self.extra).__name__}")
+        Returns:
+            Array of shape ``(count, dims)``
+        """
+        return self._array
 
     @property
     def dims(self) -> int:
@@ -182,7 +238,7 @@ class EmbedResponseIR:
             >>> resp.dims
             3
         """
-        return len(self.vectors[0]) if self.vectors else 0
+        return int(self._array.shape[1])
 
     @property
     def count(self) -> int:
@@ -2,32 +2,40 @@
 
 from __future__ import annotations
 
+import os
+import re
 from pathlib import Path
 from typing import Dict
 
 __all__ = ["read_simple_yml", "write_simple_yml"]
 
 
-def read_simple_yml(path: Path) -> Dict[str, str]:
-    out: Dict[str, str] = {}
+# One "key: value" pair per line; the key runs up to the first colon. Comment
+# lines start with "#" and are never matched because the key cannot start with it.
+# Leading whitespace may run over blank lines, but a key never crosses a newline.
+_SIMPLE_YML_RE = re.compile(r"^\s*([^#:\s][^:\n]*):(.*)$", re.MULTILINE)
+
+
+def read_simple_yml(path: str | os.PathLike[str]) -> Dict[str, str]:
     try:
-        lines = path.read_text(encoding="utf-8").splitlines()
+        with open(path, "rb") as handle:
+            raw = handle.read()
     except FileNotFoundError:
-        return out
+        return {}
+    try:
+        text = raw.decode("utf-8")
     except UnicodeDecodeError:
-        lines = path.read_text(encoding="latin-1").splitlines()
-
-    for raw in lines:
-        line = raw.strip()
-        if not line or line.startswith("#"):
-            continue
-        if ":" not in line:
-            continue
-        k, v = line.split(":", 1)
-        k = k.strip()
-        v = v.strip().strip('"').strip("'")
-        if k:
-            out[k] = v
+        text = raw.decode("latin-1")
+
+    # splitlines() knows every line boundary (CR, CRLF, VT, FS, U+2028, ...); rejoin
+    # on "\n" so the pattern sees the same lines
+    text = "\n".join(text.splitlines())
+
+    out: Dict[str, str] = {}
+    for k, v in _SIMPLE_YML_RE.findall(text):
+        key = k.strip()
+        if key:
+            out[key] = v.strip().strip('"').strip("'")
     return out
 
 
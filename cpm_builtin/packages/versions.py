@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 import re
+from functools import lru_cache
 from typing import Any, List, Optional, Tuple
 
 __all__ = [
@@ -37,12 +38,16 @@ _STAGE_ORDER: dict[str, int] = {
 }
 
 
+_UNSAFE_SEGMENT_RE = re.compile(r"[^a-zA-Z0-9._\-+@]+")
+_TOKEN_RE = re.compile(r"(\d+)|(\D+)")
+
+
 def _safe_segment(seg: str) -> str:
     s = (seg or "").strip()
     if not s:
         return ""
     s = s.replace("\\", "/").replace("/", "-")
-    s = re.sub(r"[^a-zA-Z0-9._\-+@]+", "-", s).strip("-")
+    s = _UNSAFE_SEGMENT_RE.sub("-", s).strip("-")
     return s
 
 
@@ -83,22 +88,7 @@ def _tokenize_text_and_int(s: str) -> List[Any]:
     s = (s or "").strip()
     if not s:
         return []
-    out: List[Any] = []
-    i = 0
-    while i < len(s):
-        if s[i].isdigit():
-            j = i
-            while j < len(s) and s[j].isdigit():
-                j += 1
-            out.append((0, int(s[i:j])))
-            i = j
-        else:
-            j = i
-            while j < len(s) and not s[j].isdigit():
-                j += 1
-            out.append((1, s[i:j].lower()))
-            i = j
-    return out
+    return [(0, int(digits)) if digits else (1, text.lower()) for digits, text in _TOKEN_RE.findall(s)]
 
 
 def _qualifier_stage_and_num(tokens: List[str]) -> Tuple[int, int, Tuple[Any, ...]]:
@@ -194,6 +184,7 @@ def compare_versions(a: str, b: str) -> int:
     return 0
 
 
+@lru_cache(maxsize=4096)
 def version_key(v: str) -> Tuple[Tuple[List[Any], int, int, Tuple[Any, ...]], ...]:
     segs = [s for s in (v or "").split(".") if s != ""]
     out: List[Tuple[List[Any], int, int, Tuple[Any, ...]]] = []
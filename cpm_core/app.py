@@ -48,13 +48,13 @@ class CPMApp:
         self.container = container or ServiceContainer()
         self.workspace_resolver = WorkspaceResolver(user_dirs=self.user_dirs)
         normalized_start = Path(start_dir) if isinstance(start_dir, str) else start_dir
+        # ensure_workspace() already created the layout; only the paths are needed here
         workspace_root = self.workspace_resolver.ensure_workspace(normalized_start)
         layout = WorkspaceLayout.from_root(
             workspace_root,
             self.workspace_resolver.config_filename,
             self.workspace_resolver.embeddings_filename,
         )
-        layout.ensure()
         self.workspace = Workspace(root=workspace_root, config_path=layout.config_file)
         self.config = ConfigStore(path=self.workspace.config_path)
         self.events = EventBus()
@@ -2,20 +2,25 @@
 
 from __future__ import annotations
 
+import copy
 import hashlib
 import json
+import os
+import shutil
+import subprocess
+import sys
 import tarfile
 import zipfile
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, Iterable, Mapping, Optional, Protocol, Sequence, Tuple
+from typing import IO, Any, Dict, Iterable, Mapping, Optional, Protocol, Sequence, Tuple, cast
 
 import numpy as np
 from cpm_builtin.embeddings import EmbeddingClient
 
 from cpm_core.api import CPMAbstractBuilder, cpmbuilder
-from cpm_core.packet.faiss_db import FaissFlatIP
+from cpm_core.packet.faiss_db import DEFAULT_INDEX_SPEC, FaissFlatIP, build_faiss_index, save_faiss_index
 from cpm_core.packet.io import (
     compute_checksums,
     load_manifest,
@@ -202,6 +207,96 @@ def _write_cpm_yml(
         handle.write(f"created_at: {esc(created_at)}\n")
 
 
+class _PipeWriter:
+    """Unbuffered writer over a pipe fd that tracks the stream position for ``tarfile``."""
+
+    def __init__(self, fd: int) -> None:
+        self._fd = fd
+        self._pos = 0
+
+    def fileno(self) -> int:
+        return self._fd
+
+    def tell(self) -> int:
+        return self._pos
+
+    def write(self, data: bytes) -> int:
+        view = memoryview(data)
+        while view:
+            written = os.write(self._fd, view)
+            view = view[written:]
+        self._pos += len(data)
+        return len(data)
+
+    def advance(self, count: int) -> None:
+        self._pos += count
+
+    def flush(self) -> None:
+        return None
+
+
+class _SendfileTarFile(tarfile.TarFile):
+    """TarFile that copies regular file bodies with ``os.sendfile`` when writing to a raw fd."""
+
+    members: list[tarfile.TarInfo]
+
+    def addfile(self, tarinfo: tarfile.TarInfo, fileobj: Any = None) -> None:
+        if fileobj is None or not tarinfo.isreg() or not isinstance(self.fileobj, _PipeWriter):
+            super().addfile(tarinfo, fileobj)
+            return
+        self._check("awx")  # type: ignore[attr-defined]
+        tarinfo = copy.copy(tarinfo)
+        header = tarinfo.tobuf(self.format, self.encoding, self.errors)
+        self.fileobj.write(header)
+        self.offset += len(header)
+
+        in_fd = fileobj.fileno()
+        in_offset = fileobj.tell()
+        remaining = tarinfo.size
+        while remaining > 0:
+            sent = os.sendfile(self.fileobj.fileno(), in_fd, in_offset, min(remaining, 1 << 30))
+            if sent == 0:
+                raise OSError(f"unexpected end of data for {tarinfo.name}")
+            in_offset += sent
+            remaining -= sent
+        self.fileobj.advance(tarinfo.size)
+
+        blocks, remainder = divmod(tarinfo.size, tarfile.BLOCKSIZE)
+        if remainder > 0:
+            self.fileobj.write(tarfile.NUL * (tarfile.BLOCKSIZE - remainder))
+            blocks += 1
+        self.offset += blocks * tarfile.BLOCKSIZE
+        self.members.append(tarinfo)
+
+
+def _write_tar_gz(source: Path, archive_path: Path) -> None:
+    """Write ``source`` as a gzip tarball, compressing with parallel ``pigz`` when it is on PATH."""
+    pigz = shutil.which("pigz")
+    if pigz:
+        with archive_path.open("wb") as handle:
+            proc = subprocess.Popen(
+                [pigz, "-p", str(os.cpu_count() or 1), "-c"],
+                stdin=subprocess.PIPE,
+                stdout=handle,
+            )
+            assert proc.stdin is not None
+            try:
+                if hasattr(os, "sendfile") and sys.platform.startswith("linux"):
+                    with _SendfileTarFile(fileobj=cast(IO[bytes], _PipeWriter(proc.stdin.fileno())), mode="w") as tar:
+                        tar.add(source, arcname=source.name)
+                else:
+                    with tarfile.open(fileobj=proc.stdin, mode="w|") as tar:
+                        tar.add(source, arcname=source.name)
+            finally:
+                proc.stdin.close()
+                returncode = proc.wait()
+        if returncode == 0:
+            return
+        print(f"[warn] pigz exited with {returncode}; falling back to single-threaded gzip")
+    with tarfile.open(archive_path, "w:gz") as tar:
+        tar.add(source, arcname=source.name)
+
+
 def _archive_packet_dir(out_root: Path, archive_format: str) -> Path:
     if archive_format not in ("tar.gz", "zip"):
         raise ValueError(f"Unsupported archive format: {archive_format}")
@@ -209,8 +304,7 @@ def _archive_packet_dir(out_root: Path, archive_format: str) -> Path:
     if archive_path.exists():
         archive_path.unlink()
     if archive_format == "tar.gz":
-        with tarfile.open(archive_path, "w:gz") as tar:
-            tar.add(out_root, arcname=out_root.name)
+        _write_tar_gz(out_root, archive_path)
     else:
         with zipfile.ZipFile(archive_path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
             for item in out_root.rglob("*"):
@@ -220,6 +314,48 @@ def _archive_packet_dir(out_root: Path, archive_format: str) -> Path:
     return archive_path
 
 
+def _build_index(vectors: np.ndarray, *, dim: int, index_spec: str) -> tuple[Any, str]:
+    spec = (index_spec or DEFAULT_INDEX_SPEC).strip() or DEFAULT_INDEX_SPEC
+    if spec != DEFAULT_INDEX_SPEC:
+        try:
+            return build_faiss_index(vectors, index_spec=spec), spec
+        except (RuntimeError, ValueError) as exc:
+            print(f"[warn] faiss index '{spec}' unavailable ({exc}); falling back to {DEFAULT_INDEX_SPEC}")
+    db = FaissFlatIP(dim=dim)
+    db.add(vectors)
+    return db.index, DEFAULT_INDEX_SPEC
+
+
+_CODE_PREFIXES = ("SQ", "PQ", "RQ", "LSQ", "LSH")
+
+
+def _quantizer_for(index_spec: str) -> str:
+    """Name the vector encoding of an ``index_factory`` spec (``"IVF4096,SQ8"`` -> ``"SQ8"``)."""
+    storage = index_spec.rsplit(",", 1)[-1].strip().rsplit("_", 1)[-1]
+    return storage if storage.startswith(_CODE_PREFIXES) else "flat"
+
+
+def _similarity_section(index_spec: str, nprobe: int | None) -> Dict[str, Any]:
+    if index_spec == DEFAULT_INDEX_SPEC:
+        section: Dict[str, Any] = {
+            "space": "cosine",
+            "index_type": "faiss.IndexFlatIP",
+            "quantizer": "flat",
+            "notes": "cosine via inner product on normalized vectors",
+        }
+    else:
+        section = {
+            "space": "cosine",
+            "index_type": f"faiss:{index_spec}",
+            "index_spec": index_spec,
+            "quantizer": _quantizer_for(index_spec),
+            "notes": "approximate inner product search on normalized vectors",
+        }
+        if nprobe is not None:
+            section["nprobe"] = int(nprobe)
+    return section
+
+
 def _load_existing_cache(
     out_root: Path, *, model_name: str, max_seq_length: int
 ) -> Optional[Tuple[Dict[str, np.ndarray], int]]:
@@ -289,6 +425,8 @@ class PacketMaterializationInput:
     incremental_enabled: bool = True
     extra_files: Sequence[str] = ()
     extra_manifest: Mapping[str, Any] | None = None
+    index_spec: str = DEFAULT_INDEX_SPEC
+    nprobe: int | None = None
 
 
 @dataclass(frozen=True)
@@ -305,6 +443,8 @@ class DefaultBuilderConfig:
     embed_url: str = DEFAULT_EMBED_URL
     embeddings_mode: str = "http"
     timeout: float | None = None
+    index_spec: str = DEFAULT_INDEX_SPEC
+    nprobe: int | None = None
 
 
 def materialize_packet(input_data: PacketMaterializationInput) -> PacketManifest | None:
@@ -411,11 +551,10 @@ def materialize_packet(input_data: PacketMaterializationInput) -> PacketManifest
     write_docs_jsonl(chunks, docs_path)
     print(f"[write] docs.jsonl -> {docs_path} ({len(chunks)} lines)")
 
-    db = FaissFlatIP(dim=dim)
-    db.add(final_vecs)
+    index, index_spec = _build_index(final_vecs, dim=dim, index_spec=input_data.index_spec)
     db_path = out_root / "faiss" / "index.faiss"
-    db.save(str(db_path))
-    print(f"[write] faiss/index.faiss -> {db_path}")
+    save_faiss_index(index, db_path)
+    print(f"[write] faiss/index.faiss -> {db_path} (spec={index_spec})")
 
     vectors_path = out_root / "vectors.f16.bin"
     write_vectors_f16(final_vecs, vectors_path)
@@ -445,18 +584,14 @@ def materialize_packet(input_data: PacketMaterializationInput) -> PacketManifest
             normalized=True,
             max_seq_length=input_data.max_seq_length,
         ),
-        similarity={
-            "space": "cosine",
-            "index_type": "faiss.IndexFlatIP",
-            "notes": "cosine via inner product on normalized vectors",
-        },
+        similarity=_similarity_section(index_spec, input_data.nprobe),
         files={
             "docs": "docs.jsonl",
             "vectors": {"path": "vectors.f16.bin", "format": "f16_rowmajor"},
             "index": {"path": "faiss/index.faiss", "format": "faiss"},
             "calibration": None,
         },
-        counts={"docs": len(chunks), "vectors": int(db.index.ntotal)},
+        counts={"docs": len(chunks), "vectors": int(index.ntotal)},
         source={
             "input_dir": input_data.source_path.as_posix(),
             "file_ext_counts": dict(input_data.ext_counts),
@@ -666,5 +801,7 @@ class DefaultBuilder(CPMAbstractBuilder):
                 builder_name="cpm:default-builder",
                 embedder=self.embedder,
                 incremental_enabled=True,
+                index_spec=self.config.index_spec,
+                nprobe=self.config.nprobe,
             )
         )
@@ -14,6 +14,7 @@ from typing import Any
 from cpm_core.api import cpmcommand
 from cpm_builtin.embeddings import EmbeddingClient, VALID_EMBEDDING_MODES
 from cpm_builtin.embeddings.config import EmbeddingsConfigService
+from cpm_builtin.packages.io import read_simple_yml as _read_simple_yml
 from cpm_core.build import DefaultBuilder, DefaultBuilderConfig, embed_packet_from_chunks
 from cpm_core.packet import (
     DEFAULT_LOCKFILE_NAME,
@@ -21,6 +22,7 @@ from cpm_core.packet import (
     build_resolved_plan,
     load_lock,
     lock_has_non_deterministic_sections,
+    probes_ivf_lists,
     render_lock,
     verify_artifacts,
     verify_lock_against_plan,
@@ -80,29 +82,6 @@ def _as_bool(value: Any, default: bool) -> bool:
     return default
 
 
-def _read_simple_yml(path: Path) -> dict[str, str]:
-    out: dict[str, str] = {}
-    try:
-        lines = path.read_text(encoding="utf-8").splitlines()
-    except FileNotFoundError:
-        return out
-    except UnicodeDecodeError:
-        lines = path.read_text(encoding="latin-1").splitlines()
-
-    for raw in lines:
-        line = raw.strip()
-        if not line or line.startswith("#"):
-            continue
-        if ":" not in line:
-            continue
-        key, value = line.split(":", 1)
-        key = key.strip()
-        value = value.strip().strip('"').strip("'")
-        if key:
-            out[key] = value
-    return out
-
-
 def _write_simple_yml(path: Path, kv: dict[str, str]) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
     with path.open("w", encoding="utf-8") as handle:
@@ -145,6 +124,16 @@ def _resolve_default_embedding_provider(workspace_root: Path) -> Any:
     return None
 
 
+def _resolve_index_settings(argv: Any, embedding_data: dict[str, Any]) -> tuple[str, int | None]:
+    index_spec = _as_str(
+        getattr(argv, "index_spec", None),
+        _as_str(embedding_data.get("index_spec"), DefaultBuilderConfig().index_spec),
+    ).strip() or DefaultBuilderConfig().index_spec
+    cli_nprobe = getattr(argv, "nprobe", None)
+    nprobe = _as_int(cli_nprobe, _as_int(embedding_data.get("nprobe"), 0)) or None
+    return index_spec, nprobe
+
+
 def _merge_invocation(argv: Any, workspace_root: Path) -> _BuildInvocation:
     config_path = Path(argv.config) if getattr(argv, "config", None) else workspace_root / "config" / BUILD_CONFIG_FILE
     config_data = _load_build_config(config_path)
@@ -198,6 +187,8 @@ def _merge_invocation(argv: Any, workspace_root: Path) -> _BuildInvocation:
         _as_int(chunking_data.get("overlap_lines"), DefaultBuilderConfig().overlap_lines),
     )
 
+    index_spec, nprobe = _resolve_index_settings(argv, embedding_data)
+
     archive = not getattr(argv, "no_archive", False)
     if output_data:
         archive = _as_bool(output_data.get("archive"), archive)
@@ -260,6 +251,8 @@ def _merge_invocation(argv: Any, workspace_root: Path) -> _BuildInvocation:
         embed_url=embed_url,
         embeddings_mode=embeddings_mode,
         timeout=timeout_value,
+        index_spec=index_spec,
+        nprobe=nprobe,
     )
 
     return _BuildInvocation(
@@ -316,6 +309,18 @@ def _resolve_builder_plugin_version(builder_entry: CPMRegistryEntry, workspace_r
     return "unknown"
 
 
+def _hashed_resolved_config(config: DefaultBuilderConfig) -> dict[str, Any]:
+    # Default index settings stay out of the hash so locks written before
+    # index_spec/nprobe existed keep verifying against a Flat build; nprobe
+    # only counts for IVF specs, the only ones that read it.
+    resolved = asdict(config)
+    if resolved["index_spec"] == DefaultBuilderConfig().index_spec:
+        del resolved["index_spec"]
+    if resolved["nprobe"] is None or not probes_ivf_lists(config.index_spec):
+        del resolved["nprobe"]
+    return resolved
+
+
 def _build_lock_plan(
     invocation: _BuildInvocation,
     *,
@@ -324,7 +329,7 @@ def _build_lock_plan(
 ) -> Any:
     merged_config = {
         "build_config": invocation.config_payload,
-        "resolved_config": asdict(invocation.config),
+        "resolved_config": _hashed_resolved_config(invocation.config),
         "builder": builder_entry.qualified_name,
         "source": invocation.source.as_posix(),
     }
@@ -342,6 +347,8 @@ def _build_lock_plan(
         model_dtype="float16",
         normalize=True,
         max_seq_length=invocation.config.max_seq_length,
+        index_spec=invocation.config.index_spec,
+        nprobe=invocation.config.nprobe,
     )
 
 
@@ -431,6 +438,11 @@ class BuildCommand(_WorkspaceAwareCommand):
         parser.add_argument("--max-seq-length", type=int, help="Maximum tokens per chunk")
         parser.add_argument("--lines-per-chunk", type=int, help="Number of lines per chunk")
         parser.add_argument("--overlap-lines", type=int, help="Overlap lines between chunks")
+        parser.add_argument(
+            "--index-spec",
+            help="FAISS index_factory spec, e.g. 'OPQ64,IVF4096_HNSW32,PQ64' (default: Flat)",
+        )
+        parser.add_argument("--nprobe", type=int, help="IVF lists probed per query for approximate indexes")
         parser.add_argument("--archive-format", choices=SUPPORTED_ARCHIVE_FORMATS)
         parser.add_argument("--no-archive", action="store_true")
         parser.add_argument("--embed-url", help="Embedding server URL")
@@ -7,35 +7,13 @@ from argparse import ArgumentParser
 from pathlib import Path
 from typing import Any
 
+from cpm_builtin.packages.io import read_simple_yml as _read_simple_yml
 from cpm_builtin.packages.versions import version_key
 from cpm_core.api import cpmcommand
 
 from .commands import _WorkspaceAwareCommand
 
 
-def _read_simple_yml(path: Path) -> dict[str, str]:
-    out: dict[str, str] = {}
-    try:
-        lines = path.read_text(encoding="utf-8").splitlines()
-    except FileNotFoundError:
-        return out
-    except UnicodeDecodeError:
-        lines = path.read_text(encoding="latin-1").splitlines()
-
-    for raw in lines:
-        line = raw.strip()
-        if not line or line.startswith("#"):
-            continue
-        if ":" not in line:
-            continue
-        key, value = line.split(":", 1)
-        key = key.strip()
-        value = value.strip().strip('"').strip("'")
-        if key:
-            out[key] = value
-    return out
-
-
 @cpmcommand(name="lookup", group="cpm")
 class LookupCommand(_WorkspaceAwareCommand):
     """List packets under a destination root with metadata and health status."""
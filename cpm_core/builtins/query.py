@@ -168,9 +168,11 @@ class NativeFaissRetriever(CPMAbstractRetriever):
         max_seq_length = int(embedding_cfg.get("max_seq_length", 1024))
         docs = self._load_docs(docs_path)
         try:
-            import faiss
+            from cpm_core.packet.faiss_db import configure_search, load_faiss_index, mmap_requested
 
-            index = faiss.read_index(str(index_path))
+            similarity = manifest.get("similarity")
+            index = load_faiss_index(index_path, mmap=mmap_requested(similarity))
+            index = configure_search(index, similarity)
         except Exception as exc:  # pragma: no cover - defensive
             return {
                 "ok": False,
@@ -1,4 +1,15 @@
-from .faiss_db import FaissFlatIP, load_faiss_index, save_faiss_index
+from .faiss_db import (
+    DEFAULT_INDEX_SPEC,
+    FaissFlatIP,
+    build_faiss_index,
+    configure_search,
+    gpu_requested,
+    load_faiss_index,
+    mmap_requested,
+    probes_ivf_lists,
+    save_faiss_index,
+    to_gpu,
+)
 from .io import (
     compute_checksums,
     load_manifest,
@@ -43,7 +54,14 @@ __all__ = [
     "verify_artifacts",
     "verify_lock_against_plan",
     "write_lock",
+    "DEFAULT_INDEX_SPEC",
     "FaissFlatIP",
+    "build_faiss_index",
+    "configure_search",
+    "gpu_requested",
     "load_faiss_index",
+    "mmap_requested",
+    "probes_ivf_lists",
     "save_faiss_index",
+    "to_gpu",
 ]
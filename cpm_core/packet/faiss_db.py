@@ -1,11 +1,15 @@
 from __future__ import annotations
 
+import functools
+import os
 from pathlib import Path
-from typing import Tuple
+from typing import Any, Mapping, Tuple
 
 import faiss
 import numpy as np
 
+DEFAULT_INDEX_SPEC = "Flat"
+
 
 class FaissFlatIP:
     """Cosine similarity via Inner Product on L2-normalized vectors."""
@@ -33,9 +37,89 @@ class FaissFlatIP:
         faiss.write_index(self.index, str(path))
 
 
-def load_faiss_index(path: Path | str) -> faiss.Index:
+def load_faiss_index(path: Path | str, *, mmap: bool = False) -> faiss.Index:
+    """Read an index; with ``mmap`` the codes are mapped from disk instead of copied to the heap.
+
+    Index types that cannot be memory-mapped are read normally.
+    """
+    if mmap:
+        try:
+            return faiss.read_index(str(path), faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+        except RuntimeError:
+            pass
     return faiss.read_index(str(path))
 
 
+def _flag_requested(env_name: str, similarity: Mapping[str, Any] | None, key: str) -> bool:
+    env = os.environ.get(env_name)
+    if env is not None and env.strip():
+        return env.strip().lower() in {"1", "true", "yes", "on"}
+    return bool((similarity or {}).get(key, False))
+
+
+def mmap_requested(similarity: Mapping[str, Any] | None = None) -> bool:
+    """Whether indexes should be memory-mapped (``RAG_FAISS_MMAP=1`` or ``similarity.mmap``)."""
+    return _flag_requested("RAG_FAISS_MMAP", similarity, "mmap")
+
+
+def gpu_requested(similarity: Mapping[str, Any] | None = None) -> bool:
+    """Whether indexes should be moved to a GPU (``RAG_FAISS_GPU=1`` or ``similarity.gpu``)."""
+    return _flag_requested("RAG_FAISS_GPU", similarity, "gpu")
+
+
+@functools.cache
+def _gpu_resources() -> Any:
+    """One ``StandardGpuResources`` pool per process, created on first use."""
+    return faiss.StandardGpuResources()
+
+
+def to_gpu(index: faiss.Index, device: int = 0) -> faiss.Index:
+    """Copy ``index`` to a GPU, sharing one resource pool per process.
+
+    Returns ``index`` unchanged when FAISS has no GPU support, no device is
+    visible, or the index type cannot be converted.
+    """
+    get_num_gpus = getattr(faiss, "get_num_gpus", None)
+    if get_num_gpus is None or get_num_gpus() <= 0:
+        return index
+    try:
+        return faiss.index_cpu_to_gpu(_gpu_resources(), device, index)
+    except (AttributeError, RuntimeError):
+        return index
+
+
 def save_faiss_index(index: faiss.Index, path: Path | str) -> None:
     faiss.write_index(index, str(path))
+
+
+def build_faiss_index(vectors: np.ndarray, *, index_spec: str = DEFAULT_INDEX_SPEC) -> faiss.Index:
+    """Build an inner-product index from an ``index_factory`` spec such as ``"OPQ64,IVF4096_HNSW32,PQ64"``.
+
+    Trainable specs (IVF/PQ/OPQ) are trained on ``vectors`` before they are added.
+    """
+    if vectors.dtype != np.float32:
+        vectors = vectors.astype("float32")
+    if vectors.ndim != 2:
+        raise ValueError(f"Expected vectors shape (n, dim), got {vectors.shape}")
+    index = faiss.index_factory(int(vectors.shape[1]), index_spec, faiss.METRIC_INNER_PRODUCT)
+    if not index.is_trained:
+        index.train(vectors)
+    index.add(vectors)
+    return index
+
+
+def probes_ivf_lists(index_spec: str) -> bool:
+    """Return True when ``index_spec`` builds an IVF index, the only kind that reads ``nprobe``."""
+    return "IVF" in index_spec.upper()
+
+
+def configure_search(index: faiss.Index, similarity: Mapping[str, Any] | None) -> faiss.Index:
+    """Apply query-time parameters recorded in ``manifest["similarity"]`` (e.g. ``nprobe``)."""
+    nprobe = (similarity or {}).get("nprobe")
+    if nprobe is None:
+        return index
+    try:
+        faiss.ParameterSpace().set_index_parameters(index, f"nprobe={int(nprobe)}")
+    except (RuntimeError, ValueError):
+        pass
+    return index
@@ -14,25 +14,24 @@ def _chunk_hash(text: str) -> str:
     return hashlib.sha256(text.encode("utf-8")).hexdigest()
 
 
-def _sha256_file(path: Path, chunk_size: int = 1024 * 1024) -> str:
-    digest = hashlib.sha256()
-    with path.open("rb") as f:
-        for chunk in iter(lambda: f.read(chunk_size), b""):
-            digest.update(chunk)
-    return digest.hexdigest()
+def _sha256_file(path: Path) -> str:
+    # file_digest hashes through the C buffer path without per-chunk Python calls
+    with path.open("rb") as handle:
+        return hashlib.file_digest(handle, "sha256").hexdigest()
 
 
 def write_docs_jsonl(chunks: Iterable[DocChunk], path: Path) -> None:
+    # one dumps() per line instead of json.dump's many small writes; the default
+    # separators keep docs.jsonl, and so packet hashes, identical to earlier builds
     with path.open("w", encoding="utf-8") as f:
         for chunk in chunks:
-            entry: dict[str, object | str] = {
+            entry: dict[str, object] = {
                 "id": chunk.id,
                 "text": chunk.text,
                 "hash": _chunk_hash(chunk.text),
                 "metadata": chunk.metadata,
             }
-            json.dump(entry, f, ensure_ascii=False)
-            f.write("\n")
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
 
 
 def read_docs_jsonl(path: Path) -> list[DocChunk]:
@@ -8,6 +8,7 @@ from importlib import metadata as importlib_metadata
 from pathlib import Path
 from typing import Any, Mapping, Sequence
 
+from .faiss_db import DEFAULT_INDEX_SPEC, probes_ivf_lists
 
 LOCKFILE_VERSION = 1
 DEFAULT_LOCKFILE_NAME = "packet.lock.json"
@@ -36,15 +37,10 @@ def _sha256_text(text: str) -> str:
     return hashlib.sha256(text.encode("utf-8")).hexdigest()
 
 
-def _sha256_file(path: Path, chunk_size: int = 1024 * 1024) -> str:
-    digest = hashlib.sha256()
+def _sha256_file(path: Path) -> str:
+    # file_digest hashes through the C buffer path without per-chunk Python calls
     with path.open("rb") as handle:
-        while True:
-            chunk = handle.read(chunk_size)
-            if not chunk:
-                break
-            digest.update(chunk)
-    return digest.hexdigest()
+        return hashlib.file_digest(handle, "sha256").hexdigest()
 
 
 def _normalize_path(path: Path) -> str:
@@ -90,6 +86,15 @@ def _cpm_version() -> str:
         return "unknown"
 
 
+def _index_params(index_spec: str, nprobe: int | None) -> dict[str, Any]:
+    if index_spec == DEFAULT_INDEX_SPEC:
+        return {"index": "faiss.IndexFlatIP"}
+    params: dict[str, Any] = {"index": f"faiss:{index_spec}", "index_spec": index_spec}
+    if nprobe is not None and probes_ivf_lists(index_spec):
+        params["nprobe"] = int(nprobe)
+    return params
+
+
 def build_resolved_plan(
     *,
     source_path: Path,
@@ -105,6 +110,8 @@ def build_resolved_plan(
     model_dtype: str,
     normalize: bool,
     max_seq_length: int | None,
+    index_spec: str = DEFAULT_INDEX_SPEC,
+    nprobe: int | None = None,
 ) -> ResolvedPacketPlan:
     config_hash = _sha256_text(_canonical_json(dict(config_payload)))
     warnings: list[str] = []
@@ -135,7 +142,7 @@ def build_resolved_plan(
             "plugin": builder_plugin,
             "plugin_version": builder_plugin_version,
             "config_hash": config_hash,
-            "params": {"index": "faiss.IndexFlatIP"},
+            "params": _index_params(index_spec, nprobe),
         },
     ]
     models = [
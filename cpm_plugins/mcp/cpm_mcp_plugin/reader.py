@@ -3,171 +3,62 @@
 from __future__ import annotations
 
 import json
-import re
+import os
+from concurrent.futures import ThreadPoolExecutor
 from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
-
-_STAGE_ORDER = {
-    "dev": 0,
-    "snapshot": 0,
-    "nightly": 0,
-    "a": 10,
-    "alpha": 10,
-    "b": 20,
-    "beta": 20,
-    "pre": 30,
-    "preview": 30,
-    "rc": 40,
-    "candidate": 40,
-    "stable": 90,
-    "release": 90,
-    "ga": 90,
-    "final": 100,
-}
-
-
-def _read_json(path: Path) -> Optional[Dict[str, Any]]:
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from cpm_builtin.packages.io import read_simple_yml as _read_simple_yml
+from cpm_builtin.packages.versions import version_key
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None  # type: ignore[assignment]
+
+_LOOKUP_WORKERS = 16
+# below this many packets the lookups finish before a pool would pay off
+_PARALLEL_LOOKUP_MIN = 8
+# shared across calls; ThreadPoolExecutor only starts its threads on first submit
+_LOOKUP_POOL = ThreadPoolExecutor(max_workers=_LOOKUP_WORKERS, thread_name_prefix="cpm-packet-lookup")
+
+
+def _json_loads(data: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _read_json(path: str | Path) -> Optional[Dict[str, Any]]:
     try:
-        return json.loads(path.read_text(encoding="utf-8"))
+        with open(path, "rb") as handle:
+            return _json_loads(handle.read())
     except FileNotFoundError:
         return None
     except Exception:
         return None
 
 
-def _read_simple_yml(path: Path) -> Dict[str, str]:
-    out: Dict[str, str] = {}
-    try:
-        lines = path.read_text(encoding="utf-8").splitlines()
-    except FileNotFoundError:
-        return out
-    except UnicodeDecodeError:
-        lines = path.read_text(encoding="latin-1").splitlines()
-
-    for raw in lines:
-        line = raw.strip()
-        if not line or line.startswith("#"):
-            continue
-        if ":" not in line:
-            continue
-        k, v = line.split(":", 1)
-        k = k.strip()
-        v = v.strip().strip('"').strip("'")
-        if k:
-            out[k] = v
-    return out
-
-
 def _split_csv(value: Optional[str]) -> List[str]:
     if not value:
         return []
     return [item.strip() for item in value.split(",") if item.strip()]
 
 
-def _safe_segment(seg: str) -> str:
-    value = (seg or "").strip()
-    if not value:
-        return ""
-    value = value.replace("\\", "/").replace("/", "-")
-    value = re.sub(r"[^a-zA-Z0-9._\\-+@]+", "-", value).strip("-")
-    return value
-
-
-def split_version_parts(version: str) -> List[str]:
-    v = (version or "").strip()
-    if not v:
-        raise ValueError("empty version")
-    raw = v.split(".")
-    parts = [_safe_segment(part) for part in raw if part is not None and part != ""]
-    parts = [part for part in parts if part]
-    if not parts:
-        raise ValueError(f"invalid version after sanitization: {version!r}")
-    return parts
-
-
-def _split_segment_tokens(seg: str) -> Tuple[str, List[str]]:
-    value = (seg or "").strip()
-    if "-" not in value:
-        return value, []
-    parts = [part for part in value.split("-") if part != ""]
-    return (parts[0], parts[1:]) if parts else (value, [])
-
-
-def _tokenize_text_and_int(segment: str) -> List[Any]:
-    value = (segment or "").strip()
-    if not value:
-        return []
-    out: List[Any] = []
-    i = 0
-    while i < len(value):
-        if value[i].isdigit():
-            j = i
-            while j < len(value) and value[j].isdigit():
-                j += 1
-            out.append((0, int(value[i:j])))
-            i = j
-        else:
-            j = i
-            while j < len(value) and not value[j].isdigit():
-                j += 1
-            out.append((1, value[i:j].lower()))
-            i = j
-    return out
-
-
-def _qualifier_stage_and_num(tokens: List[str]) -> Tuple[int, int, Tuple[Any, ...]]:
-    if not tokens:
-        return (1000, 0, ())
-
-    flat: List[Any] = []
-    for token in tokens:
-        flat.extend(_tokenize_text_and_int(token))
-
-    stage_rank = None
-    stage_num = 0
-    extra: List[Any] = []
-
-    for typ, value in flat:
-        if typ == 1:
-            if value in _STAGE_ORDER:
-                stage_rank = _STAGE_ORDER[value]
-                continue
-            extra.append((typ, value))
-        else:
-            extra.append((typ, value))
-        if stage_rank is not None:
-            break
-
-    if stage_rank is None:
-        stage_rank = 50
-
-    seen_stage = False
-    for typ, value in flat:
-        if typ == 1 and value in _STAGE_ORDER and not seen_stage:
-            seen_stage = True
-            continue
-        if seen_stage and typ == 0:
-            stage_num = value
-            break
-
-    return (stage_rank, stage_num, tuple(extra))
+_MANIFEST = "manifest.json"
+_CPM_YML = "cpm.yml"
+_DOCS = "docs.jsonl"
+_FAISS_INDEX = "faiss/index.faiss"
+_PACKET_MARKERS = (_MANIFEST, _CPM_YML, _DOCS, _FAISS_INDEX)
 
 
-def version_key(version: str) -> Tuple[Tuple[List[Any], int, int, Tuple[Any, ...]], ...]:
-    normalized = (version or "").strip()
-    segments = [segment for segment in normalized.split(".") if segment != ""]
-    out: List[Tuple[List[Any], int, int, Tuple[Any, ...]]] = []
-    for segment in segments:
-        base, qualifiers = _split_segment_tokens(segment)
-        base_tokens = _tokenize_text_and_int(base)
-        stage_rank, stage_num, extra = _qualifier_stage_and_num(qualifiers)
-        out.append((base_tokens, stage_rank, stage_num, extra))
-    return tuple(out)
+def _probe_packet_files(path: str) -> Dict[str, bool]:
+    return {name: os.path.isfile(os.path.join(path, name)) for name in _PACKET_MARKERS}
 
 
-def _looks_like_version_dir(path: Path) -> bool:
-    return (path / "manifest.json").exists() or (path / "faiss" / "index.faiss").exists()
+def _looks_like_version_dir(path: str) -> bool:
+    return os.path.isfile(os.path.join(path, _MANIFEST)) or os.path.isfile(os.path.join(path, _FAISS_INDEX))
 
 
 class PacketReader:
@@ -177,11 +68,14 @@ class PacketReader:
         self.root = cpm_dir
 
     def list_packets(self, *, include_all_versions: bool = False) -> List[Dict[str, Any]]:
+        found: Sequence[Tuple[Path, Optional[Dict[str, bool]]]]
         if include_all_versions:
-            dirs = self._iter_packet_dirs()
+            found = self._iter_packet_dirs()
         else:
-            dirs = self._current_packet_dirs()
-        return [self._extract_packet_info(path) for path in dirs]
+            found = [(path, None) for path in self._current_packet_dirs()]
+        if len(found) < _PARALLEL_LOOKUP_MIN:
+            return [self._extract_packet_info(path, present) for path, present in found]
+        return list(_LOOKUP_POOL.map(lambda item: self._extract_packet_info(*item), found))
 
     def resolve_packet_dir(self, packet: str) -> Optional[Path]:
         candidate = Path(packet)
@@ -224,42 +118,40 @@ class PacketReader:
                 dirs.append(version_dir)
         return dirs
 
-    def _iter_packet_dirs(self) -> List[Path]:
-        out: List[Path] = []
-        if not self.root.exists() or not self.root.is_dir():
-            return out
-
-        def is_packet_root(path: Path) -> bool:
-            return (
-                (path / "manifest.json").exists()
-                or (path / "cpm.yml").exists()
-                or (path / "faiss" / "index.faiss").exists()
-            )
-
-        for name_dir in sorted(self.root.iterdir()):
-            if not name_dir.is_dir():
-                continue
-            if is_packet_root(name_dir):
-                out.append(name_dir)
+    def _iter_packet_dirs(self) -> List[Tuple[Path, Dict[str, bool]]]:
+        if not self.root.is_dir():
+            return []
+        out: List[Tuple[str, Dict[str, bool]]] = []
+
+        def probe(path: str) -> Optional[Dict[str, bool]]:
+            present = _probe_packet_files(path)
+            is_root = present[_MANIFEST] or present[_CPM_YML] or present[_FAISS_INDEX]
+            return present if is_root else None
+
+        with os.scandir(self.root) as it:
+            name_dirs = sorted(entry.path for entry in it if entry.is_dir())
+        for name_dir in name_dirs:
+            present = probe(name_dir)
+            if present is not None:
+                out.append((name_dir, present))
                 continue
-            for candidate in name_dir.rglob("*"):
-                if not candidate.is_dir():
-                    continue
-                if candidate.name == ".history":
-                    continue
-                if candidate == name_dir:
-                    continue
-                if is_packet_root(candidate):
-                    out.append(candidate)
-
-        unique: List[Path] = []
+            for dirpath, dirnames, _filenames in os.walk(name_dir):
+                for dirname in dirnames:
+                    if dirname == ".history":
+                        continue
+                    candidate = os.path.join(dirpath, dirname)
+                    present = probe(candidate)
+                    if present is not None:
+                        out.append((candidate, present))
+
+        unique: List[Tuple[Path, Dict[str, bool]]] = []
         seen: set[str] = set()
-        for path in out:
-            key = str(path.resolve()).lower()
+        for path, present in out:
+            key = os.path.realpath(path).lower()
             if key in seen:
                 continue
             seen.add(key)
-            unique.append(path)
+            unique.append((Path(path), present))
         return unique
 
     def _packet_root(self, name: str) -> Path:
@@ -286,9 +178,8 @@ class PacketReader:
         if not root.exists():
             return []
         versions: List[str] = []
-        for path in root.rglob("cpm.yml"):
-            version_dir = path.parent
-            if not _looks_like_version_dir(version_dir):
+        for path in root.rglob(_CPM_YML):
+            if not _looks_like_version_dir(os.path.dirname(path)):
                 continue
             meta = _read_simple_yml(path)
             version = (meta.get("version") or "").strip()
@@ -296,11 +187,19 @@ class PacketReader:
                 versions.append(version)
         return sorted(set(versions), key=version_key)
 
-    def _extract_packet_info(self, packet_root: Path) -> Dict[str, Any]:
-        manifest = _read_json(packet_root / "manifest.json") or {}
-        yml = _read_simple_yml(packet_root / "cpm.yml")
-
-        name = yml.get("name") or manifest.get("packet_id") or packet_root.name
+    def _extract_packet_info(
+        self,
+        packet_root: Path,
+        present: Optional[Dict[str, bool]] = None,
+    ) -> Dict[str, Any]:
+        root = os.fspath(packet_root)
+        if present is None:
+            present = _probe_packet_files(root)
+        manifest = (_read_json(os.path.join(root, _MANIFEST)) if present[_MANIFEST] else None) or {}
+        yml = _read_simple_yml(os.path.join(root, _CPM_YML)) if present[_CPM_YML] else {}
+        dir_name = os.path.basename(root)
+
+        name = yml.get("name") or manifest.get("packet_id") or dir_name
         version = yml.get("version") or (manifest.get("cpm") or {}).get("version") or "unknown"
         description = yml.get("description") or ""
         tags = _split_csv(yml.get("tags"))
@@ -314,6 +213,7 @@ class PacketReader:
             emb_norm = embedding.get("normalized")
 
         counts = manifest.get("counts") or {}
+        similarity = manifest.get("similarity") or {}
 
         return {
             "name": name,
@@ -321,15 +221,18 @@ class PacketReader:
             "description": description,
             "tags": tags,
             "entrypoints": entrypoints,
-            "dir_name": packet_root.name,
-            "path": str(packet_root).replace("\\", "/"),
+            "dir_name": dir_name,
+            "path": root.replace("\\", "/"),
             "docs": counts.get("docs"),
             "vectors": counts.get("vectors"),
             "embedding_model": emb_model,
             "embedding_dim": emb_dim,
             "embedding_normalized": emb_norm,
-            "has_faiss": (packet_root / "faiss" / "index.faiss").exists(),
-            "has_docs": (packet_root / "docs.jsonl").exists(),
-            "has_manifest": (packet_root / "manifest.json").exists(),
-            "has_cpm_yml": (packet_root / "cpm.yml").exists(),
+            "index_type": similarity.get("index_type"),
+            "nprobe": similarity.get("nprobe"),
+            "quantizer": similarity.get("quantizer"),
+            "has_faiss": present[_FAISS_INDEX],
+            "has_docs": present[_DOCS],
+            "has_manifest": present[_MANIFEST],
+            "has_cpm_yml": present[_CPM_YML],
         }
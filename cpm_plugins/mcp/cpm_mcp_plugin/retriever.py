@@ -2,19 +2,164 @@
 
 from __future__ import annotations
 
-import json
 import os
+import threading
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 import faiss
+import numpy as np
+from requests.exceptions import RequestException
 from cpm_builtin.embeddings import EmbeddingClient
+from cpm_core.packet.faiss_db import (
+    configure_search,
+    gpu_requested,
+    load_faiss_index,
+    mmap_requested,
+    to_gpu,
+)
 
-from .reader import PacketReader
+from .reader import PacketReader, _json_loads
 
 DEFAULT_EMBED_URL = "http://127.0.0.1:8876"
 DEFAULT_EMBED_MODE = "http"
 
+_LF = 0x0A
+_CR = 0x0D
+# ASCII bytes str.isspace() accepts; any Unicode space (U+00A0, U+3000, ...) opens with a byte >= 0x80
+_ASCII_WHITESPACE = np.frombuffer(b" \t\r\v\f\x1c\x1d\x1e\x1f", dtype=np.uint8)
+_NON_ASCII = 0x80
+
+
+class PacketDocs:
+    """Random access over ``docs.jsonl`` without parsing every line.
+
+    The file is read once and line boundaries are located with a vectorized
+    newline scan; individual records are decoded on demand. Blank and
+    whitespace-only lines are skipped so positions match the FAISS vector ids.
+    The bytes are held in memory rather than mapped, so a rebuild rewriting
+    the file cannot fault an in-flight query.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._data = path.read_bytes()
+        self._starts = np.zeros(0, dtype=np.int64)
+        self._ends = np.zeros(0, dtype=np.int64)
+        if not self._data:
+            return
+        data = np.frombuffer(self._data, dtype=np.uint8)
+        newlines = np.flatnonzero(data == _LF).astype(np.int64)
+        starts = np.concatenate((np.zeros(1, dtype=np.int64), newlines + 1))
+        ends = np.concatenate((newlines, np.asarray([data.shape[0]], dtype=np.int64)))
+        # drop CR of CRLF endings, then empty lines
+        has_cr = ends > starts
+        has_cr[has_cr] = data[ends[has_cr] - 1] == _CR
+        ends = ends - has_cr
+        keep = ends > starts
+        # only lines that open with whitespace can be whitespace-only; decode those
+        # few and apply str.strip() so Unicode spaces count as blank too
+        leading = np.zeros_like(keep)
+        first = data[starts[keep]]
+        leading[keep] = np.isin(first, _ASCII_WHITESPACE) | (first >= _NON_ASCII)
+        for line in np.flatnonzero(leading):
+            text = self._data[starts[line] : ends[line]].decode("utf-8", errors="replace")
+            keep[line] = bool(text.strip())
+        self._starts = starts[keep]
+        self._ends = ends[keep]
+
+    def __len__(self) -> int:
+        return int(self._starts.shape[0])
+
+    def __getitem__(self, position: int) -> Dict[str, Any]:
+        if position < 0 or position >= len(self):
+            raise IndexError(position)
+        start, end = int(self._starts[position]), int(self._ends[position])
+        return _json_loads(self._data[start:end])
+
+
+_DOCS_CACHE: Dict[str, Tuple[Tuple[int, int], PacketDocs]] = {}
+_PACKET_CACHE: Dict[str, Tuple[Tuple[int, ...], Dict[str, Any], faiss.Index]] = {}
+# each EmbeddingClient owns a requests.Session, which is not documented as
+# thread-safe; query workers therefore keep their own clients. Thread-local
+# dicts are never shared, so creating a client needs no lock.
+_EMBEDDERS = threading.local()
+# per-path load locks: concurrent cold queries for one packet wait for a single load
+_LOAD_LOCKS: Dict[str, threading.Lock] = {}
+_LOAD_LOCKS_GUARD = threading.Lock()
+
+
+def _file_stamp(path: Path) -> Tuple[int, int]:
+    stat = path.stat()
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def _required_stamp(path: Path, label: str) -> Tuple[int, int]:
+    try:
+        return _file_stamp(path)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"missing {label} at {path}") from None
+
+
+def _load_lock(key: str) -> threading.Lock:
+    with _LOAD_LOCKS_GUARD:
+        return _LOAD_LOCKS.setdefault(key, threading.Lock())
+
+
+def _open_docs(docs_path: Path) -> PacketDocs:
+    key = os.path.abspath(docs_path)
+    stamp = _required_stamp(docs_path, "docs.jsonl")
+    cached = _DOCS_CACHE.get(key)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    with _load_lock(key):
+        cached = _DOCS_CACHE.get(key)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        docs = PacketDocs(docs_path)
+        _DOCS_CACHE[key] = (stamp, docs)
+    return docs
+
+
+def _load_packet_state(packet_dir: Path) -> Tuple[Dict[str, Any], faiss.Index]:
+    """Return ``(manifest, index)`` for a packet, reusing them while files are unchanged."""
+
+    # one stat per file both validates presence and keys the cache, so a warm
+    # query neither re-reads nor re-parses manifest.json
+    manifest_path = packet_dir / "manifest.json"
+    index_path = packet_dir / "faiss" / "index.faiss"
+    stamp = (*_required_stamp(manifest_path, "manifest"), *_required_stamp(index_path, "faiss index"))
+
+    key = os.path.abspath(packet_dir)
+    cached = _PACKET_CACHE.get(key)
+    if cached is not None and cached[0] == stamp:
+        return cached[1], cached[2]
+    with _load_lock(key):
+        # another thread may have loaded this stamp while we waited
+        cached = _PACKET_CACHE.get(key)
+        if cached is not None and cached[0] == stamp:
+            return cached[1], cached[2]
+        manifest = _json_loads(manifest_path.read_bytes())
+        similarity = manifest.get("similarity")
+        index = load_faiss_index(index_path, mmap=mmap_requested(similarity))
+        index = configure_search(index, similarity)
+        if gpu_requested(similarity):
+            index = to_gpu(index)
+        _PACKET_CACHE[key] = (stamp, manifest, index)
+    return manifest, index
+
+
+def _get_embedder(embed_url: str, embed_mode: str) -> EmbeddingClient:
+    clients: Optional[Dict[Tuple[str, str], EmbeddingClient]] = getattr(_EMBEDDERS, "clients", None)
+    if clients is None:
+        clients = _EMBEDDERS.clients = {}
+    key = (embed_url, embed_mode)
+    embedder = clients.get(key)
+    if embedder is None:
+        embedder = EmbeddingClient(embed_url, mode=embed_mode)
+        clients[key] = embedder
+    return embedder
+
 
 class EmbedServerError(RuntimeError):
     """Raised when the embedding HTTP service is unreachable."""
@@ -43,11 +188,7 @@ class PacketRetriever:
         if self.packet_dir is None:
             raise FileNotFoundError(packet)
 
-        manifest_path = self.packet_dir / "manifest.json"
-        if not manifest_path.exists():
-            raise FileNotFoundError(f"missing manifest at {manifest_path}")
-
-        self.manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+        self.manifest, self.index = _load_packet_state(self.packet_dir)
         embedding_cfg = self.manifest.get("embedding") or {}
         self.model_name = str(embedding_cfg.get("model"))
         if not self.model_name:
@@ -64,50 +205,59 @@ class PacketRetriever:
             or DEFAULT_EMBED_MODE
         )
         self.docs = self._load_docs()
-        self.index = self._load_index()
-
-    def _load_docs(self) -> List[Dict[str, Any]]:
-        docs_path = self.packet_dir / "docs.jsonl"
-        if not docs_path.exists():
-            raise FileNotFoundError(f"missing docs.jsonl at {docs_path}")
-        entries: List[Dict[str, Any]] = []
-        with docs_path.open("r", encoding="utf-8") as stream:
-            for line in stream:
-                payload = line.strip()
-                if not payload:
-                    continue
-                entry = json.loads(payload)
-                entries.append(entry)
-        return entries
-
-    def _load_index(self) -> faiss.Index:
-        index_path = self.packet_dir / "faiss" / "index.faiss"
-        if not index_path.exists():
-            raise FileNotFoundError(f"missing faiss index at {index_path}")
-        return faiss.read_index(str(index_path))
+
+    def _load_docs(self) -> PacketDocs:
+        return _open_docs(self.packet_dir / "docs.jsonl")
 
     def _new_embedder(self) -> EmbeddingClient:
-        embedder = EmbeddingClient(self.embed_url, mode=self.embed_mode)
-        if not embedder.health():
-            raise EmbedServerError(self.embed_url, self.embed_mode)
-        return embedder
+        return _get_embedder(self.embed_url, self.embed_mode)
 
     def retrieve(self, query: str, k: int) -> Dict[str, Any]:
+        hits = self._search([query], k)[0]
+        return {
+            **self._payload_header(k),
+            "query": query,
+            "results": hits,
+        }
+
+    def retrieve_many(self, queries: List[str], k: int) -> Dict[str, Any]:
+        """Embed and search a batch of queries with a single FAISS call."""
+
+        batches = self._search(list(queries), k) if queries else []
+        return {
+            **self._payload_header(k),
+            "queries": [
+                {"query": query, "results": hits}
+                for query, hits in zip(queries, batches)
+            ],
+        }
+
+    def _search(self, queries: List[str], k: int) -> List[List[Dict[str, Any]]]:
         embedder = self._new_embedder()
-        vector = embedder.embed_texts(
-            [query],
-            model_name=self.model_name,
-            max_seq_length=self.max_seq_length,
-            normalize=True,
-            dtype="float32",
-            show_progress=False,
-        )
-        scores, ids = self.index.search(vector, int(k))
-        scores, ids = scores[0], ids[0]
+        # no health() probe first: a transport failure of the embed call itself
+        # is reported as an unreachable server
+        try:
+            vectors = embedder.embed_texts(
+                queries,
+                model_name=self.model_name,
+                max_seq_length=self.max_seq_length,
+                normalize=True,
+                dtype="float32",
+                show_progress=False,
+            )
+        except RuntimeError as exc:
+            if isinstance(exc.__cause__, RequestException):
+                raise EmbedServerError(self.embed_url, self.embed_mode) from exc
+            raise
+        # FAISS copies anything that is not C-contiguous float32
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        scores, ids = self.index.search(vectors, int(k))
+        return [self._hits(row_ids, row_scores) for row_ids, row_scores in zip(ids, scores)]
 
+    def _hits(self, ids: Any, scores: Any) -> List[Dict[str, Any]]:
         hits: List[Dict[str, Any]] = []
         for idx, score in zip(ids, scores):
-            if int(idx) < 0:
+            if int(idx) < 0 or int(idx) >= len(self.docs):
                 continue
             doc = self.docs[int(idx)]
             hits.append(
@@ -118,12 +268,13 @@ class PacketRetriever:
                     "metadata": doc.get("metadata") or {},
                 }
             )
+        return hits
 
+    def _payload_header(self, k: int) -> Dict[str, Any]:
         return {
             "ok": True,
             "packet": self.packet_dir.name,
             "packet_path": str(self.packet_dir).replace("\\", "/"),
-            "query": query,
             "k": int(k),
             "embedding": {
                 "model": self.model_name,
@@ -131,5 +282,4 @@ class PacketRetriever:
                 "embed_url": self.embed_url,
                 "mode": self.embed_mode,
             },
-            "results": hits,
         }
@@ -2,9 +2,10 @@
 
 from __future__ import annotations
 
+import asyncio
 import os
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, List, Optional
 
 from mcp.server.fastmcp import FastMCP
 
@@ -25,17 +26,16 @@ def lookup(
 ) -> Dict[str, Any]:
     reader = PacketReader(_resolve_cpm_dir(cpm_dir))
     packets = reader.list_packets(include_all_versions=bool(include_all_versions))
-    directory = reader.root.resolve()
     return {
         "ok": True,
-        "cpm_dir": str(directory).replace("\\", "/"),
+        "cpm_dir": os.path.realpath(reader.root).replace("\\", "/"),
         "packets": packets,
         "count": len(packets),
     }
 
 
 @mcp.tool()
-def query(
+async def query(
     packet: str,
     query: str,
     k: int = 5,
@@ -43,6 +43,50 @@ def query(
     embed_url: Optional[str] = None,
     embed_mode: Optional[str] = None,
 ) -> Dict[str, Any]:
+    return await asyncio.to_thread(
+        _with_retriever,
+        packet,
+        cpm_dir=cpm_dir,
+        embed_url=embed_url,
+        embed_mode=embed_mode,
+        action=lambda retriever: retriever.retrieve(query, k),
+    )
+
+
+@mcp.tool()
+async def query_many(
+    packet: str,
+    queries: List[str],
+    k: int = 5,
+    cpm_dir: str | None = None,
+    embed_url: Optional[str] = None,
+    embed_mode: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Run several queries against one packet with a single embedding call and index search.
+
+    Batches of roughly 32-128 queries make the best use of FAISS' parallel search.
+    """
+
+    return await asyncio.to_thread(
+        _with_retriever,
+        packet,
+        cpm_dir=cpm_dir,
+        embed_url=embed_url,
+        embed_mode=embed_mode,
+        action=lambda retriever: retriever.retrieve_many(list(queries), k),
+    )
+
+
+def _with_retriever(
+    packet: str,
+    *,
+    cpm_dir: str | None,
+    embed_url: Optional[str],
+    embed_mode: Optional[str],
+    action: Callable[[PacketRetriever], Dict[str, Any]],
+) -> Dict[str, Any]:
+    # runs on a worker thread: the embedding request and the FAISS search
+    # (which releases the GIL) overlap with other in-flight tool calls
     root = _resolve_cpm_dir(cpm_dir)
     try:
         retriever = PacketRetriever(root, packet, embed_url=embed_url, embed_mode=embed_mode)
@@ -54,13 +98,7 @@ def query(
             "tried": str(root / packet).replace("\\", "/"),
         }
     except EmbedServerError as exc:
-        return {
-            "ok": False,
-            "error": "embed_server_unreachable",
-            "embed_url": exc.embed_url,
-            "embed_mode": exc.embed_mode,
-            "hint": "configure an embedding provider with `cpm embed add ... --set-default` or set RAG_EMBED_URL/RAG_EMBED_MODE",
-        }
+        return _embed_server_unreachable(exc)
     except Exception as exc:
         return {
             "ok": False,
@@ -68,7 +106,21 @@ def query(
             "detail": str(exc),
         }
 
-    return retriever.retrieve(query, k)
+    # the embed call happens during retrieval, so an unreachable server surfaces here
+    try:
+        return action(retriever)
+    except EmbedServerError as exc:
+        return _embed_server_unreachable(exc)
+
+
+def _embed_server_unreachable(exc: EmbedServerError) -> Dict[str, Any]:
+    return {
+        "ok": False,
+        "error": "embed_server_unreachable",
+        "embed_url": exc.embed_url,
+        "embed_mode": exc.embed_mode,
+        "hint": "configure an embedding provider with `cpm embed add ... --set-default` or set RAG_EMBED_URL/RAG_EMBED_MODE",
+    }
 
 
 def run_server(
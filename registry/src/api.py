@@ -12,6 +12,8 @@ from storage import S3Storage
 
 log = logging.getLogger(__name__)
 
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
 
 def object_key_for_sha256(sha256: str) -> str:
     return f"blobs/sha256/{sha256}.tar.gz"
@@ -80,17 +82,23 @@ def make_app(settings: RegistrySettings) -> FastAPI:
             # overwrite requested → delete previous mapping
             db.delete_version(name, version)
 
-        data = await file.read()
-        if not data:
+        # hash the spooled upload in chunks instead of reading it into memory
+        digest = hashlib.sha256()
+        size_bytes = 0
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            digest.update(chunk)
+            size_bytes += len(chunk)
+        if not size_bytes:
             raise HTTPException(status_code=400, detail="empty upload")
 
-        sha256 = hashlib.sha256(data).hexdigest()
+        sha256 = digest.hexdigest()
         key = object_key_for_sha256(sha256)
 
         # upload to S3 (dedup: if already there, ok)
         if storage.head(key) is None:
+            await file.seek(0)
             try:
-                storage.put_bytes(key, data, content_type="application/gzip")
+                storage.put_fileobj(key, file.file, content_type="application/gzip")
             except ClientError as e:
                 log.error(f"S3 upload failed: {e}")
                 raise HTTPException(status_code=500, detail="S3 upload failed")
@@ -100,7 +108,7 @@ def make_app(settings: RegistrySettings) -> FastAPI:
             name=name,
             version=version,
             sha256=sha256,
-            size_bytes=len(data),
+            size_bytes=size_bytes,
             object_key=key,
             checksum=None,
             manifest_json=None,
@@ -110,7 +118,7 @@ def make_app(settings: RegistrySettings) -> FastAPI:
 
         return JSONResponse(
             status_code=201,
-            content={"ok": True, "name": name, "version": version, "sha256": sha256, "object_key": key, "size_bytes": len(data)},
+            content={"ok": True, "name": name, "version": version, "sha256": sha256, "object_key": key, "size_bytes": size_bytes},
         )
 
     @app.get("/v1/packages/{name}/{version}/download")
@@ -1,3 +1,5 @@
+from typing import BinaryIO
+
 import boto3
 from botocore.config import Config
 from botocore.exceptions import ClientError
@@ -88,6 +90,15 @@ class S3Storage:
             ContentType=content_type,
         )
 
+    def put_fileobj(self, key: str, fileobj: BinaryIO, content_type: str) -> None:
+        # managed transfer: multipart upload in bounded chunks, never the whole body in memory
+        self.client.upload_fileobj(
+            fileobj,
+            self.bucket,
+            key,
+            ExtraArgs={"ContentType": content_type},
+        )
+
     def get_streaming_body(self, key: str):
         response = self.client.get_object(Bucket=self.bucket, Key=key)
         return response['Body']
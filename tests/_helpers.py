@@ -0,0 +1,32 @@
+"""Helpers shared across test modules; fixtures and hooks live in conftest.py."""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+
+try:
+    import orjson
+
+    json_loads = orjson.loads
+    json_dumps = orjson.dumps
+except ImportError:  # pragma: no cover - stdlib fallback
+
+    def json_loads(data: bytes) -> object:
+        return json.loads(data.decode("utf-8"))
+
+    def json_dumps(obj: object) -> bytes:
+        return json.dumps(obj).encode("utf-8")
+
+
+def link_or_copy(src: str | os.PathLike[str], dst: str | os.PathLike[str]) -> None:
+    """Hardlink ``src`` to ``dst``, copying when linking is not possible.
+
+    Only use it for files no test writes in place: a link shares the inode, so
+    an in-place write would leak into every other copy.
+    """
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
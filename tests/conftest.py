@@ -0,0 +1,77 @@
+"""Fixtures shared across test modules."""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# the MCP plugin is not an installed package; put its source on sys.path before
+# test modules are collected so they can import cpm_mcp_plugin at the top
+_MCP_PLUGIN_SRC = str(Path(__file__).parent.parent / "cpm_plugins" / "mcp")
+if _MCP_PLUGIN_SRC not in sys.path:
+    sys.path.insert(0, _MCP_PLUGIN_SRC)
+
+_SHM_ROOT = Path("/dev/shm")
+_SHM_MIN_FREE = 256 * 1024 * 1024
+_TMPFS_BASETEMP = pytest.StashKey[str]()
+
+
+def _tmpfs_has_room() -> bool:
+    if not (_SHM_ROOT.is_dir() and os.access(_SHM_ROOT, os.W_OK | os.X_OK)):
+        return False
+    return shutil.disk_usage(_SHM_ROOT).free >= _SHM_MIN_FREE
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    """Opt in with ``CPM_TEST_TMPFS=1`` to stage tmp_path trees on ``/dev/shm``.
+
+    Only this run's ``basetemp`` changes; the environment seen by CLI and
+    ``pigz`` subprocesses does not. A small tmpfs (Docker defaults to 64 MB)
+    keeps the regular temp root.
+    """
+    if os.environ.get("CPM_TEST_TMPFS") != "1" or config.option.basetemp or not _tmpfs_has_room():
+        return
+    basetemp = tempfile.mkdtemp(prefix="pytest-cpm-", dir=_SHM_ROOT)
+    config.stash[_TMPFS_BASETEMP] = basetemp
+    config.option.basetemp = basetemp
+
+
+def pytest_unconfigure(config: pytest.Config) -> None:
+    # pytest never prunes an explicit basetemp; do not leave RAM-backed trees behind
+    basetemp = config.stash.get(_TMPFS_BASETEMP, None)
+    if basetemp is not None:
+        shutil.rmtree(basetemp, ignore_errors=True)
+
+
+_DEMO_MANIFEST_JSON = json.dumps(
+    {
+        "schema_version": "1.0",
+        "packet_id": "demo",
+        "embedding": {"provider": "x", "model": "m", "dim": 2, "dtype": "float16", "normalized": True},
+        "cpm": {"name": "demo", "version": "1.0.0"},
+    }
+).encode("utf-8")
+
+
+def _write_demo_packet(root: Path) -> Path:
+    packet = root / "demo" / "1.0.0"
+    (packet / "faiss").mkdir(parents=True, exist_ok=True)
+    (packet / "cpm.yml").write_bytes(b"name: demo\nversion: 1.0.0\n")
+    (packet / "docs.jsonl").write_bytes(b'{"id": "1", "text": "hello"}\n')
+    (packet / "vectors.f16.bin").write_bytes(b"\x00\x01")
+    (packet / "faiss" / "index.faiss").write_bytes(b"INDEX")
+    (packet / "manifest.json").write_bytes(_DEMO_MANIFEST_JSON)
+    (packet / "packet.lock.json").write_bytes(b'{"lockfileVersion":1}')
+    return packet
+
+
+@pytest.fixture(scope="session")
+def demo_packet(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    """Built ``demo@1.0.0`` packet directory; read-only, so copy it before changing anything."""
+    return _write_demo_packet(tmp_path_factory.mktemp("demo_packet"))
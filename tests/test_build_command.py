@@ -3,14 +3,21 @@
 from __future__ import annotations
 
 import json
+import os
 from pathlib import Path
 import shutil
+import sys
+import tarfile
 
 import numpy as np
+import pytest
 
+from cpm_builtin.embeddings.client import EmbeddingClient
 from cpm_cli import main as cli_main
 from cpm_core.build import DefaultBuilderConfig
-from cpm_core.packet import load_lock
+from cpm_core.build.builder import _archive_packet_dir, _similarity_section
+from cpm_core.builtins.build import _hashed_resolved_config
+from cpm_core.packet import build_resolved_plan, load_lock
 from cpm_core.packet.faiss_db import load_faiss_index
 from cpm_core.packet.io import (
     load_manifest,
@@ -18,39 +25,38 @@ from cpm_core.packet.io import (
     read_vectors_f16,
 )
 
+_FAKE_DIMS = 4
 
-def test_build_command_creates_packet(tmp_path: Path, monkeypatch) -> None:
+
+def _fake_embed_texts(
+    self,
+    texts,
+    *,
+    model_name: str,
+    max_seq_length: int,
+    normalize: bool,
+    dtype: str,
+    show_progress: bool,
+):
+    vectors = np.zeros((len(texts), _FAKE_DIMS), dtype=np.float32)
+    vectors[np.arange(len(texts)), np.arange(len(texts)) % _FAKE_DIMS] = 1.0
+    return vectors
+
+
+@pytest.fixture
+def fake_embedder(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Run from ``tmp_path`` against a healthy embedder that returns one-hot vectors."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(EmbeddingClient, "health", lambda self: True)
+    monkeypatch.setattr(EmbeddingClient, "embed_texts", _fake_embed_texts)
+
+
+def test_build_command_creates_packet(tmp_path: Path, fake_embedder) -> None:
     project = tmp_path / "docs"
     project.mkdir()
     (project / "intro.md").write_text("Welcome\nThis is a sample project\nEnd", encoding="utf-8")
     (project / "code.py").write_text("def hello():\n    return 42\n", encoding="utf-8")
 
-    monkeypatch.chdir(tmp_path)
-
-    monkeypatch.setattr("cpm_builtin.embeddings.client.EmbeddingClient.health", lambda self: True)
-
-    def fake_embed_texts(
-        self,
-        texts,
-        *,
-        model_name: str,
-        max_seq_length: int,
-        normalize: bool,
-        dtype: str,
-        show_progress: bool,
-    ):
-        dims = 4
-        vectors = []
-        for idx in range(len(texts)):
-            vector = [1.0 if component == idx else 0.0 for component in range(dims)]
-            vectors.append(vector)
-        return np.asarray(vectors, dtype=np.float32)
-
-    monkeypatch.setattr(
-        "cpm_builtin.embeddings.client.EmbeddingClient.embed_texts",
-        fake_embed_texts,
-    )
-
     result = cli_main(
         [
             "build",
@@ -85,36 +91,11 @@ def test_build_command_creates_packet(tmp_path: Path, monkeypatch) -> None:
     assert ids[0][0] == 0
 
 
-def test_build_command_generates_lockfile(tmp_path: Path, monkeypatch) -> None:
+def test_build_command_generates_lockfile(tmp_path: Path, fake_embedder) -> None:
     project = tmp_path / "docs"
     project.mkdir()
     (project / "intro.md").write_text("Welcome\nThis is a sample project\nEnd", encoding="utf-8")
 
-    monkeypatch.chdir(tmp_path)
-    monkeypatch.setattr("cpm_builtin.embeddings.client.EmbeddingClient.health", lambda self: True)
-
-    def fake_embed_texts(
-        self,
-        texts,
-        *,
-        model_name: str,
-        max_seq_length: int,
-        normalize: bool,
-        dtype: str,
-        show_progress: bool,
-    ):
-        dims = 4
-        vectors = []
-        for idx in range(len(texts)):
-            vector = [1.0 if component == idx else 0.0 for component in range(dims)]
-            vectors.append(vector)
-        return np.asarray(vectors, dtype=np.float32)
-
-    monkeypatch.setattr(
-        "cpm_builtin.embeddings.client.EmbeddingClient.embed_texts",
-        fake_embed_texts,
-    )
-
     result = cli_main(
         [
             "build",
@@ -136,35 +117,51 @@ def test_build_command_generates_lockfile(tmp_path: Path, monkeypatch) -> None:
     assert lock_payload["packet"]["name"] == "docs"
     assert lock_payload["packet"]["version"] == "1.2.3"
     assert lock_payload["artifacts"]["packet_manifest_hash"]
+    assert lock_payload["pipeline"][2]["params"] == {"index": "faiss.IndexFlatIP"}
+
+
+def test_lock_plan_hash_ignores_default_index_settings() -> None:
+    resolved = _hashed_resolved_config(DefaultBuilderConfig())
+    assert "index_spec" not in resolved
+    assert "nprobe" not in resolved
+
+    tuned = DefaultBuilderConfig(index_spec="IVF4096,SQ8", nprobe=16)
+    assert _hashed_resolved_config(tuned)["index_spec"] == "IVF4096,SQ8"
+    assert _hashed_resolved_config(tuned)["nprobe"] == 16
+
+
+@pytest.mark.parametrize("index_spec", ["Flat", "HNSW32", "PQ64"])
+def test_lock_plan_hash_ignores_nprobe_without_ivf(index_spec: str) -> None:
+    assert "nprobe" not in _hashed_resolved_config(DefaultBuilderConfig(index_spec=index_spec, nprobe=16))
+
+
+def test_lock_plan_records_index_spec_and_nprobe(tmp_path: Path) -> None:
+    plan = build_resolved_plan(
+        source_path=tmp_path,
+        packet_name="docs",
+        packet_version="1.0.0",
+        packet_id="docs",
+        build_profile="cpm:default-builder",
+        builder_plugin="cpm:default-builder",
+        builder_plugin_version="builtin",
+        config_payload={},
+        model_provider="sentence-transformers",
+        model_name="model",
+        model_dtype="float16",
+        normalize=True,
+        max_seq_length=512,
+        index_spec="IVF4096,SQ8",
+        nprobe=16,
+    )
+    assert plan.pipeline[2]["params"] == {"index": "faiss:IVF4096,SQ8", "index_spec": "IVF4096,SQ8", "nprobe": 16}
 
 
-def test_build_command_fails_on_lock_input_mismatch(tmp_path: Path, monkeypatch) -> None:
+def test_build_command_fails_on_lock_input_mismatch(tmp_path: Path, fake_embedder) -> None:
     project = tmp_path / "docs"
     project.mkdir()
     doc_path = project / "intro.md"
     doc_path.write_text("first", encoding="utf-8")
 
-    monkeypatch.chdir(tmp_path)
-    monkeypatch.setattr("cpm_builtin.embeddings.client.EmbeddingClient.health", lambda self: True)
-
-    def fake_embed_texts(
-        self,
-        texts,
-        *,
-        model_name: str,
-        max_seq_length: int,
-        normalize: bool,
-        dtype: str,
-        show_progress: bool,
-    ):
-        vectors = [[1.0, 0.0, 0.0, 0.0] for _ in texts]
-        return np.asarray(vectors, dtype=np.float32)
-
-    monkeypatch.setattr(
-        "cpm_builtin.embeddings.client.EmbeddingClient.embed_texts",
-        fake_embed_texts,
-    )
-
     first_result = cli_main(
         [
             "build",
@@ -213,32 +210,11 @@ def test_build_command_fails_on_lock_input_mismatch(tmp_path: Path, monkeypatch)
     assert third_result == 0
 
 
-def test_build_verify_detects_artifact_tampering(tmp_path: Path, monkeypatch) -> None:
+def test_build_verify_detects_artifact_tampering(tmp_path: Path, fake_embedder) -> None:
     project = tmp_path / "docs"
     project.mkdir()
     (project / "intro.md").write_text("hello", encoding="utf-8")
 
-    monkeypatch.chdir(tmp_path)
-    monkeypatch.setattr("cpm_builtin.embeddings.client.EmbeddingClient.health", lambda self: True)
-
-    def fake_embed_texts(
-        self,
-        texts,
-        *,
-        model_name: str,
-        max_seq_length: int,
-        normalize: bool,
-        dtype: str,
-        show_progress: bool,
-    ):
-        vectors = [[1.0, 0.0, 0.0, 0.0] for _ in texts]
-        return np.asarray(vectors, dtype=np.float32)
-
-    monkeypatch.setattr(
-        "cpm_builtin.embeddings.client.EmbeddingClient.embed_texts",
-        fake_embed_texts,
-    )
-
     first_result = cli_main(
         [
             "build",
@@ -356,32 +332,11 @@ def test_build_describe_updates_packet_metadata(tmp_path: Path) -> None:
     assert "new description" in (packet_dir / "manifest.json").read_text(encoding="utf-8")
 
 
-def test_build_command_accepts_version_alias(tmp_path: Path, monkeypatch) -> None:
+def test_build_command_accepts_version_alias(tmp_path: Path, fake_embedder) -> None:
     project = tmp_path / "docs"
     project.mkdir()
     (project / "intro.md").write_text("Welcome\nThis is a sample project\nEnd", encoding="utf-8")
 
-    monkeypatch.chdir(tmp_path)
-    monkeypatch.setattr("cpm_builtin.embeddings.client.EmbeddingClient.health", lambda self: True)
-
-    def fake_embed_texts(
-        self,
-        texts,
-        *,
-        model_name: str,
-        max_seq_length: int,
-        normalize: bool,
-        dtype: str,
-        show_progress: bool,
-    ):
-        vectors = [[1.0, 0.0, 0.0, 0.0] for _ in texts]
-        return np.asarray(vectors, dtype=np.float32)
-
-    monkeypatch.setattr(
-        "cpm_builtin.embeddings.client.EmbeddingClient.embed_texts",
-        fake_embed_texts,
-    )
-
     result = cli_main(
         [
             "build",
@@ -401,7 +356,7 @@ def test_build_command_accepts_version_alias(tmp_path: Path, monkeypatch) -> Non
     assert manifest.cpm["version"] == "2.0.0"
 
 
-def test_build_command_uses_default_provider_from_embeddings_config(tmp_path: Path, monkeypatch) -> None:
+def test_build_command_uses_default_provider_from_embeddings_config(tmp_path: Path, monkeypatch, fake_embedder) -> None:
     project = tmp_path / "docs"
     project.mkdir()
     (project / "intro.md").write_text("Welcome\nThis is a sample project\nEnd", encoding="utf-8")
@@ -418,30 +373,10 @@ def test_build_command_uses_default_provider_from_embeddings_config(tmp_path: Pa
         encoding="utf-8",
     )
 
-    monkeypatch.chdir(tmp_path)
-
     def fake_health(self):
         return self.base_url == "http://embed.local:9999"
 
-    monkeypatch.setattr("cpm_builtin.embeddings.client.EmbeddingClient.health", fake_health)
-
-    def fake_embed_texts(
-        self,
-        texts,
-        *,
-        model_name: str,
-        max_seq_length: int,
-        normalize: bool,
-        dtype: str,
-        show_progress: bool,
-    ):
-        vectors = [[1.0, 0.0, 0.0, 0.0] for _ in texts]
-        return np.asarray(vectors, dtype=np.float32)
-
-    monkeypatch.setattr(
-        "cpm_builtin.embeddings.client.EmbeddingClient.embed_texts",
-        fake_embed_texts,
-    )
+    monkeypatch.setattr(EmbeddingClient, "health", fake_health)
 
     result = cli_main(
         [
@@ -459,7 +394,7 @@ def test_build_command_uses_default_provider_from_embeddings_config(tmp_path: Pa
     assert result == 0
 
 
-def test_build_embed_generates_vectors_from_existing_chunks(tmp_path: Path, monkeypatch) -> None:
+def test_build_embed_generates_vectors_from_existing_chunks(tmp_path: Path, fake_embedder) -> None:
     packet_dir = tmp_path / "dist" / "docs" / "1.0.0"
     (packet_dir / "faiss").mkdir(parents=True, exist_ok=True)
     (packet_dir / "docs.jsonl").write_text(
@@ -486,26 +421,6 @@ def test_build_embed_generates_vectors_from_existing_chunks(tmp_path: Path, monk
         ),
         encoding="utf-8",
     )
-    monkeypatch.chdir(tmp_path)
-    monkeypatch.setattr("cpm_builtin.embeddings.client.EmbeddingClient.health", lambda self: True)
-
-    def fake_embed_texts(
-        self,
-        texts,
-        *,
-        model_name: str,
-        max_seq_length: int,
-        normalize: bool,
-        dtype: str,
-        show_progress: bool,
-    ):
-        vectors = [[1.0, 0.0, 0.0, 0.0] for _ in texts]
-        return np.asarray(vectors, dtype=np.float32)
-
-    monkeypatch.setattr(
-        "cpm_builtin.embeddings.client.EmbeddingClient.embed_texts",
-        fake_embed_texts,
-    )
 
     result = cli_main(
         [
@@ -523,3 +438,51 @@ def test_build_embed_generates_vectors_from_existing_chunks(tmp_path: Path, monk
     assert manifest.embedding.model == "new-model"
     assert (packet_dir / "vectors.f16.bin").exists()
     assert (packet_dir / "faiss" / "index.faiss").exists()
+
+
+@pytest.mark.parametrize("sendfile", [True, False], ids=["sendfile", "tar-stream"])
+def test_archive_tar_gz_streams_through_pigz_when_available(tmp_path: Path, monkeypatch, sendfile: bool) -> None:
+    gzip = shutil.which("gzip")
+    if sys.platform.startswith("win") or gzip is None:
+        pytest.skip("requires a POSIX shell and gzip")
+    # gzip rejects pigz's "-p N", so the stand-in records its arguments and drops them
+    fake_pigz = tmp_path / "pigz"
+    fake_pigz.write_text(f'#!/bin/sh\necho "$@" > "$0.args"\nexec {gzip} -c\n', encoding="utf-8")
+    fake_pigz.chmod(0o755)
+    real_which = shutil.which
+    monkeypatch.setattr(shutil, "which", lambda name: str(fake_pigz) if name == "pigz" else real_which(name))
+    sent: list[int] = []
+    if not sendfile:
+        monkeypatch.delattr(os, "sendfile", raising=False)
+    elif hasattr(os, "sendfile"):
+        real_sendfile = os.sendfile
+
+        def _counting_sendfile(*args: int) -> int:
+            sent.append(real_sendfile(*args))
+            return sent[-1]
+
+        monkeypatch.setattr(os, "sendfile", _counting_sendfile)
+
+    packet_dir = tmp_path / "out" / "1.0.0"
+    packet_dir.mkdir(parents=True)
+    (packet_dir / "docs.jsonl").write_text('{"id": "a"}\n', encoding="utf-8")
+    payload = bytes(range(256)) * 40 + b"tail"
+    (packet_dir / "vectors.f16.bin").write_bytes(payload)
+
+    archive = _archive_packet_dir(packet_dir, "tar.gz")
+
+    assert (tmp_path / "pigz.args").read_text(encoding="utf-8").startswith("-p ")
+    if sendfile and sys.platform.startswith("linux"):
+        assert sum(sent) == len(payload) + len('{"id": "a"}\n')
+    with tarfile.open(archive, "r:gz") as tar:
+        assert sorted(tar.getnames()) == ["1.0.0", "1.0.0/docs.jsonl", "1.0.0/vectors.f16.bin"]
+        extracted = tar.extractfile("1.0.0/vectors.f16.bin")
+        assert extracted is not None and extracted.read() == payload
+
+
+@pytest.mark.parametrize(
+    ("index_spec", "quantizer"),
+    [("Flat", "flat"), ("IVF4096,SQ8", "SQ8"), ("OPQ64,IVF4096_HNSW32,PQ64", "PQ64"), ("HNSW32", "flat")],
+)
+def test_similarity_section_records_quantizer(index_spec: str, quantizer: str) -> None:
+    assert _similarity_section(index_spec, None)["quantizer"] == quantizer
@@ -9,6 +9,15 @@ from socketserver import ThreadingMixIn
 from cpm_builtin.embeddings import EmbeddingsConfigService
 
 
+_MODELS_BODY = json.dumps({"data": [{"id": "model-a"}]}).encode("utf-8")
+_EMBEDDINGS_BODY = json.dumps({"data": [{"index": 0, "embedding": [0.1, 0.2, 0.3]}]}).encode("utf-8")
+# the handler speaks HTTP/1.0 and never reads POST bodies, so every response closes its connection
+_OK_HEAD = b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nContent-Length: %d\r\nConnection: close\r\n\r\n"
+# the bodies never change, so each full response (status line, headers, body) goes out in one write
+_MODELS_RESPONSE = _OK_HEAD % len(_MODELS_BODY) + _MODELS_BODY
+_EMBEDDINGS_RESPONSE = _OK_HEAD % len(_EMBEDDINGS_BODY) + _EMBEDDINGS_BODY
+
+
 class _ThreadedServer(ThreadingMixIn, HTTPServer):
     daemon_threads = True
     allow_reuse_address = True
@@ -19,25 +28,13 @@ class _DiscoveryHandler(BaseHTTPRequestHandler):
         if self.path != "/v1/models":
             self.send_error(404)
             return
-        payload = {"data": [{"id": "model-a"}]}
-        data = json.dumps(payload).encode("utf-8")
-        self.send_response(200)
-        self.send_header("Content-Type", "application/json")
-        self.send_header("Content-Length", str(len(data)))
-        self.end_headers()
-        self.wfile.write(data)
+        self.wfile.write(_MODELS_RESPONSE)
 
     def do_POST(self) -> None:
         if self.path != "/v1/embeddings":
             self.send_error(404)
             return
-        payload = {"data": [{"index": 0, "embedding": [0.1, 0.2, 0.3]}]}
-        data = json.dumps(payload).encode("utf-8")
-        self.send_response(200)
-        self.send_header("Content-Type", "application/json")
-        self.send_header("Content-Length", str(len(data)))
-        self.end_headers()
-        self.wfile.write(data)
+        self.wfile.write(_EMBEDDINGS_RESPONSE)
 
     def log_message(self, format: str, *args: object) -> None:
         del format, args
@@ -46,7 +43,8 @@ class _DiscoveryHandler(BaseHTTPRequestHandler):
 
 def _start_server() -> tuple[_ThreadedServer, str]:
     server = _ThreadedServer(("127.0.0.1", 0), _DiscoveryHandler)
-    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    # shutdown() blocks for up to one poll interval, and the default is 0.5s
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True)
     thread.start()
     return server, f"http://127.0.0.1:{server.server_port}"
 
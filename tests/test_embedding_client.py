@@ -1,7 +1,9 @@
 from __future__ import annotations
 
 import json
+import socket
 import threading
+from collections.abc import Iterator
 from http.server import BaseHTTPRequestHandler, HTTPServer
 from socketserver import ThreadingMixIn
 from typing import Any
@@ -17,6 +19,9 @@ class _ThreadedServer(ThreadingMixIn, HTTPServer):
     allow_reuse_address = True
 
 
+_OK_HEAD = b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nContent-Length: %d\r\n\r\n"
+
+
 class _EmbeddingHandler(BaseHTTPRequestHandler):
     server_version = "MockEmbedding/1.0"
     protocol_version = "HTTP/1.1"
@@ -31,7 +36,7 @@ class _EmbeddingHandler(BaseHTTPRequestHandler):
 
     def do_GET(self) -> None:
         if self.path == "/health":
-            self._respond(200, {"ok": True})
+            self._respond({"ok": True})
             return
         self.send_error(404)
 
@@ -44,7 +49,7 @@ class _EmbeddingHandler(BaseHTTPRequestHandler):
             data: list[dict[str, Any]] = []
             for idx, _text in enumerate(inputs):
                 data.append({"index": idx, "embedding": [float(idx + 1), 0.0]})
-            self._respond(200, {"object": "list", "data": data, "model": "mock-openai"})
+            self._respond({"object": "list", "data": data, "model": "mock-openai"})
             return
 
         if self.path == "/embed":
@@ -53,18 +58,15 @@ class _EmbeddingHandler(BaseHTTPRequestHandler):
             payload = json.loads(body.decode("utf-8"))
             texts = payload.get("texts") or []
             vectors = [[float(idx), float(idx)] for idx, _ in enumerate(texts)]
-            self._respond(200, {"vectors": vectors})
+            self._respond({"vectors": vectors})
             return
 
         self.send_error(404)
 
-    def _respond(self, status: int, body: dict[str, Any]) -> None:
+    def _respond(self, body: dict[str, Any]) -> None:
         payload = json.dumps(body).encode("utf-8")
-        self.send_response(status)
-        self.send_header("Content-Type", "application/json")
-        self.send_header("Content-Length", str(len(payload)))
-        self.end_headers()
-        self.wfile.write(payload)
+        # status line, headers and body in one write; the 204 and 404 paths keep the helpers
+        self.wfile.write(_OK_HEAD % len(payload) + payload)
 
     def log_message(self, format: str, *args: object) -> None:
         return
@@ -72,7 +74,8 @@ class _EmbeddingHandler(BaseHTTPRequestHandler):
 
 def _start_server() -> tuple[_ThreadedServer, str]:
     server = _ThreadedServer(("127.0.0.1", 0), _EmbeddingHandler)
-    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    # shutdown() blocks for up to one poll interval, and the default is 0.5s
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True)
     thread.start()
     return server, f"http://127.0.0.1:{server.server_port}"
 
@@ -82,24 +85,36 @@ def _stop_server(server: _ThreadedServer) -> None:
     server.server_close()
 
 
-def test_embedding_client_http_mode_uses_openai_endpoint() -> None:
-    server, base_url = _start_server()
-    try:
-        client = EmbeddingClient(base_url=base_url, mode="http", timeout_s=1.0)
-        assert client.health() is True
-        vectors = client.embed_texts(
-            ["a", "b"],
-            model_name="test-model",
-            max_seq_length=128,
-            normalize=False,
-            dtype="float32",
-            show_progress=False,
-        )
-        assert isinstance(vectors, np.ndarray)
-        assert vectors.shape == (2, 2)
-        assert vectors.dtype == np.float32
-    finally:
-        _stop_server(server)
+def _dead_url() -> str:
+    """URL of a loopback port that was bound and released, so nothing is listening on it."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    return f"http://127.0.0.1:{port}"
+
+
+@pytest.fixture(scope="module")
+def base_url() -> Iterator[str]:
+    """One listening port for the module; only the health tests that need a dead server bind their own."""
+    server, url = _start_server()
+    yield url
+    _stop_server(server)
+
+
+def test_embedding_client_http_mode_uses_openai_endpoint(base_url: str) -> None:
+    client = EmbeddingClient(base_url=base_url, mode="http", timeout_s=1.0)
+    assert client.health() is True
+    vectors = client.embed_texts(
+        ["a", "b"],
+        model_name="test-model",
+        max_seq_length=128,
+        normalize=False,
+        dtype="float32",
+        show_progress=False,
+    )
+    assert isinstance(vectors, np.ndarray)
+    assert vectors.shape == (2, 2)
+    assert vectors.dtype == np.float32
 
 
 def test_embedding_client_rejects_legacy_mode() -> None:
@@ -110,3 +125,35 @@ def test_embedding_client_rejects_legacy_mode() -> None:
 def test_embedding_client_rejects_invalid_mode() -> None:
     with pytest.raises(ValueError, match="must be 'http'"):
         EmbeddingClient(base_url="http://127.0.0.1:8876", mode="invalid")
+
+
+def test_embedding_client_caches_positive_health_check() -> None:
+    server, base_url = _start_server()
+    client = EmbeddingClient(base_url=base_url, mode="http", timeout_s=1.0)
+    try:
+        assert client.health() is True
+    finally:
+        _stop_server(server)
+    # the server is gone, but the recent positive probe is reused
+    assert client.health() is True
+
+
+def test_embedding_client_does_not_cache_failed_health_check() -> None:
+    client = EmbeddingClient(base_url=_dead_url(), mode="http", timeout_s=1.0)
+    assert client.health() is False
+    assert client.health() is False
+
+
+def test_embedding_client_normalizes_into_contiguous_float32(base_url: str) -> None:
+    client = EmbeddingClient(base_url=base_url, mode="http", timeout_s=1.0)
+    vectors = client.embed_texts(
+        ["a", "b"],
+        model_name="test-model",
+        max_seq_length=128,
+        normalize=True,
+        dtype="float32",
+        show_progress=False,
+    )
+    assert vectors.dtype == np.float32
+    assert vectors.flags["C_CONTIGUOUS"]
+    np.testing.assert_allclose(vectors, [[1.0, 0.0], [1.0, 0.0]])
@@ -1,9 +1,29 @@
 """Tests for embedding internal representation types."""
 
+import re
+
+import numpy as np
 import pytest
 
 from cpm_builtin.embeddings.types import EmbedRequestIR, EmbedResponseIR
 
+# Compiled once and passed to pytest.raises(match=...)
+_RE_EMPTY_TEXTS = re.compile("texts cannot be empty")
+_RE_TEXTS_NOT_LIST = re.compile("texts must be a list")
+_RE_NON_STRING_TEXT = re.compile(r"texts\[1\] must be str")
+_RE_MODEL_NOT_STR = re.compile("model must be str or None")
+_RE_HINTS_NOT_DICT = re.compile("hints must be dict")
+_RE_REQUEST_EXTRA_NOT_DICT = re.compile("extra must be dict")
+_RE_EMPTY_VECTORS = re.compile("vectors cannot be empty")
+_RE_VECTORS_NOT_LIST = re.compile("vectors must be a list")
+_RE_VECTOR_NOT_LIST = re.compile(r"vectors\[0\] must be list")
+_RE_EMPTY_VECTOR = re.compile(r"vectors\[0\] cannot be empty")
+_RE_INCONSISTENT_DIMS = re.compile("inconsistent dimensions")
+_RE_NON_NUMERIC = re.compile(r"vectors\[0\]\[1\] must be numeric")
+_RE_USAGE_NOT_DICT = re.compile("usage must be dict or None")
+_RE_RESPONSE_EXTRA_NOT_DICT = re.compile("extra must be dict or None")
+_RE_COUNT_MISMATCH = re.compile("response has 1 vectors but request has 2 texts")
+
 
 class TestEmbedRequestIR:
     """Tests for EmbedRequestIR validation and behavior."""
@@ -29,35 +49,29 @@ class TestEmbedRequestIR:
         assert req.hints == {"normalize": True, "max_length": 512}
         assert req.extra == {"custom_param": "value"}
 
-    def test_empty_texts_raises(self) -> None:
-        """Test that empty texts list raises ValueError."""
-        with pytest.raises(ValueError, match="texts cannot be empty"):
-            EmbedRequestIR(texts=[])
-
-    def test_non_list_texts_raises(self) -> None:
-        """Test that non-list texts raises TypeError."""
-        with pytest.raises(TypeError, match="texts must be a list"):
-            EmbedRequestIR(texts="hello")  # type: ignore[arg-type]
-
-    def test_non_string_text_raises(self) -> None:
-        """Test that non-string elements in texts raise TypeError."""
-        with pytest.raises(TypeError, match=r"texts\[1\] must be str"):
-            EmbedRequestIR(texts=["hello", 123])  # type: ignore[list-item]
-
-    def test_non_string_model_raises(self) -> None:
-        """Test that non-string model raises TypeError."""
-        with pytest.raises(TypeError, match="model must be str or None"):
-            EmbedRequestIR(texts=["test"], model=123)  # type: ignore[arg-type]
-
-    def test_non_dict_hints_raises(self) -> None:
-        """Test that non-dict hints raises TypeError."""
-        with pytest.raises(TypeError, match="hints must be dict"):
-            EmbedRequestIR(texts=["test"], hints="invalid")  # type: ignore[arg-type]
-
-    def test_non_dict_extra_raises(self) -> None:
-        """Test that non-dict extra raises TypeError."""
-        with pytest.raises(TypeError, match="extra must be dict"):
-            EmbedRequestIR(texts=["test"], extra="invalid")  # type: ignore[arg-type]
+    @pytest.mark.parametrize(
+        ("kwargs", "exc", "match"),
+        [
+            ({"texts": []}, ValueError, _RE_EMPTY_TEXTS),
+            ({"texts": "hello"}, TypeError, _RE_TEXTS_NOT_LIST),
+            ({"texts": ["hello", 123]}, TypeError, _RE_NON_STRING_TEXT),
+            ({"texts": ["test"], "model": 123}, TypeError, _RE_MODEL_NOT_STR),
+            ({"texts": ["test"], "hints": "invalid"}, TypeError, _RE_HINTS_NOT_DICT),
+            ({"texts": ["test"], "extra": "invalid"}, TypeError, _RE_REQUEST_EXTRA_NOT_DICT),
+        ],
+        ids=[
+            "empty_texts",
+            "non_list_texts",
+            "non_string_text",
+            "non_string_model",
+            "non_dict_hints",
+            "non_dict_extra",
+        ],
+    )
+    def test_invalid_request_raises(self, kwargs: dict, exc: type[Exception], match: re.Pattern[str]) -> None:
+        """Test that invalid request fields raise the matching error."""
+        with pytest.raises(exc, match=match):
+            EmbedRequestIR(**kwargs)
 
     def test_with_hints_merges_correctly(self) -> None:
         """Test that with_hints merges hints correctly."""
@@ -115,50 +129,46 @@ class TestEmbedResponseIR:
         assert resp.usage == {"prompt_tokens": 10, "total_tokens": 10}
         assert resp.extra == {"provider": "custom"}
 
-    def test_empty_vectors_raises(self) -> None:
-        """Test that empty vectors list raises ValueError."""
-        with pytest.raises(ValueError, match="vectors cannot be empty"):
-            EmbedResponseIR(vectors=[])
-
-    def test_non_list_vectors_raises(self) -> None:
-        """Test that non-list vectors raises TypeError."""
-        with pytest.raises(TypeError, match="vectors must be a list"):
-            EmbedResponseIR(vectors="invalid")  # type: ignore[arg-type]
-
-    def test_non_list_vector_element_raises(self) -> None:
-        """Test that non-list vector elements raise TypeError."""
-        with pytest.raises(TypeError, match=r"vectors\[0\] must be list"):
-            EmbedResponseIR(vectors=["invalid"])  # type: ignore[list-item]
-
-    def test_empty_vector_raises(self) -> None:
-        """Test that empty vector raises ValueError."""
-        with pytest.raises(ValueError, match=r"vectors\[0\] cannot be empty"):
-            EmbedResponseIR(vectors=[[]])
-
-    def test_inconsistent_dimensions_raises(self) -> None:
-        """Test that inconsistent vector dimensions raise ValueError."""
-        with pytest.raises(ValueError, match="inconsistent dimensions"):
-            EmbedResponseIR(vectors=[[0.1, 0.2], [0.3, 0.4, 0.5]])
-
-    def test_non_numeric_element_raises(self) -> None:
-        """Test that non-numeric vector elements raise TypeError."""
-        with pytest.raises(TypeError, match=r"vectors\[0\]\[1\] must be numeric"):
-            EmbedResponseIR(vectors=[[0.1, "invalid"]])  # type: ignore[list-item]
-
-    def test_non_string_model_raises(self) -> None:
-        """Test that non-string model raises TypeError."""
-        with pytest.raises(TypeError, match="model must be str or None"):
-            EmbedResponseIR(vectors=[[0.1]], model=123)  # type: ignore[arg-type]
-
-    def test_non_dict_usage_raises(self) -> None:
-        """Test that non-dict usage raises TypeError."""
-        with pytest.raises(TypeError, match="usage must be dict or None"):
-            EmbedResponseIR(vectors=[[0.1]], usage="invalid")  # type: ignore[arg-type]
-
-    def test_non_dict_extra_raises(self) -> None:
-        """Test that non-dict extra raises TypeError."""
-        with pytest.raises(TypeError, match="extra must be dict or None"):
-            EmbedResponseIR(vectors=[[0.1]], extra="invalid")  # type: ignore[arg-type]
+    def test_as_array_returns_float32_matrix(self) -> None:
+        """Test that the validated vectors are exposed as a contiguous float32 matrix."""
+        resp = EmbedResponseIR(vectors=[[1, 2.5], [3, 4.0]])
+        matrix = resp.as_array()
+        assert matrix.dtype == np.float32
+        assert matrix.flags["C_CONTIGUOUS"]
+        assert matrix.tolist() == [[1.0, 2.5], [3.0, 4.0]]
+        assert resp.vectors == [[1, 2.5], [3, 4.0]]
+
+    @pytest.mark.parametrize(
+        ("kwargs", "exc", "match"),
+        [
+            ({"vectors": []}, ValueError, _RE_EMPTY_VECTORS),
+            ({"vectors": "invalid"}, TypeError, _RE_VECTORS_NOT_LIST),
+            ({"vectors": ["invalid"]}, TypeError, _RE_VECTOR_NOT_LIST),
+            ({"vectors": [(0.1, 0.2)]}, TypeError, _RE_VECTOR_NOT_LIST),
+            ({"vectors": [[]]}, ValueError, _RE_EMPTY_VECTOR),
+            ({"vectors": [[0.1, 0.2], [0.3, 0.4, 0.5]]}, ValueError, _RE_INCONSISTENT_DIMS),
+            ({"vectors": [[0.1, "invalid"]]}, TypeError, _RE_NON_NUMERIC),
+            ({"vectors": [[0.1]], "model": 123}, TypeError, _RE_MODEL_NOT_STR),
+            ({"vectors": [[0.1]], "usage": "invalid"}, TypeError, _RE_USAGE_NOT_DICT),
+            ({"vectors": [[0.1]], "extra": "invalid"}, TypeError, _RE_RESPONSE_EXTRA_NOT_DICT),
+        ],
+        ids=[
+            "empty_vectors",
+            "non_list_vectors",
+            "non_list_vector_element",
+            "tuple_vector_element",
+            "empty_vector",
+            "inconsistent_dimensions",
+            "non_numeric_element",
+            "non_string_model",
+            "non_dict_usage",
+            "non_dict_extra",
+        ],
+    )
+    def test_invalid_response_raises(self, kwargs: dict, exc: type[Exception], match: re.Pattern[str]) -> None:
+        """Test that invalid response fields raise the matching error."""
+        with pytest.raises(exc, match=match):
+            EmbedResponseIR(**kwargs)
 
     def test_dims_property(self) -> None:
         """Test the dims property returns correct dimension."""
@@ -181,7 +191,7 @@ class TestEmbedResponseIR:
         req = EmbedRequestIR(texts=["hello", "world"])
         resp = EmbedResponseIR(vectors=[[0.1, 0.2]])
 
-        with pytest.raises(ValueError, match="response has 1 vectors but request has 2 texts"):
+        with pytest.raises(ValueError, match=_RE_COUNT_MISMATCH):
             resp.validate_against_request(req)
 
     def test_accepts_integers_in_vectors(self) -> None:
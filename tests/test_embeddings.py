@@ -1,11 +1,15 @@
 import json
 import threading
+from collections.abc import Iterator
 from http.server import BaseHTTPRequestHandler, HTTPServer
 from pathlib import Path
-from socketserver import ThreadingMixIn
 
 import numpy as np
 import pytest
+import requests
+import yaml
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
 
 from cpm_builtin.embeddings import (
     EmbeddingCache,
@@ -14,67 +18,165 @@ from cpm_builtin.embeddings import (
     HttpEmbeddingConnector,
     l2_normalize,
 )
+from tests._helpers import json_dumps, json_loads
 
 
-class _ThreadedServer(ThreadingMixIn, HTTPServer):
-    daemon_threads = True
+class _SerialServer(HTTPServer):
+    """Handles requests one at a time on the serve_forever thread; tests never overlap requests.
+
+    Every response closes its connection, so a connector's pooled keep-alive
+    socket cannot hold the only handler while another connector waits.
+    """
+
     allow_reuse_address = True
 
 
+_OK_HEAD = b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nContent-Length: %d\r\nConnection: close\r\n\r\n"
+
+
 class _MockEmbedHandler(BaseHTTPRequestHandler):
     server_version = "MockEmbed/1.0"
     protocol_version = "HTTP/1.1"
 
     def do_POST(self) -> None:
+        self.close_connection = True
         expected_path = getattr(self.server, "expected_path", "/v1/embeddings")
         if self.path != expected_path:
             self.send_error(404)
             return
         length = int(self.headers.get("Content-Length", "0"))
         payload = self.rfile.read(length)
-        body = json.loads(payload.decode("utf-8"))
+        body = json_loads(payload)
         self.server.last_path = self.path
         self.server.last_headers = {str(k): str(v) for k, v in self.headers.items()}
-        texts = body.get("texts") or []
-        response_vectors = getattr(self.server, "response_vectors", None)
-        if response_vectors is None:
-            dims = getattr(self.server, "response_dim", 0) or 0
-            vectors = [[float(idx) for _ in range(dims)] for idx, _ in enumerate(texts)]
-        else:
-            vectors = [list(row) for row in response_vectors]
-        response = json.dumps({"vectors": vectors}).encode("utf-8")
-        self.send_response(200)
-        self.send_header("Content-Type", "application/json")
-        self.send_header("Content-Length", str(len(response)))
-        self.end_headers()
-        self.wfile.write(response)
+        response = _mock_response(self.server, body.get("texts") or [])
+        # status line, headers and body in one write; send_error keeps the helpers for 404
+        self.wfile.write(_OK_HEAD % len(response) + response)
 
     def log_message(self, format: str, *args: object) -> None:
         return
 
 
+def _mock_response(state: object, texts: list[str]) -> bytes:
+    response = getattr(state, "response_body", None)
+    if response is None:
+        dims = getattr(state, "response_dim", 0) or 0
+        key = (dims, len(texts))
+        response = state.response_cache.get(key)
+        if response is None:
+            vectors = [[float(idx)] * dims for idx in range(len(texts))]
+            response = json_dumps({"vectors": vectors})
+            state.response_cache[key] = response
+    return response
+
+
+def _reset_mock_state(
+    state: object,
+    response_dim: int = 0,
+    *,
+    expected_path: str = "/v1/embeddings",
+    response_vectors: list[list[float]] | None = None,
+) -> None:
+    state.response_dim = response_dim
+    # stdlib json on purpose: orjson would write NaN/Inf fixtures as null
+    state.response_body = (
+        None if response_vectors is None else json.dumps({"vectors": response_vectors}).encode("utf-8")
+    )
+    state.response_cache = {}
+    state.expected_path = expected_path
+    state.last_path = None
+    state.last_headers = {}
+
+
+def _configure_mock_server(
+    server: _SerialServer,
+    response_dim: int = 0,
+    *,
+    expected_path: str = "/v1/embeddings",
+    response_vectors: list[list[float]] | None = None,
+) -> str:
+    _reset_mock_state(server, response_dim, expected_path=expected_path, response_vectors=response_vectors)
+    return f"http://127.0.0.1:{server.server_port}"
+
+
+_IN_MEMORY_URL = "http://mock.embed"
+
+
+class _InMemoryAdapter(HTTPAdapter):
+    """Answers connector requests in-process with the same payloads as the TCP mock server."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        _reset_mock_state(self)
+
+    def send(self, request: requests.PreparedRequest, **kwargs: object) -> requests.Response:
+        response = requests.Response()
+        response.request = request
+        response.url = request.url
+        path = request.path_url
+        if path != self.expected_path:
+            response.status_code = 404
+            response.reason = "Not Found"
+            response._content = b""
+            return response
+        body = json_loads(request.body)
+        self.last_path = path
+        self.last_headers = dict(request.headers)
+        response.status_code = 200
+        response.reason = "OK"
+        response.headers = CaseInsensitiveDict({"Content-Type": "application/json"})
+        response._content = _mock_response(self, body.get("texts") or [])
+        return response
+
+
+def _in_memory_connector(provider: EmbeddingProviderConfig, adapter: _InMemoryAdapter) -> HttpEmbeddingConnector:
+    connector = HttpEmbeddingConnector(provider)
+    connector.session.mount(_IN_MEMORY_URL, adapter)
+    return connector
+
+
 def _start_mock_server(
     response_dim: int,
     *,
     expected_path: str = "/v1/embeddings",
     response_vectors: list[list[float]] | None = None,
-) -> tuple[_ThreadedServer, str]:
-    server = _ThreadedServer(("127.0.0.1", 0), _MockEmbedHandler)
-    server.response_dim = response_dim
-    server.response_vectors = response_vectors
-    server.expected_path = expected_path
-    server.last_path = None
-    server.last_headers = {}
-    thread = threading.Thread(target=server.serve_forever, daemon=True)
+) -> tuple[_SerialServer, str]:
+    server = _SerialServer(("127.0.0.1", 0), _MockEmbedHandler)
+    endpoint = _configure_mock_server(
+        server,
+        response_dim,
+        expected_path=expected_path,
+        response_vectors=response_vectors,
+    )
+    # shutdown() blocks for up to one poll interval, and the default is 0.5s
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True)
     thread.start()
-    return server, f"http://127.0.0.1:{server.server_port}"
+    return server, endpoint
 
 
-def _shutdown(server: _ThreadedServer) -> None:
+def _shutdown(server: _SerialServer) -> None:
     server.shutdown()
     server.server_close()
 
 
+@pytest.fixture(scope="module")
+def mock_server() -> Iterator[_SerialServer]:
+    server, _endpoint = _start_mock_server(response_dim=0)
+    yield server
+    _shutdown(server)
+
+
+@pytest.fixture
+def reset_server(mock_server: _SerialServer) -> Iterator[None]:
+    yield
+    _configure_mock_server(mock_server)
+
+
+@pytest.fixture
+def in_memory() -> _InMemoryAdapter:
+    return _InMemoryAdapter()
+
+
 def test_embeddings_config_parsing(tmp_path: Path) -> None:
     config = """
 default: remote
@@ -117,122 +219,159 @@ providers:
     assert default.extra["tag"] == "ping"
 
 
-def test_http_connector_batches_and_cache(tmp_path: Path) -> None:
-    server, endpoint = _start_mock_server(response_dim=4)
-    try:
-        provider = EmbeddingProviderConfig(
-            name="mock",
-            type="http",
-            url=endpoint,
-            batch_size=2,
-            http_timeout=1.5,
-            http_headers_static={"Authorization": "Bearer static"},
-            hint_model="model",
-            hint_dim=4,
-            hint_normalize=True,
-            hint_task="retrieval.query",
-        )
-        connector = HttpEmbeddingConnector(provider)
-        texts = ["a", "b", "c"]
-        matrix = connector.embed_texts(texts)
-        assert isinstance(matrix, np.ndarray)
-        assert matrix.shape == (3, 4)
-        assert matrix.dtype == np.float32
-        assert server.last_path == "/v1/embeddings"
-        assert server.last_headers["Authorization"] == "Bearer static"
-        assert server.last_headers["X-Embedding-Dim"] == "4"
-        assert server.last_headers["X-Embedding-Normalize"] == "true"
-        assert server.last_headers["X-Embedding-Task"] == "retrieval.query"
-        assert server.last_headers["X-Model-Hint"] == "model"
-
-        cache_dir = tmp_path / "cache"
-        cache = EmbeddingCache(cache_root=cache_dir)
-        cache.set(provider.name, "a", matrix[0])
-        cached = cache.get(provider.name, "a")
-        assert cached == pytest.approx([float(x) for x in matrix[0]])
-    finally:
-        _shutdown(server)
-
-
-def test_http_connector_validates_dims(tmp_path: Path) -> None:
-    server, endpoint = _start_mock_server(response_dim=2)
-    try:
-        provider = EmbeddingProviderConfig(
-            name="mismatch",
-            type="http",
-            url=endpoint,
-            batch_size=1,
-            dims=3,
-        )
-        connector = HttpEmbeddingConnector(provider)
-        with pytest.raises(ValueError):
-            connector.embed_texts(["only"])
-    finally:
-        _shutdown(server)
-
-
-def test_http_connector_normalizes_client_side_when_configured(tmp_path: Path) -> None:
-    server, endpoint = _start_mock_server(response_dim=2)
-    try:
-        provider = EmbeddingProviderConfig(
-            name="normalize-client",
-            type="http",
-            url=endpoint,
-            batch_size=2,
-            hint_dim=2,
-            hint_normalize=True,
-            normalize_mode="client",
-        )
-        connector = HttpEmbeddingConnector(provider)
-        matrix = connector.embed_texts(["a", "b"])
-        assert matrix[1].tolist() == pytest.approx([0.70710677, 0.70710677], rel=1e-6)
-    finally:
-        _shutdown(server)
-
-
-def test_http_connector_rejects_non_finite_values(tmp_path: Path) -> None:
-    server, endpoint = _start_mock_server(
+def test_http_connector_batches_and_cache(tmp_path: Path, mock_server: _SerialServer, reset_server: None) -> None:
+    endpoint = _configure_mock_server(mock_server, response_dim=4)
+    provider = EmbeddingProviderConfig(
+        name="mock",
+        type="http",
+        url=endpoint,
+        batch_size=2,
+        http_timeout=1.5,
+        http_headers_static={"Authorization": "Bearer static"},
+        hint_model="model",
+        hint_dim=4,
+        hint_normalize=True,
+        hint_task="retrieval.query",
+    )
+    connector = HttpEmbeddingConnector(provider)
+    texts = ["a", "b", "c"]
+    matrix = connector.embed_texts(texts)
+    assert isinstance(matrix, np.ndarray)
+    assert matrix.shape == (3, 4)
+    assert matrix.dtype == np.float32
+    assert mock_server.last_path == "/v1/embeddings"
+    assert mock_server.last_headers["Authorization"] == "Bearer static"
+    assert mock_server.last_headers["X-Embedding-Dim"] == "4"
+    assert mock_server.last_headers["X-Embedding-Normalize"] == "true"
+    assert mock_server.last_headers["X-Embedding-Task"] == "retrieval.query"
+    assert mock_server.last_headers["X-Model-Hint"] == "model"
+
+    cache_dir = tmp_path / "cache"
+    cache = EmbeddingCache(cache_root=cache_dir)
+    cache.set(provider.name, "a", matrix[0])
+    cached = cache.get(provider.name, "a")
+    np.testing.assert_allclose(np.asarray(cached, dtype=np.float32), matrix[0])
+
+
+def test_http_connectors_share_the_serial_mock_server(mock_server: _SerialServer, reset_server: None) -> None:
+    endpoint = _configure_mock_server(mock_server, response_dim=3)
+    provider = EmbeddingProviderConfig(name="mock", type="http", url=endpoint, batch_size=1, http_timeout=1.0)
+    first = HttpEmbeddingConnector(provider)
+    second = HttpEmbeddingConnector(provider)
+
+    # each connector keeps its session alive between calls; interleave them so a held socket would block
+    assert first.embed_texts(["a"]).shape == (1, 3)
+    assert second.embed_texts(["b"]).shape == (1, 3)
+    assert first.embed_texts(["c", "d"]).shape == (2, 3)
+
+
+def test_http_connector_validates_dims(tmp_path: Path, in_memory: _InMemoryAdapter) -> None:
+    _reset_mock_state(in_memory, response_dim=2)
+    provider = EmbeddingProviderConfig(
+        name="mismatch",
+        type="http",
+        url=_IN_MEMORY_URL,
+        batch_size=1,
+        dims=3,
+    )
+    connector = _in_memory_connector(provider, in_memory)
+    with pytest.raises(ValueError):
+        connector.embed_texts(["only"])
+
+
+def test_http_connector_normalizes_client_side_when_configured(
+    tmp_path: Path, in_memory: _InMemoryAdapter
+) -> None:
+    _reset_mock_state(in_memory, response_dim=2)
+    provider = EmbeddingProviderConfig(
+        name="normalize-client",
+        type="http",
+        url=_IN_MEMORY_URL,
+        batch_size=2,
+        hint_dim=2,
+        hint_normalize=True,
+        normalize_mode="client",
+    )
+    connector = _in_memory_connector(provider, in_memory)
+    matrix = connector.embed_texts(["a", "b"])
+    np.testing.assert_allclose(matrix[1], [0.70710677, 0.70710677], rtol=1e-6)
+
+
+def test_http_connector_rejects_non_finite_values(
+    tmp_path: Path, in_memory: _InMemoryAdapter
+) -> None:
+    _reset_mock_state(
+        in_memory,
         response_dim=2,
         response_vectors=[[0.0, 1.0], [float("nan"), 2.0]],
     )
-    try:
-        provider = EmbeddingProviderConfig(
-            name="bad-values",
-            type="http",
-            url=endpoint,
-            hint_dim=2,
-        )
-        connector = HttpEmbeddingConnector(provider)
-        with pytest.raises(ValueError, match="NaN or Inf"):
-            connector.embed_texts(["a", "b"])
-    finally:
-        _shutdown(server)
-
-
-def test_http_connector_auto_normalizes_when_needed(tmp_path: Path) -> None:
-    server, endpoint = _start_mock_server(
+    provider = EmbeddingProviderConfig(
+        name="bad-values",
+        type="http",
+        url=_IN_MEMORY_URL,
+        hint_dim=2,
+    )
+    connector = _in_memory_connector(provider, in_memory)
+    with pytest.raises(ValueError, match="NaN or Inf"):
+        connector.embed_texts(["a", "b"])
+
+
+def test_http_connector_auto_normalizes_when_needed(
+    tmp_path: Path, in_memory: _InMemoryAdapter
+) -> None:
+    _reset_mock_state(
+        in_memory,
         response_dim=2,
         response_vectors=[[1.0, 0.0], [3.0, 4.0]],
     )
-    try:
-        provider = EmbeddingProviderConfig(
-            name="auto-normalize",
-            type="http",
-            url=endpoint,
-            hint_dim=2,
-            hint_normalize=True,
-            normalize_mode="auto",
-        )
-        connector = HttpEmbeddingConnector(provider)
-        matrix = connector.embed_texts(["a", "b"])
-        assert matrix[0].tolist() == pytest.approx([1.0, 0.0], rel=1e-6)
-        assert matrix[1].tolist() == pytest.approx([0.6, 0.8], rel=1e-6)
-    finally:
-        _shutdown(server)
+    provider = EmbeddingProviderConfig(
+        name="auto-normalize",
+        type="http",
+        url=_IN_MEMORY_URL,
+        hint_dim=2,
+        hint_normalize=True,
+        normalize_mode="auto",
+    )
+    connector = _in_memory_connector(provider, in_memory)
+    matrix = connector.embed_texts(["a", "b"])
+    np.testing.assert_allclose(matrix[0], [1.0, 0.0], rtol=1e-6)
+    np.testing.assert_allclose(matrix[1], [0.6, 0.8], rtol=1e-6)
 
 
 def test_l2_normalize_preserves_zero_rows() -> None:
     matrix = np.asarray([[3.0, 4.0], [0.0, 0.0]], dtype=np.float32)
     normalized = l2_normalize(matrix)
-    assert normalized[0].tolist() == pytest.approx([0.6, 0.8], rel=1e-6)
-    assert normalized[1].tolist() == [0.0, 0.0]
+    np.testing.assert_allclose(normalized[0], [0.6, 0.8], rtol=1e-6)
+    np.testing.assert_array_equal(normalized[1], [0.0, 0.0])
+
+
+def test_embeddings_config_reuses_parse_until_file_changes(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    path = tmp_path / "embeddings.yml"
+    path.write_text("default: a\nproviders:\n  a:\n    url: http://a.local\n", encoding="utf-8")
+    calls: list[str] = []
+    real_safe_load = yaml.safe_load
+
+    def counting_safe_load(stream: str) -> object:
+        calls.append(stream)
+        return real_safe_load(stream)
+
+    monkeypatch.setattr(yaml, "safe_load", counting_safe_load)
+    assert EmbeddingsConfigService(tmp_path).default_provider().name == "a"
+    assert EmbeddingsConfigService(tmp_path).default_provider().name == "a"
+    assert len(calls) == 1
+
+    path.write_text("default: bb\nproviders:\n  bb:\n    url: http://b.local\n", encoding="utf-8")
+    assert EmbeddingsConfigService(tmp_path).default_provider().name == "bb"
+    assert len(calls) == 2
+
+
+def test_embeddings_config_list_providers_tracks_mutations(tmp_path: Path) -> None:
+    service = EmbeddingsConfigService(tmp_path)
+    service.add_provider(EmbeddingProviderConfig(name="b", type="http", url="http://b.local"))
+    assert [provider.name for provider in service.list_providers()] == ["b"]
+    service.add_provider(EmbeddingProviderConfig(name="a", type="http", url="http://a.local"))
+    assert [provider.name for provider in service.list_providers()] == ["a", "b"]
+    service.remove_provider("b")
+    assert [provider.name for provider in service.list_providers()] == ["a"]
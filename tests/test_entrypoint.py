@@ -5,9 +5,12 @@ from cpm_cli import __main__ as cli_entry
 import pytest
 from cpm_core.registry import CPMRegistryEntry
 
+# import_module resolves the submodules; cpm_cli re-exports a ``main`` function that shadows the attribute
+cli_main = importlib.import_module("cpm_cli.main")
+query_builtin = importlib.import_module("cpm_core.builtins.query")
+
 
 def test_console_module_entrypoint_delegates_to_cli_main(monkeypatch):
-    cli_main = importlib.import_module("cpm_cli.main")
     monkeypatch.setattr(cli_main, "main", lambda: 7)
 
     assert cli_entry.run() == 7
@@ -17,7 +20,6 @@ def test_console_module_entrypoint_delegates_to_cli_main(monkeypatch):
 def test_dispatch_supports_lookup_command(
     tmp_path, capsys: pytest.CaptureFixture[str]
 ) -> None:
-    cli_main = importlib.import_module("cpm_cli.main")
     code = cli_main.main(["lookup"], start_dir=tmp_path)
 
     assert code == 0
@@ -27,7 +29,6 @@ def test_dispatch_supports_lookup_command(
 def test_dispatch_rejects_removed_legacy_alias(
     tmp_path, capsys: pytest.CaptureFixture[str]
 ) -> None:
-    cli_main = importlib.import_module("cpm_cli.main")
     code = cli_main.main(["embed:status"], start_dir=tmp_path)
 
     assert code == 1
@@ -37,7 +38,6 @@ def test_dispatch_rejects_removed_legacy_alias(
 def test_dispatch_supports_builtin_embed_command(
     tmp_path, capsys: pytest.CaptureFixture[str]
 ) -> None:
-    cli_main = importlib.import_module("cpm_cli.main")
     code = cli_main.main(["embed", "list"], start_dir=tmp_path)
     out = capsys.readouterr().out
     assert code == 0
@@ -47,9 +47,6 @@ def test_dispatch_supports_builtin_embed_command(
 def test_query_command_dispatches_to_native_retriever(
     monkeypatch, tmp_path: Path, capsys: pytest.CaptureFixture[str]
 ) -> None:
-    cli_main = importlib.import_module("cpm_cli.main")
-    query_builtin = importlib.import_module("cpm_core.builtins.query")
-
     def _fake_retrieve(self, identifier: str, **kwargs):
         return {
             "ok": True,
@@ -82,8 +79,6 @@ def test_query_command_uses_default_embedding_provider(
     monkeypatch, tmp_path: Path, capsys: pytest.CaptureFixture[str]
 ) -> None:
     monkeypatch.chdir(tmp_path)
-    cli_main = importlib.import_module("cpm_cli.main")
-    query_builtin = importlib.import_module("cpm_core.builtins.query")
     add_code = cli_main.main(
         [
             "embed",
@@ -125,9 +120,6 @@ def test_query_command_uses_default_embedding_provider(
 def test_query_command_supports_custom_retriever_selection(
     monkeypatch, tmp_path: Path, capsys: pytest.CaptureFixture[str]
 ) -> None:
-    cli_main = importlib.import_module("cpm_cli.main")
-    query_builtin = importlib.import_module("cpm_core.builtins.query")
-
     class _CustomRetriever:
         def retrieve(self, identifier: str, **kwargs):
             return {
@@ -180,8 +172,6 @@ def test_query_command_supports_custom_retriever_selection(
 def test_query_command_passes_indexer_and_reranker(
     monkeypatch, tmp_path: Path
 ) -> None:
-    cli_main = importlib.import_module("cpm_cli.main")
-    query_builtin = importlib.import_module("cpm_core.builtins.query")
     captured: dict[str, object] = {}
 
     def _fake_retrieve(self, identifier: str, **kwargs):
@@ -1,26 +1,36 @@
 from __future__ import annotations
 
 import json
+import os
 import shutil
+from functools import lru_cache
 from pathlib import Path
 
+import pytest
+
 from cpm_cli.main import main as cli_main
 from cpm_builtin.embeddings import EmbeddingProviderConfig, EmbeddingsConfigService
+from cpm_core.oci import OciPullResult
+from tests._helpers import link_or_copy
 
+_PACKET_DIGEST = "sha256:" + ("a" * 64)
+_MODEL_DIGEST = "sha256:" + ("b" * 64)
 
-def _write_workspace_config(workspace_root: Path) -> None:
-    config_dir = workspace_root / "config"
-    config_dir.mkdir(parents=True, exist_ok=True)
-    (config_dir / "config.toml").write_text(
-        """[oci]
+
+_CONFIG_TOML = b"""[oci]
 repository = "registry.local/project"
 allowlist_domains = ["registry.local"]
-""",
-        encoding="utf-8",
-    )
+"""
+
+
+def _write_workspace_config(workspace_root: Path) -> None:
+    config_dir = os.path.join(workspace_root, "config")
+    os.makedirs(config_dir, exist_ok=True)
+    with open(os.path.join(config_dir, "config.toml"), "wb") as handle:
+        handle.write(_CONFIG_TOML)
 
 
-def _write_embeddings_config(workspace_root: Path, *, with_artifacts: bool) -> None:
+def _write_embeddings_config(workspace_root: Path, *, with_artifacts: bool) -> Path:
     service = EmbeddingsConfigService(workspace_root)
     model_artifacts = (
         {
@@ -43,163 +53,229 @@ def _write_embeddings_config(workspace_root: Path, *, with_artifacts: bool) -> N
         ),
         set_default=True,
     )
+    return service.config_path
 
 
-def _create_oci_packet_artifact(root: Path, *, model: str = "model-a") -> Path:
-    artifact = root / "packet"
-    payload_dir = artifact / "payload"
-    (payload_dir / "faiss").mkdir(parents=True, exist_ok=True)
-    (payload_dir / "cpm.yml").write_text("name: demo\nversion: 1.0.0\n", encoding="utf-8")
-    (payload_dir / "docs.jsonl").write_text("{\"id\":\"1\",\"text\":\"hello\"}\n", encoding="utf-8")
-    (payload_dir / "vectors.f16.bin").write_bytes(b"\x00\x01")
-    (payload_dir / "faiss" / "index.faiss").write_bytes(b"INDEX")
-    (payload_dir / "manifest.json").write_text(
-        json.dumps(
-            {
-                "schema_version": "1.0",
-                "packet_id": "demo",
-                "embedding": {"provider": "x", "model": model, "dim": 2, "dtype": "float16", "normalized": True},
-                "cpm": {"name": "demo", "version": "1.0.0"},
-            }
-        ),
-        encoding="utf-8",
-    )
-    (artifact / "packet.manifest.json").write_text(
-        json.dumps(
-            {
-                "schema": "cpm-oci/v1",
-                "packet": {"name": "demo", "version": "1.0.0"},
-                "payload_root": "payload",
-                "source_manifest": {
-                    "supported_models": ["model-*"],
-                    "recommended_model": model,
-                    "suggested_retriever": "cpm:native-retriever",
-                },
-            }
-        ),
-        encoding="utf-8",
-    )
-    return artifact
+@lru_cache(maxsize=None)
+def _packet_manifests(model: str, with_source_manifest: bool = True) -> tuple[bytes, bytes]:
+    """Return the ``(payload manifest.json, packet.manifest.json)`` bytes for ``model``."""
+    payload_manifest = {
+        "schema_version": "1.0",
+        "packet_id": "demo",
+        "embedding": {"provider": "x", "model": model, "dim": 2, "dtype": "float16", "normalized": True},
+        "cpm": {"name": "demo", "version": "1.0.0"},
+    }
+    packet_manifest = {
+        "schema": "cpm-oci/v1",
+        "packet": {"name": "demo", "version": "1.0.0"},
+        "payload_root": "payload",
+        "source_manifest": {
+            "supported_models": ["model-*"],
+            "recommended_model": model,
+            "suggested_retriever": "cpm:native-retriever",
+        },
+    }
+    if not with_source_manifest:
+        del packet_manifest["source_manifest"]
+    return json.dumps(payload_manifest).encode("utf-8"), json.dumps(packet_manifest).encode("utf-8")
 
 
-def test_install_remote_only_provider(monkeypatch, tmp_path: Path) -> None:
-    workspace_root = tmp_path / ".cpm"
-    monkeypatch.setenv("RAG_CPM_DIR", str(workspace_root))
-    _write_workspace_config(workspace_root)
-    _write_embeddings_config(workspace_root, with_artifacts=False)
-    packet_artifact = _create_oci_packet_artifact(tmp_path, model="model-a")
+def _write_file(path: str, data: bytes) -> None:
+    with open(path, "wb") as handle:
+        handle.write(data)
 
-    class _FakeOciClient:
-        def __init__(self, config):
-            self.config = config
 
-        def resolve(self, ref: str) -> str:
-            return "sha256:" + ("a" * 64)
+def _create_oci_packet_artifact(root: Path, *, model: str = "model-a", source_manifest: bool = True) -> Path:
+    artifact = os.path.join(root, "packet")
+    payload_dir = os.path.join(artifact, "payload")
+    faiss_dir = os.path.join(payload_dir, "faiss")
+    os.makedirs(faiss_dir, exist_ok=True)
+    payload_manifest, packet_manifest = _packet_manifests(model, source_manifest)
+    _write_file(os.path.join(payload_dir, "cpm.yml"), b"name: demo\nversion: 1.0.0\n")
+    _write_file(os.path.join(payload_dir, "docs.jsonl"), b'{"id":"1","text":"hello"}\n')
+    _write_file(os.path.join(payload_dir, "vectors.f16.bin"), b"\x00\x01")
+    _write_file(os.path.join(faiss_dir, "index.faiss"), b"INDEX")
+    _write_file(os.path.join(payload_dir, "manifest.json"), payload_manifest)
+    _write_file(os.path.join(artifact, "packet.manifest.json"), packet_manifest)
+    return Path(artifact)
 
-        def pull(self, ref: str, output_dir: Path):
-            shutil.copytree(packet_artifact, output_dir, dirs_exist_ok=True)
-            files = tuple(path for path in output_dir.rglob("*") if path.is_file())
-            return type("PullResult", (), {"ref": ref, "digest": None, "files": files})()
 
-    import cpm_core.builtins.install as install_mod
+def _iter_files(root: Path):
+    for dirpath, _dirnames, filenames in os.walk(root):
+        for filename in filenames:
+            yield Path(dirpath, filename)
 
-    monkeypatch.setattr(install_mod, "OciClient", _FakeOciClient)
-    monkeypatch.setattr(
-        install_mod,
-        "_select_model",
-        lambda **kwargs: {"model": "model-a", "provider": None, "suggested_retriever": "cpm:native-retriever"},
-    )
-    code = cli_main(["install", "demo@1.0.0", "--registry", "registry.local/project"], start_dir=tmp_path)
-    assert code == 0
-    assert (workspace_root / "packages" / "demo" / "1.0.0" / "cpm.yml").exists()
-    lock = json.loads((workspace_root / "state" / "install" / "demo.lock.json").read_text(encoding="utf-8"))
-    assert lock["selected_model"] == "model-a"
-    assert "model_artifact" not in lock
+
+def _write_model_blob(output_dir: Path) -> None:
+    output_dir.mkdir(parents=True, exist_ok=True)
+    (output_dir / "model.bin").write_bytes(b"MODEL")
 
 
-def test_install_provider_with_model_artifact(monkeypatch, tmp_path: Path) -> None:
+@pytest.fixture(scope="module")
+def packet_artifact(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    """Build the pulled packet tree once; the fake OCI pulls only copy from it."""
+    return _create_oci_packet_artifact(tmp_path_factory.mktemp("oci_packet"), model="model-a")
+
+
+@pytest.fixture(scope="module")
+def embeddings_configs(tmp_path_factory: pytest.TempPathFactory) -> dict[bool, tuple[str, bytes]]:
+    """Render the provider config through the service once per ``with_artifacts`` flag.
+
+    Maps the flag to the config path relative to the workspace root and the file bytes.
+    """
+    rendered: dict[bool, tuple[str, bytes]] = {}
+    for with_artifacts in (False, True):
+        template_root = tmp_path_factory.mktemp("embeddings_config")
+        config_path = _write_embeddings_config(template_root, with_artifacts=with_artifacts)
+        rendered[with_artifacts] = (os.path.relpath(config_path, template_root), config_path.read_bytes())
+    return rendered
+
+
+@pytest.fixture
+def workspace(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    request: pytest.FixtureRequest,
+    embeddings_configs: dict[bool, tuple[str, bytes]],
+) -> Path:
+    """Bootstrap ``.cpm`` with OCI config and one provider; ``indirect`` params toggle model artifacts."""
     workspace_root = tmp_path / ".cpm"
     monkeypatch.setenv("RAG_CPM_DIR", str(workspace_root))
     _write_workspace_config(workspace_root)
-    _write_embeddings_config(workspace_root, with_artifacts=True)
-    packet_artifact = _create_oci_packet_artifact(tmp_path, model="model-a")
-
-    class _FakeOciClient:
-        def __init__(self, config):
-            self.config = config
-
-        def resolve(self, ref: str) -> str:
-            if "models/" in ref:
-                return "sha256:" + ("b" * 64)
-            return "sha256:" + ("a" * 64)
-
-        def pull(self, ref: str, output_dir: Path):
-            if "models/" in ref:
-                output_dir.mkdir(parents=True, exist_ok=True)
-                (output_dir / "model.bin").write_bytes(b"MODEL")
-            else:
-                shutil.copytree(packet_artifact, output_dir, dirs_exist_ok=True)
-            files = tuple(path for path in output_dir.rglob("*") if path.is_file())
-            return type("PullResult", (), {"ref": ref, "digest": None, "files": files})()
+    relative_path, data = embeddings_configs[getattr(request, "param", False)]
+    config_path = os.path.join(workspace_root, relative_path)
+    os.makedirs(os.path.dirname(config_path), exist_ok=True)
+    _write_file(config_path, data)
+    return workspace_root
+
+
+@pytest.fixture
+def make_fake_oci(packet_artifact: Path):
+    """Return a factory for fake OCI clients that pull the shared packet artifact.
 
+    ``model_pull`` fills the output directory for ``models/`` refs; without it every
+    ref resolves to the packet. ``artifact`` swaps in a different packet tree.
+    """
+
+    def _make(model_pull=None, artifact: Path | None = None) -> type:
+        source = artifact if artifact is not None else packet_artifact
+
+        class _FakeOciClient:
+            def __init__(self, config):
+                self.config = config
+
+            def resolve(self, ref: str) -> str:
+                if model_pull is not None and "models/" in ref:
+                    return _MODEL_DIGEST
+                return _PACKET_DIGEST
+
+            def pull(self, ref: str, output_dir: Path):
+                if model_pull is not None and "models/" in ref:
+                    model_pull(output_dir)
+                else:
+                    shutil.copytree(source, output_dir, dirs_exist_ok=True, copy_function=link_or_copy)
+                return OciPullResult(ref=ref, digest=None, files=tuple(_iter_files(output_dir)))
+
+        return _FakeOciClient
+
+    return _make
+
+
+@pytest.fixture
+def patch_install(monkeypatch: pytest.MonkeyPatch):
+    """Return a helper that swaps the OCI client and model selection inside the install command."""
     import cpm_core.builtins.install as install_mod
 
-    monkeypatch.setattr(install_mod, "OciClient", _FakeOciClient)
-    monkeypatch.setattr(
-        install_mod,
-        "_select_model",
-        lambda **kwargs: {"model": "model-a", "provider": "provider-a", "suggested_retriever": "cpm:native-retriever"},
-    )
-    def _fake_model_artifact(**kwargs):
+    def _apply(fake_client: type, select_model) -> object:
+        monkeypatch.setattr(install_mod, "OciClient", fake_client)
+        monkeypatch.setattr(install_mod, "_select_model", select_model)
+        return install_mod
+
+    return _apply
+
+
+def _fake_model_artifact(workspace: Path):
+    def _pull(**kwargs):
         del kwargs
-        target = workspace_root / "cache" / "models" / "provider-a" / "model-a"
+        target = workspace / "cache" / "models" / "provider-a" / "model-a"
         target.mkdir(parents=True, exist_ok=True)
         (target / "model.bin").write_bytes(b"MODEL")
         return {
             "ref": "registry.local/models/model-a:latest",
-            "digest": "sha256:" + ("b" * 64),
+            "digest": _MODEL_DIGEST,
             "path": str(target),
         }
 
-    monkeypatch.setattr(install_mod, "_maybe_pull_model_artifact", _fake_model_artifact)
-    code = cli_main(["install", "demo@1.0.0", "--registry", "registry.local/project"], start_dir=tmp_path)
-    assert code == 0
-    lock = json.loads((workspace_root / "state" / "install" / "demo.lock.json").read_text(encoding="utf-8"))
-    assert lock["model_artifact"]["digest"] == "sha256:" + ("b" * 64)
+    return _pull
+
+
+def _check_remote_only(workspace: Path, lock: dict, manifests: list[dict]) -> None:
+    assert (workspace / "packages" / "demo" / "1.0.0" / "cpm.yml").exists()
+    assert lock["selected_model"] == "model-a"
+    assert "model_artifact" not in lock
+
+
+def _check_model_artifact(workspace: Path, lock: dict, manifests: list[dict]) -> None:
+    assert lock["selected_provider"] == "provider-a"
+    assert lock["model_artifact"]["digest"] == _MODEL_DIGEST
     assert Path(lock["model_artifact"]["path"]).exists()
 
 
-def test_install_no_embed_skips_model_resolution(monkeypatch, tmp_path: Path) -> None:
-    workspace_root = tmp_path / ".cpm"
-    monkeypatch.setenv("RAG_CPM_DIR", str(workspace_root))
-    _write_workspace_config(workspace_root)
-    _write_embeddings_config(workspace_root, with_artifacts=False)
-    packet_artifact = _create_oci_packet_artifact(tmp_path, model="model-a")
+def _check_empty_source_manifest(workspace: Path, lock: dict, manifests: list[dict]) -> None:
+    assert manifests == [{}]
+    assert lock["selected_model"] == "model-a"
+    assert lock["suggested_retriever"] is None
 
-    class _FakeOciClient:
-        def __init__(self, config):
-            self.config = config
 
-        def resolve(self, ref: str) -> str:
-            return "sha256:" + ("a" * 64)
+@pytest.mark.parametrize(
+    ("workspace", "provider", "source_manifest", "check"),
+    [
+        pytest.param(False, None, True, _check_remote_only, id="remote-only-provider"),
+        pytest.param(True, "provider-a", True, _check_model_artifact, id="provider-with-model-artifact"),
+        pytest.param(False, None, False, _check_empty_source_manifest, id="missing-source-manifest"),
+    ],
+    indirect=["workspace"],
+)
+def test_install_flow(
+    monkeypatch,
+    tmp_path: Path,
+    workspace: Path,
+    make_fake_oci,
+    patch_install,
+    provider: str | None,
+    source_manifest: bool,
+    check,
+) -> None:
+    artifact = None if source_manifest else _create_oci_packet_artifact(tmp_path / "artifact", source_manifest=False)
+    manifests: list[dict] = []
 
-        def pull(self, ref: str, output_dir: Path):
-            shutil.copytree(packet_artifact, output_dir, dirs_exist_ok=True)
-            files = tuple(path for path in output_dir.rglob("*") if path.is_file())
-            return type("PullResult", (), {"ref": ref, "digest": None, "files": files})()
+    def _select_model(**kwargs):
+        manifests.append(kwargs["manifest"])
+        suggested = kwargs["manifest"].get("suggested_retriever")
+        return {"model": "model-a", "provider": provider, "suggested_retriever": suggested}
+
+    model_pull = _write_model_blob if provider else None
+    install_mod = patch_install(make_fake_oci(model_pull=model_pull, artifact=artifact), _select_model)
+    if provider:
+        monkeypatch.setattr(install_mod, "_maybe_pull_model_artifact", _fake_model_artifact(workspace))
+    code = cli_main(["install", "demo@1.0.0", "--registry", "registry.local/project"], start_dir=tmp_path)
+    assert code == 0
+    lock = json.loads((workspace / "state" / "install" / "demo.lock.json").read_text(encoding="utf-8"))
+    check(workspace, lock, manifests)
 
-    import cpm_core.builtins.install as install_mod
 
-    monkeypatch.setattr(install_mod, "OciClient", _FakeOciClient)
-    monkeypatch.setattr(install_mod, "_select_model", lambda **kwargs: (_ for _ in ()).throw(AssertionError("unexpected")))
+def test_install_no_embed_skips_model_resolution(
+    tmp_path: Path, workspace: Path, make_fake_oci, patch_install
+) -> None:
+    patch_install(make_fake_oci(), lambda **kwargs: (_ for _ in ()).throw(AssertionError("unexpected")))
     code = cli_main(
         ["install", "demo@1.0.0", "--registry", "registry.local/project", "--no-embed"],
         start_dir=tmp_path,
     )
     assert code == 0
-    target_dir = workspace_root / "packages" / "demo" / "1.0.0"
+    target_dir = workspace / "packages" / "demo" / "1.0.0"
     assert not (target_dir / "vectors.f16.bin").exists()
     assert not (target_dir / "faiss" / "index.faiss").exists()
-    lock = json.loads((workspace_root / "state" / "install" / "demo.lock.json").read_text(encoding="utf-8"))
+    lock = json.loads((workspace / "state" / "install" / "demo.lock.json").read_text(encoding="utf-8"))
     assert lock["no_embed"] is True
     assert lock["selected_model"] is None
@@ -4,6 +4,7 @@ from __future__ import annotations
 
 import argparse
 import shutil
+from collections import Counter
 from pathlib import Path
 
 import numpy as np
@@ -13,29 +14,54 @@ from cpm_core.events import EventBus
 from cpm_core.paths import UserDirs
 from cpm_core.plugin import PluginManager
 from cpm_core.workspace import Workspace
+from tests._helpers import link_or_copy
 
 
-def _create_workspace(tmp_path: Path) -> Workspace:
-    root = tmp_path / ".cpm"
-    root.mkdir()
-    config = root / "config.toml"
-    config.write_text("", encoding="utf-8")
-    return Workspace(root=root, config_path=config)
+def _install_plugin(workspace: Workspace) -> Path:
+    destination = workspace.root / "plugins" / "llm_builder"
+    shutil.copytree(
+        Path("cpm_plugins") / "llm_builder",
+        destination,
+        copy_function=link_or_copy,
+        ignore=shutil.ignore_patterns("__pycache__"),
+    )
+    return destination
 
 
-def _build_manager(tmp_path: Path, workspace: Workspace) -> PluginManager:
-    user_data = tmp_path / "user_data"
-    return PluginManager(
+@pytest.fixture(scope="module")
+def prepared_manager(tmp_path_factory: pytest.TempPathFactory) -> PluginManager:
+    """Discover and load the installed plugin once; tests only resolve entries from its registry."""
+    root = tmp_path_factory.mktemp("plugin_ws") / ".cpm"
+    (root / "plugins").mkdir(parents=True)
+    config = root / "config.toml"
+    config.write_text("", encoding="utf-8")
+    workspace = Workspace(root=root, config_path=config)
+    _install_plugin(workspace)
+    manager = PluginManager(
         workspace=workspace,
         events=EventBus(),
-        user_dirs=UserDirs(data_dir_override=user_data),
+        user_dirs=UserDirs(data_dir_override=tmp_path_factory.mktemp("user_data")),
     )
-
-
-def _install_plugin(workspace: Workspace) -> Path:
-    destination = workspace.root / "plugins" / "llm_builder"
-    shutil.copytree(Path("cpm_plugins") / "llm_builder", destination)
-    return destination
+    manager.register("core")
+    manager.load_plugins()
+    return manager
+
+
+def _fake_chunk(segment: dict, source_path: str) -> dict:
+    """Enriched chunk the fake LLM returns for one requested segment."""
+    return {
+        "id": segment["id"],
+        "title": "Title",
+        "summary": "Summary",
+        "tags": ["test"],
+        "anchors": {
+            "path": source_path,
+            "start_line": segment["start"],
+            "end_line": segment["end"],
+        },
+        "text": segment["text"],
+        "relations": {"calls": [], "called_by": []},
+    }
 
 
 class _FakeResponse:
@@ -65,67 +91,38 @@ class _FakeEmbedder:
         dtype: str,
         show_progress: bool,
     ) -> np.ndarray:
-        matrix = np.zeros((len(texts), 3), dtype=np.float32)
-        for idx, text in enumerate(texts):
-            matrix[idx, 0] = float(len(text))
-            matrix[idx, 1] = float(len(text.split()))
-            matrix[idx, 2] = 1.0
+        count = len(texts)
+        matrix = np.ones((count, 3), dtype=np.float32)
+        matrix[:, 0] = np.fromiter(map(len, texts), dtype=np.float32, count=count)
+        matrix[:, 1] = np.fromiter((len(text.split()) for text in texts), dtype=np.float32, count=count)
         return matrix
 
 
-def test_llm_builder_plugin_registers_builder(tmp_path: Path) -> None:
-    workspace = _create_workspace(tmp_path)
-    (workspace.root / "plugins").mkdir()
-    _install_plugin(workspace)
-
-    manager = _build_manager(tmp_path, workspace)
-    manager.register("core")
-    manager.load_plugins()
-
-    entry = manager.registry.resolve("llm:cpm-llm-builder")
+def test_llm_builder_plugin_registers_builder(prepared_manager: PluginManager) -> None:
+    entry = prepared_manager.registry.resolve("llm:cpm-llm-builder")
     assert entry.group == "llm"
     assert entry.origin == "llm_builder"
 
 
-def test_llm_builder_incremental_skips_enrichment(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
-    workspace = _create_workspace(tmp_path)
-    (workspace.root / "plugins").mkdir()
-    _install_plugin(workspace)
-
-    manager = _build_manager(tmp_path, workspace)
-    manager.register("core")
-    manager.load_plugins()
-    entry = manager.registry.resolve("llm:cpm-llm-builder")
+@pytest.mark.slow
+def test_llm_builder_incremental_skips_enrichment(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, prepared_manager: PluginManager
+) -> None:
+    entry = prepared_manager.registry.resolve("llm:cpm-llm-builder")
 
-    import importlib
+    # importable only once load_plugins() has put the installed plugin on sys.path
+    from cpm_llm_builder_plugin import features as feature_module
+    from cpm_llm_builder_plugin import llm_client as llm_module
 
-    feature_module = importlib.import_module("cpm_llm_builder_plugin.features")
-    llm_module = importlib.import_module("cpm_llm_builder_plugin.llm_client")
-
-    calls: list[str] = []
+    calls: Counter[str] = Counter()
 
     def fake_post(url: str, *, json: dict, timeout: float) -> _FakeResponse:
         del url, timeout
         if "input" in json:
             source_path = json["input"][0]["content"][1]["json"]["source"]["path"]
             segments = json["input"][0]["content"][1]["json"]["segments"]
-            calls.extend(str(item["id"]) for item in segments)
-            chunks = [
-                {
-                    "id": segment["id"],
-                    "title": "Title",
-                    "summary": "Summary",
-                    "tags": ["test"],
-                    "anchors": {
-                        "path": source_path,
-                        "start_line": segment["start"],
-                        "end_line": segment["end"],
-                    },
-                    "text": segment["text"],
-                    "relations": {"calls": [], "called_by": []},
-                }
-                for segment in segments
-            ]
+            calls.update(str(item["id"]) for item in segments)
+            chunks = [_fake_chunk(segment, source_path) for segment in segments]
             return _FakeResponse({"output": [{"type": "output_json", "json": {"chunks": chunks}}]})
 
         import json as _json
@@ -133,23 +130,8 @@ def test_llm_builder_incremental_skips_enrichment(tmp_path: Path, monkeypatch: p
         user_payload = _json.loads(json["messages"][1]["content"])
         source_path = user_payload["source"]["path"]
         segments = user_payload["segments"]
-        calls.extend(str(item["id"]) for item in segments)
-        chunks = [
-            {
-                "id": segment["id"],
-                "title": "Title",
-                "summary": "Summary",
-                "tags": ["test"],
-                "anchors": {
-                    "path": source_path,
-                    "start_line": segment["start"],
-                    "end_line": segment["end"],
-                },
-                "text": segment["text"],
-                "relations": {"calls": [], "called_by": []},
-            }
-            for segment in segments
-        ]
+        calls.update(str(item["id"]) for item in segments)
+        chunks = [_fake_chunk(segment, source_path) for segment in segments]
         return _FakeResponse(
             {
                 "choices": [
@@ -197,8 +179,8 @@ def test_llm_builder_incremental_skips_enrichment(tmp_path: Path, monkeypatch: p
     )
 
     assert command.run(args) == 0
-    first_call_count = len(calls)
-    assert first_call_count > 0
+    first_counts = calls.copy()
+    assert sum(first_counts.values()) > 0
 
     assert command.run(args) == 0
-    assert len(calls) == first_call_count
+    assert calls == first_counts
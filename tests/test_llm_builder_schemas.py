@@ -5,9 +5,9 @@ from __future__ import annotations
 from pathlib import Path
 import sys
 
-PLUGIN_SRC = Path("cpm_plugins/llm_builder").resolve()
-if str(PLUGIN_SRC) not in sys.path:
-    sys.path.insert(0, str(PLUGIN_SRC))
+PLUGIN_SRC = str(Path(__file__).parent.parent / "cpm_plugins" / "llm_builder")
+if PLUGIN_SRC not in sys.path:
+    sys.path.insert(0, PLUGIN_SRC)
 
 from cpm_llm_builder_plugin.classifiers import classify_file
 from cpm_llm_builder_plugin.schemas import normalize_chunk_list
@@ -0,0 +1,355 @@
+"""Unit tests for the MCP plugin packet reader/retriever helpers."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+import time
+from functools import partial
+from pathlib import Path
+
+import faiss
+import numpy as np
+import pytest
+import requests
+
+# server pulls in the mcp SDK (~0.25s); the plugin tests import it too, so loading it once here is cheapest
+from cpm_mcp_plugin import reader as reader_mod
+from cpm_mcp_plugin import retriever as retriever_mod
+from cpm_mcp_plugin import server as server_mod
+
+from tests._helpers import link_or_copy
+
+
+class _FakeEmbedder:
+    def __init__(self, vectors: np.ndarray) -> None:
+        self.vectors = vectors
+        self.calls: list[tuple[str, ...]] = []
+
+    def embed_texts(self, texts, **kwargs):  # type: ignore[no-untyped-def]
+        del kwargs
+        self.calls.append(tuple(texts))
+        return self.vectors[: len(texts)]
+
+
+_DOCS_JSONL = "".join(
+    json.dumps(doc) + "\n"
+    for doc in (
+        {"id": "a", "text": "alpha", "metadata": {"path": "a.md"}},
+        {"id": "b", "text": "beta", "metadata": {"path": "b.md"}},
+        {"id": "c", "text": "gamma", "metadata": {"path": "c.md"}},
+    )
+).encode("utf-8")
+
+
+def _identity_index_bytes() -> bytes:
+    index = faiss.IndexFlatIP(3)
+    index.add(np.eye(3, dtype=np.float32))
+    return faiss.serialize_index(index).tobytes()
+
+
+# every packet holds the same three docs and vectors; serialize them once per module
+_INDEX_BYTES = _identity_index_bytes()
+
+
+def _write_packet(root: Path, blobs: Path, *, name: str = "demo", version: str = "1.0.0") -> Path:
+    """Write a packet under ``root``; the docs and index are linked from the ``packet_blobs`` directory."""
+    packet_dir = root / name / version
+    (packet_dir / "faiss").mkdir(parents=True)
+    link_or_copy(blobs / "docs.jsonl", packet_dir / "docs.jsonl")
+    (packet_dir / "manifest.json").write_text(
+        json.dumps({"packet_id": name, "embedding": {"model": "fake", "dim": 3}, "counts": {"docs": 3, "vectors": 3}}),
+        encoding="utf-8",
+    )
+    (packet_dir / "cpm.yml").write_text(f"name: {name}\nversion: {version}\n", encoding="utf-8")
+    link_or_copy(blobs / "index.faiss", packet_dir / "faiss" / "index.faiss")
+    return packet_dir
+
+
+@pytest.fixture(scope="module")
+def packet_blobs(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    """Canonical docs.jsonl and index.faiss that every packet in this module links to."""
+    blobs = tmp_path_factory.mktemp("packet_blobs")
+    (blobs / "docs.jsonl").write_bytes(_DOCS_JSONL)
+    (blobs / "index.faiss").write_bytes(_INDEX_BYTES)
+    return blobs
+
+
+@pytest.fixture(scope="module")
+def shared_packet(tmp_path_factory: pytest.TempPathFactory, packet_blobs: Path) -> Path:
+    """Packet for tests that only read it; cache and edit tests still write their own."""
+    return _write_packet(tmp_path_factory.mktemp("cpm"), packet_blobs, name="shared")
+
+
+def test_read_json_returns_none_for_missing_or_invalid(tmp_path: Path) -> None:
+    assert reader_mod._read_json(tmp_path / "missing.json") is None
+    broken = tmp_path / "broken.json"
+    broken.write_bytes(b"{not json")
+    assert reader_mod._read_json(broken) is None
+    valid = tmp_path / "valid.json"
+    valid.write_bytes('{"name": "café"}'.encode("utf-8"))
+    assert reader_mod._read_json(valid) == {"name": "café"}
+
+
+def test_retriever_returns_hits_in_score_order(shared_packet: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    embedder = _FakeEmbedder(np.asarray([[0.0, 1.0, 0.0]], dtype=np.float32))
+    retriever = retriever_mod.PacketRetriever(shared_packet.parents[1], str(shared_packet))
+    monkeypatch.setattr(retriever, "_new_embedder", lambda: embedder)
+
+    payload = retriever.retrieve("beta?", 2)
+
+    assert payload["ok"] is True
+    assert [hit["id"] for hit in payload["results"]][0] == "b"
+    assert payload["results"][0]["metadata"] == {"path": "b.md"}
+    assert embedder.calls == [("beta?",)]
+
+
+def test_retriever_maps_transport_failure_to_embed_server_error(
+    shared_packet: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    retriever = retriever_mod.PacketRetriever(shared_packet.parents[1], str(shared_packet))
+
+    class _DownEmbedder:
+        def health(self) -> bool:  # pragma: no cover - must not be called
+            raise AssertionError("health probe should be skipped")
+
+        def embed_texts(self, texts, **kwargs):  # type: ignore[no-untyped-def]
+            try:
+                raise requests.ConnectionError("refused")
+            except requests.ConnectionError as exc:
+                raise RuntimeError("failed to obtain embeddings after retries") from exc
+
+    monkeypatch.setattr(retriever, "_new_embedder", _DownEmbedder)
+
+    with pytest.raises(retriever_mod.EmbedServerError):
+        retriever.retrieve("anything", 1)
+
+
+def test_packet_docs_skips_blank_lines_and_handles_crlf(tmp_path: Path) -> None:
+    docs_path = tmp_path / "docs.jsonl"
+    docs_path.write_bytes(b'{"id": "a"}\r\n\n {"id": "b"}\n \t \r\n{"id": "c"}')
+
+    docs = retriever_mod.PacketDocs(docs_path)
+
+    assert len(docs) == 3
+    assert [docs[i]["id"] for i in range(len(docs))] == ["a", "b", "c"]
+    with pytest.raises(IndexError):
+        docs[3]
+
+
+def test_packet_docs_skips_unicode_whitespace_lines(tmp_path: Path) -> None:
+    docs_path = tmp_path / "docs.jsonl"
+    docs_path.write_bytes('{"id": "a"}\n\u00a0\n\u3000 \r\n\x1f\n{"id": "b"}\n'.encode("utf-8"))
+
+    docs = retriever_mod.PacketDocs(docs_path)
+
+    assert [docs[i]["id"] for i in range(len(docs))] == ["a", "b"]
+
+
+def test_open_docs_is_cached_until_file_changes(tmp_path: Path) -> None:
+    docs_path = tmp_path / "docs.jsonl"
+    docs_path.write_bytes(b'{"id": "a"}\n')
+
+    first = retriever_mod._open_docs(docs_path)
+    assert retriever_mod._open_docs(docs_path) is first
+
+    docs_path.write_bytes(b'{"id": "a"}\n{"id": "b"}\n')
+    second = retriever_mod._open_docs(docs_path)
+    assert second is not first
+    assert len(second) == 2
+
+
+def test_packet_state_is_reused_across_retrievers(
+    tmp_path: Path, packet_blobs: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    packet_dir = _write_packet(tmp_path, packet_blobs)
+    reads: list[str] = []
+    original = faiss.read_index
+
+    def counting_read(path, *args):  # type: ignore[no-untyped-def]
+        reads.append(path)
+        return original(path, *args)
+
+    monkeypatch.setattr(retriever_mod.faiss, "read_index", counting_read)
+
+    first = retriever_mod.PacketRetriever(tmp_path, str(packet_dir))
+    second = retriever_mod.PacketRetriever(tmp_path, str(packet_dir))
+
+    assert second.index is first.index
+    assert second.docs is first.docs
+    assert len(reads) == 1
+
+
+def test_packet_state_reloads_when_manifest_changes(tmp_path: Path, packet_blobs: Path) -> None:
+    packet_dir = _write_packet(tmp_path, packet_blobs, name="edited")
+    first = retriever_mod.PacketRetriever(tmp_path, str(packet_dir))
+    assert first.model_name == "fake"
+
+    manifest_path = packet_dir / "manifest.json"
+    manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    manifest["embedding"]["model"] = "fake-v2"
+    manifest_path.write_text(json.dumps(manifest), encoding="utf-8")
+
+    second = retriever_mod.PacketRetriever(tmp_path, str(packet_dir))
+    assert second.model_name == "fake-v2"
+
+    manifest_path.unlink()
+    with pytest.raises(FileNotFoundError, match="missing manifest"):
+        retriever_mod.PacketRetriever(tmp_path, str(packet_dir))
+
+
+def _cold_load_concurrently(count: int, load) -> list:  # type: ignore[no-untyped-def]
+    """Run ``load`` on ``count`` threads released together and return their results."""
+    barrier = threading.Barrier(count)
+    results: list = [None] * count
+
+    def worker(slot: int) -> None:
+        barrier.wait()
+        results[slot] = load()
+
+    threads = [threading.Thread(target=worker, args=(slot,)) for slot in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_concurrent_cold_queries_load_the_index_once(
+    tmp_path: Path, packet_blobs: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    packet_dir = _write_packet(tmp_path, packet_blobs, name="cold")
+    loads: list[Path] = []
+    real_load = retriever_mod.load_faiss_index
+
+    def slow_load(path, **kwargs):  # type: ignore[no-untyped-def]
+        loads.append(path)
+        time.sleep(0.05)
+        return real_load(path, **kwargs)
+
+    monkeypatch.setattr(retriever_mod, "load_faiss_index", slow_load)
+
+    states = _cold_load_concurrently(4, lambda: retriever_mod._load_packet_state(packet_dir))
+
+    assert len(loads) == 1
+    assert all(index is states[0][1] for _manifest, index in states)
+
+
+def test_concurrent_cold_queries_index_docs_once(
+    tmp_path: Path, packet_blobs: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    packet_dir = _write_packet(tmp_path, packet_blobs, name="cold-docs")
+    opened: list[Path] = []
+    real_docs = retriever_mod.PacketDocs
+
+    def slow_docs(path: Path):  # type: ignore[no-untyped-def]
+        opened.append(path)
+        time.sleep(0.05)
+        return real_docs(path)
+
+    monkeypatch.setattr(retriever_mod, "PacketDocs", slow_docs)
+
+    tables = _cold_load_concurrently(4, lambda: retriever_mod._open_docs(packet_dir / "docs.jsonl"))
+
+    assert len(opened) == 1
+    assert all(table is tables[0] for table in tables)
+
+
+def test_embedders_are_reused_per_thread_but_not_shared() -> None:
+    url, mode = "http://127.0.0.1:9/embed", "http"
+    here = retriever_mod._get_embedder(url, mode)
+    assert retriever_mod._get_embedder(url, mode) is here
+
+    elsewhere = _cold_load_concurrently(2, lambda: retriever_mod._get_embedder(url, mode))
+
+    assert elsewhere[0] is not elsewhere[1]
+    assert all(client is not here for client in elsewhere)
+
+
+def test_retrieve_many_runs_one_batched_search(shared_packet: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    embedder = _FakeEmbedder(np.asarray([[1.0, 0.0, 0.0], [0.0, 0.0, 1.0]], dtype=np.float32))
+    retriever = retriever_mod.PacketRetriever(shared_packet.parents[1], str(shared_packet))
+    monkeypatch.setattr(retriever, "_new_embedder", lambda: embedder)
+
+    payload = retriever.retrieve_many(["first", "third"], 1)
+
+    assert embedder.calls == [("first", "third")]
+    assert [item["query"] for item in payload["queries"]] == ["first", "third"]
+    assert [item["results"][0]["id"] for item in payload["queries"]] == ["a", "c"]
+
+
+def test_list_packets_all_versions_reports_file_presence(tmp_path: Path, packet_blobs: Path) -> None:
+    _write_packet(tmp_path, packet_blobs, name="demo", version="1.0.0")
+    partial = tmp_path / "demo" / "2.0.0"
+    partial.mkdir(parents=True)
+    (partial / "cpm.yml").write_text("name: demo\nversion: 2.0.0\n", encoding="utf-8")
+    history = tmp_path / "demo" / ".history"
+    history.mkdir()
+    (history / "manifest.json").write_text("{}", encoding="utf-8")
+
+    packets = reader_mod.PacketReader(tmp_path).list_packets(include_all_versions=True)
+
+    by_version = {item["version"]: item for item in packets}
+    assert set(by_version) == {"1.0.0", "2.0.0"}
+    assert by_version["1.0.0"]["has_faiss"] is True
+    assert by_version["1.0.0"]["docs"] == 3
+    assert by_version["2.0.0"]["has_cpm_yml"] is True
+    assert by_version["2.0.0"]["has_docs"] is False
+
+
+def test_list_packets_reports_index_lookup_fields(tmp_path: Path, packet_blobs: Path) -> None:
+    similarity = {"index_type": "faiss:IVF64,SQ8", "index_spec": "IVF64,SQ8", "nprobe": 8, "quantizer": "SQ8"}
+    for position in range(reader_mod._PARALLEL_LOOKUP_MIN):
+        packet_dir = _write_packet(tmp_path, packet_blobs, name=f"pkt{position}")
+        if position == 0:
+            manifest = json.loads((packet_dir / "manifest.json").read_text(encoding="utf-8"))
+            manifest["similarity"] = similarity
+            (packet_dir / "manifest.json").write_text(json.dumps(manifest), encoding="utf-8")
+
+    packets = reader_mod.PacketReader(tmp_path).list_packets()
+
+    by_name = {item["name"]: item for item in packets}
+    assert len(by_name) == reader_mod._PARALLEL_LOOKUP_MIN
+    tuned = by_name["pkt0"]
+    assert (tuned["index_type"], tuned["nprobe"], tuned["quantizer"]) == ("faiss:IVF64,SQ8", 8, "SQ8")
+    flat = by_name["pkt1"]
+    assert (flat["index_type"], flat["nprobe"], flat["quantizer"]) == (None, None, None)
+
+
+def test_query_tool_runs_retrieval_off_the_event_loop(shared_packet: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    cpm_dir = str(shared_packet.parents[1])
+    threads: list[str] = []
+
+    def fake_retrieve(self, query, k):  # type: ignore[no-untyped-def]
+        threads.append(threading.current_thread().name)
+        return {"ok": True, "query": query}
+
+    monkeypatch.setattr(retriever_mod.PacketRetriever, "retrieve", fake_retrieve)
+
+    async def run_both():  # type: ignore[no-untyped-def]
+        return await asyncio.gather(
+            server_mod.query(str(shared_packet), "one", cpm_dir=cpm_dir),
+            server_mod.query("missing", "two", cpm_dir=cpm_dir),
+        )
+
+    found, missing = asyncio.run(run_both())
+
+    assert found == {"ok": True, "query": "one"}
+    assert missing["error"] == "packet_not_found"
+    assert threads and threads[0] != threading.main_thread().name
+
+
+def test_retrieval_errors_are_not_reported_as_missing_packets(shared_packet: Path) -> None:
+    cpm_dir = str(shared_packet.parents[1])
+
+    def vanished(retriever):  # type: ignore[no-untyped-def]
+        raise FileNotFoundError("docs.jsonl removed mid-query")
+
+    def unreachable(retriever):  # type: ignore[no-untyped-def]
+        raise retriever_mod.EmbedServerError("http://embed.test", "http")
+
+    call = partial(server_mod._with_retriever, str(shared_packet), cpm_dir=cpm_dir, embed_url=None, embed_mode=None)
+    with pytest.raises(FileNotFoundError, match="mid-query"):
+        call(action=vanished)
+    assert call(action=unreachable)["error"] == "embed_server_unreachable"
@@ -1,99 +1,165 @@
 from __future__ import annotations
 
 import subprocess
+from collections.abc import Callable
+from functools import lru_cache
 from pathlib import Path
+from typing import NamedTuple
+from unittest import mock
 
 import pytest
 
-from cpm_core.oci import OciClient, OciClientConfig, build_artifact_spec
-from cpm_core.oci.errors import OciCommandError, OciSecurityError
+from cpm_core.oci import CPM_MANIFEST_MEDIATYPE, OciClient, OciClientConfig, build_artifact_spec
+from cpm_core.oci.errors import OciCommandError, OciNotSupportedError, OciSecurityError
 from cpm_core.oci.security import redact_command_for_log
 
+_DIGEST_A = "sha256:" + ("a" * 64)
+_DIGEST_B = "sha256:" + ("b" * 64)
+_DIGEST_C = "sha256:" + ("c" * 64)
+_PKG_REF = "registry.local/team/pkg:1.0.0"
+_REPO_REF = "registry.local/team/repo:1.0.0"
 
-def _completed(stdout: str = "", stderr: str = "", returncode: int = 0) -> subprocess.CompletedProcess[str]:
-    return subprocess.CompletedProcess(args=["oras"], returncode=returncode, stdout=stdout, stderr=stderr)
 
+class _FakeCompleted(NamedTuple):
+    """The slice of ``subprocess.CompletedProcess`` that ``OciClient._run`` reads."""
 
-def test_resolve_extracts_digest(monkeypatch: pytest.MonkeyPatch) -> None:
-    def _fake_run(*args, **kwargs):
-        del args, kwargs
-        return _completed(stdout="my-ref@sha256:aaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaa")
+    stdout: str = ""
+    stderr: str = ""
+    returncode: int = 0
+    args: tuple[str, ...] = ("oras",)
 
-    monkeypatch.setattr(subprocess, "run", _fake_run)
-    client = OciClient(OciClientConfig(allowlist_domains=("registry.local",)))
-    digest = client.resolve("registry.local/team/pkg:1.0.0")
-    assert digest == "sha256:aaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaa"
 
+@lru_cache(maxsize=128)
+def _completed(stdout: str = "", stderr: str = "", returncode: int = 0) -> _FakeCompleted:
+    # the client only reads results, so identical fake outputs can share one instance
+    return _FakeCompleted(stdout, stderr, returncode)
 
-def test_push_falls_back_to_resolve_when_output_has_no_digest(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
-    calls: list[list[str]] = []
 
-    def _fake_run(command, **kwargs):
-        del kwargs
-        calls.append(list(command))
-        if command[1] == "push":
-            return _completed(stdout="pushed")
-        return _completed(stdout="sha256:bbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbb")
+_Handler = Callable[..., _FakeCompleted]
 
-    monkeypatch.setattr(subprocess, "run", _fake_run)
+
+class _FakeOras:
+    """Stand-in for ``subprocess.run`` that dispatches ``oras`` invocations by subcommand.
+
+    ``run`` is the mock patched over ``subprocess.run``; its ``call_args_list`` is the call log.
+    """
+
+    def __init__(self) -> None:
+        self.handlers: dict[tuple[str, ...], _Handler] = {}
+        self.run = mock.MagicMock(side_effect=self._dispatch)
+
+    def register(self, subcommand: str | tuple[str, ...], handler: _Handler) -> None:
+        key = (subcommand,) if isinstance(subcommand, str) else tuple(subcommand)
+        self.handlers[key] = handler
+
+    def subcommands(self) -> list[str]:
+        return [call.args[0][1] for call in self.run.call_args_list]
+
+    def _dispatch(self, command, **kwargs) -> _FakeCompleted:
+        for key in (tuple(command[1:3]), tuple(command[1:2])):
+            if key in self.handlers:
+                return self.handlers[key](command, **kwargs)
+        raise AssertionError(f"unexpected oras command: {command[1:3]}")
+
+
+@pytest.fixture
+def fake_oras(monkeypatch: pytest.MonkeyPatch) -> _FakeOras:
+    fake = _FakeOras()
+    monkeypatch.setattr(subprocess, "run", fake.run)
+    return fake
+
+
+def _client(**overrides) -> OciClient:
+    """Client allowlisted for ``registry.local``; ``overrides`` feed straight into the config."""
+    return OciClient(OciClientConfig(allowlist_domains=("registry.local",), **overrides))
+
+
+@pytest.fixture(scope="module")
+def oci_client() -> OciClient:
+    # OciClient holds nothing but its frozen config, so one instance serves the module
+    return _client()
+
+
+def _returns(stdout: str) -> _Handler:
+    return lambda command, **kwargs: _completed(stdout=stdout)
+
+
+def _not_installed(command, **kwargs) -> _FakeCompleted:
+    raise FileNotFoundError("oras")
+
+
+@pytest.mark.parametrize(
+    ("ref", "domains", "handler", "expected", "match"),
+    [
+        pytest.param(_PKG_REF, ("registry.local",), _returns("my-ref@" + _DIGEST_A), _DIGEST_A, None, id="digest"),
+        pytest.param("blocked.local/team/repo:1.0.0", ("allowed.local",), None, OciSecurityError, None, id="allowlist"),
+        pytest.param(_REPO_REF, (), _not_installed, OciCommandError, "oras CLI not found", id="missing-oras"),
+    ],
+)
+def test_resolve(fake_oras: _FakeOras, ref: str, domains: tuple[str, ...], handler, expected, match) -> None:
+    if handler is not None:
+        fake_oras.register("resolve", handler)
+    client = OciClient(OciClientConfig(allowlist_domains=domains))
+    if isinstance(expected, str):
+        assert client.resolve(ref) == expected
+        return
+    with pytest.raises(expected, match=match):
+        client.resolve(ref)
+
+
+@pytest.mark.parametrize(
+    ("stdout", "expected"),
+    [
+        pytest.param("", [], id="empty"),
+        pytest.param('{"tags": ["1.0.0", 2]}', ["1.0.0", "2"], id="json-object"),
+        pytest.param('["1.0.0", "1.1.0"]', ["1.0.0", "1.1.0"], id="json-list"),
+        pytest.param("1.0.0\n\n  1.1.0  \n", ["1.0.0", "1.1.0"], id="plain-lines"),
+        pytest.param("42", OciNotSupportedError, id="unparseable"),
+    ],
+)
+def test_list_tags_output_formats(fake_oras: _FakeOras, oci_client: OciClient, stdout: str, expected) -> None:
+    fake_oras.register(("repo", "tags"), _returns(stdout))
+    if isinstance(expected, list):
+        assert oci_client.list_tags(_PKG_REF) == expected
+        return
+    with pytest.raises(expected):
+        oci_client.list_tags(_PKG_REF)
+
+
+def test_push_falls_back_to_resolve_when_output_has_no_digest(
+    fake_oras: _FakeOras, oci_client: OciClient, tmp_path: Path
+) -> None:
+    fake_oras.register("push", _returns("pushed"))
+    fake_oras.register("resolve", _returns(_DIGEST_B))
     file_path = tmp_path / "packet.manifest.json"
     file_path.write_text("{}", encoding="utf-8")
 
-    client = OciClient(OciClientConfig(allowlist_domains=("registry.local",)))
-    result = client.push(
+    result = oci_client.push(
         "registry.local/project/repo:1.0.0",
-        build_artifact_spec([file_path], {"packet.manifest.json": "application/vnd.cpm.packet.manifest.v1+json"}),
+        build_artifact_spec([file_path], {"packet.manifest.json": CPM_MANIFEST_MEDIATYPE}),
     )
 
-    assert result.digest.endswith("b" * 64)
-    assert len(calls) == 2
-    assert calls[0][1] == "push"
-    assert calls[1][1] == "resolve"
+    assert result.digest == _DIGEST_B
+    assert fake_oras.subcommands() == ["push", "resolve"]
 
 
-def test_pull_enforces_size_limit(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
-    def _fake_run(*args, **kwargs):
-        del args, kwargs
-        return _completed(stdout="sha256:cccccccccccccccccccccccccccccccccccccccccccccccccccccccccccccccc")
-
-    monkeypatch.setattr(subprocess, "run", _fake_run)
+def test_pull_enforces_size_limit(fake_oras: _FakeOras, tmp_path: Path) -> None:
+    fake_oras.register("pull", _returns(_DIGEST_C))
     out = tmp_path / "out"
     out.mkdir(parents=True, exist_ok=True)
     payload = out / "big.bin"
     payload.write_bytes(b"x" * 32)
 
-    client = OciClient(
-        OciClientConfig(
-            allowlist_domains=("registry.local",),
-            max_artifact_size_bytes=8,
-        )
-    )
+    client = _client(max_artifact_size_bytes=8)
     with pytest.raises(OciCommandError, match="exceeds configured limit"):
-        client.pull("registry.local/team/pkg:1.0.0", out)
-
-
-def test_allowlist_is_enforced() -> None:
-    client = OciClient(OciClientConfig(allowlist_domains=("allowed.local",)))
-    with pytest.raises(OciSecurityError):
-        client.resolve("blocked.local/team/repo:1.0.0")
-
-
-def test_missing_oras_returns_explicit_error(monkeypatch: pytest.MonkeyPatch) -> None:
-    def _fake_run(*args, **kwargs):
-        del args, kwargs
-        raise FileNotFoundError("oras")
-
-    monkeypatch.setattr(subprocess, "run", _fake_run)
-    client = OciClient()
-    with pytest.raises(OciCommandError, match="oras CLI not found"):
-        client.resolve("registry.local/team/repo:1.0.0")
+        client.pull(_PKG_REF, out)
 
 
 def test_redacts_sensitive_args() -> None:
     command = [
         "oras",
         "push",
-        "registry.local/team/repo:1.0.0",
+        _REPO_REF,
         "--username",
         "robot$build",
         "--password",
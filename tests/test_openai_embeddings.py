@@ -1,13 +1,19 @@
 from __future__ import annotations
 
-import json
+import base64
 import threading
-import time
-from http.server import BaseHTTPRequestHandler, HTTPServer
-from socketserver import ThreadingMixIn
+from collections.abc import Iterator, Mapping
+from functools import lru_cache
+from socketserver import StreamRequestHandler, TCPServer, ThreadingMixIn
 from typing import Any
+from urllib.parse import urlsplit
 
+import numpy as np
 import pytest
+import requests
+from requests.adapters import BaseAdapter
+from requests.exceptions import ReadTimeout
+from requests.structures import CaseInsensitiveDict
 
 from cpm_builtin.embeddings.openai import (
     OpenAIEmbeddingsHttpClient,
@@ -16,87 +22,178 @@ from cpm_builtin.embeddings.openai import (
     serialize_openai_request,
 )
 from cpm_builtin.embeddings.types import EmbedRequestIR
+from tests._helpers import json_dumps, json_loads
 
 
-class _ThreadedServer(ThreadingMixIn, HTTPServer):
+class _ThreadedServer(ThreadingMixIn, TCPServer):
     daemon_threads = True
+    allow_reuse_address = True
 
 
-class _OpenAIHandler(BaseHTTPRequestHandler):
-    def do_POST(self) -> None:
-        if self.path != "/v1/embeddings":
-            self.send_error(404)
-            return
+_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    422: "Unprocessable Entity",
+    429: "Too Many Requests",
+    503: "Service Unavailable",
+}
+
+
+# modes that always answer with a fixed 4xx, keyed by status
+_CLIENT_ERRORS = {"400": "bad request", "429": "rate limited"}
+# modes that reject only the base64 encoding_format, with the status a given server family uses
+_BASE64_REJECTIONS = {"reject_base64": 400, "reject_base64_422": 422}
+
+
+@lru_cache(maxsize=None)
+def _error_body(message: str) -> bytes:
+    return json_dumps({"error": {"message": message}})
+
 
-        server = self.server
-        mode = getattr(server, "mode", "ok")
-        call_count = getattr(server, "call_count", 0) + 1
-        setattr(server, "call_count", call_count)
-
-        length = int(self.headers.get("Content-Length", "0"))
-        payload_raw = self.rfile.read(length)
-        payload = json.loads(payload_raw.decode("utf-8"))
-        setattr(server, "last_payload", payload)
-        setattr(
-            server,
-            "last_headers",
-            {str(k): str(v) for k, v in self.headers.items()},
+@lru_cache(maxsize=None)
+def _ok_body(count: int, as_base64: bool) -> bytes:
+    """Serialized 200 response for ``count`` inputs; depends only on the count and encoding."""
+    data = []
+    for index in range(count):
+        embedding: Any = [float(index + 1), 0.0, 0.0]
+        if as_base64:
+            packed = np.asarray(embedding, dtype="<f4").tobytes()
+            embedding = base64.b64encode(packed).decode("ascii")
+        data.append(
+            {
+                "object": "embedding",
+                "index": index,
+                "embedding": embedding,
+            }
         )
+    data.reverse()
+    body = {
+        "object": "list",
+        "data": data,
+        "model": "mock-model",
+        "usage": {"prompt_tokens": count, "total_tokens": count},
+    }
+    return json_dumps(body)
 
-        if mode == "400":
-            self._respond(400, {"error": {"message": "bad request"}})
-            return
 
-        if mode == "503_once" and call_count == 1:
-            self._respond(503, {"error": {"message": "service unavailable"}})
-            return
+class _MockEndpoint:
+    """Scripted ``/v1/embeddings`` upstream, shared by the socket server and the in-process transport."""
 
-        if mode == "timeout":
-            time.sleep(0.2)
-            self._respond(200, {"object": "list", "data": [], "model": "mock-model"})
-            return
+    def __init__(self, mode: str = "ok") -> None:
+        self.mode = mode
+        self.call_count = 0
+        self.last_payload: Any = None
+        self.last_headers: Mapping[str, str] = {}
+
+    def respond(self, path: str, headers: Mapping[str, str], body: bytes) -> tuple[int, bytes] | None:
+        """Return ``(status, body)``, or ``None`` when the mode simulates an upstream that never answers."""
+        if path != "/v1/embeddings":
+            return 404, _error_body("not found")
+
+        self.call_count += 1
+        payload = json_loads(body)
+        self.last_payload = payload
+        self.last_headers = headers
+
+        if self.mode in _CLIENT_ERRORS:
+            return int(self.mode), _error_body(_CLIENT_ERRORS[self.mode])
+        if self.mode == "503_once" and self.call_count == 1:
+            return 503, _error_body("service unavailable")
+        if self.mode == "timeout":
+            return None
+        if self.mode in _BASE64_REJECTIONS and "encoding_format" in payload:
+            return _BASE64_REJECTIONS[self.mode], _error_body("unknown field encoding_format")
 
         texts = payload.get("input") or []
-        data = []
-        for index, _ in enumerate(texts):
-            data.append(
-                {
-                    "object": "embedding",
-                    "index": index,
-                    "embedding": [float(index + 1), 0.0, 0.0],
-                }
-            )
-        data.reverse()
-        self._respond(
-            200,
-            {
-                "object": "list",
-                "data": data,
-                "model": "mock-model",
-                "usage": {"prompt_tokens": len(texts), "total_tokens": len(texts)},
-            },
+        return 200, _ok_body(len(texts), payload.get("encoding_format") == "base64")
+
+
+class _EndpointAdapter(BaseAdapter):
+    """requests transport that answers from a ``_MockEndpoint`` in-process: no socket, no server thread."""
+
+    def __init__(self, endpoint: _MockEndpoint) -> None:
+        super().__init__()
+        self.endpoint = endpoint
+
+    def send(self, request: requests.PreparedRequest, **kwargs: Any) -> requests.Response:
+        del kwargs
+        result = self.endpoint.respond(urlsplit(request.url).path, request.headers, request.body or b"")
+        if result is None:
+            raise ReadTimeout("simulated upstream timeout", request=request)
+        status, data = result
+        response = requests.Response()
+        response.status_code = status
+        response.reason = _REASONS[status]
+        response.headers = CaseInsensitiveDict({"Content-Type": "application/json"})
+        response._content = data
+        response.encoding = "utf-8"
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self) -> None:
+        pass
+
+
+_MOCK_URL = "http://embeddings.test/v1/embeddings"
+
+
+@pytest.fixture
+def mock_endpoint() -> _MockEndpoint:
+    return _MockEndpoint()
+
+
+def _mock_client(endpoint: _MockEndpoint, mode: str, **kwargs: Any) -> OpenAIEmbeddingsHttpClient:
+    endpoint.mode = mode
+    session = requests.Session()
+    session.mount("http://", _EndpointAdapter(endpoint))
+    return OpenAIEmbeddingsHttpClient(_MOCK_URL, session=session, **kwargs)
+
+
+class _OpenAIHandler(StreamRequestHandler):
+    """Bare HTTP/1.1 responder: one JSON request per connection, answered with ``Connection: close``."""
+
+    def handle(self) -> None:
+        request_line = self.rfile.readline()
+        if not request_line:
+            return
+        path = request_line.split()[1].decode("ascii")
+        headers: dict[str, str] = {}
+        while True:
+            line = self.rfile.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip()] = value.strip()
+        payload_raw = self.rfile.read(int(headers.get("Content-Length", "0")))
+
+        result = self.server.endpoint.respond(path, headers, payload_raw)
+        assert result is not None, "timeouts are simulated by _EndpointAdapter, not the socket server"
+        self._send(*result)
+
+    def _send(self, status: int, data: bytes) -> None:
+        head = (
+            f"HTTP/1.1 {status} {_REASONS[status]}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(data)}\r\n"
+            "Connection: close\r\n\r\n"
         )
+        self.wfile.write(head.encode("ascii") + data)
 
-    def _respond(self, status: int, body: dict[str, Any]) -> None:
-        data = json.dumps(body).encode("utf-8")
-        self.send_response(status)
-        self.send_header("Content-Type", "application/json")
-        self.send_header("Content-Length", str(len(data)))
-        self.end_headers()
-        self.wfile.write(data)
 
-    def log_message(self, format: str, *args: object) -> None:
-        return
+def _configure_server(server: _ThreadedServer, mode: str = "ok") -> str:
+    server.endpoint = _MockEndpoint(mode)
+    return f"http://127.0.0.1:{server.server_address[1]}/v1/embeddings"
 
 
 def _start_server(mode: str = "ok") -> tuple[_ThreadedServer, str]:
     server = _ThreadedServer(("127.0.0.1", 0), _OpenAIHandler)
-    server.mode = mode
-    server.call_count = 0
-    server.last_headers = {}
-    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    endpoint = _configure_server(server, mode)
+    # shutdown() blocks for up to one poll interval; the default 0.5s dominated module teardown
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True)
     thread.start()
-    return server, f"http://127.0.0.1:{server.server_port}/v1/embeddings"
+    return server, endpoint
 
 
 def _stop_server(server: _ThreadedServer) -> None:
@@ -104,6 +201,14 @@ def _stop_server(server: _ThreadedServer) -> None:
     server.server_close()
 
 
+@pytest.fixture(scope="module")
+def openai_server() -> Iterator[_ThreadedServer]:
+    """Real loopback server for the one end-to-end test; the rest go through ``_EndpointAdapter``."""
+    server, _endpoint = _start_server()
+    yield server
+    _stop_server(server)
+
+
 def test_serialize_openai_request() -> None:
     request = EmbedRequestIR(
         texts=["alpha", "beta"],
@@ -151,88 +256,87 @@ def test_normalize_embeddings_client_side() -> None:
     assert normalized[1] == [0.0, 0.0]
 
 
-def test_openai_client_integration_success() -> None:
-    server, endpoint = _start_server(mode="ok")
-    try:
-        client = OpenAIEmbeddingsHttpClient(endpoint, timeout=1.0, max_retries=2)
-        request = EmbedRequestIR(
-            texts=["a", "b"],
-            model="text-embedding-3-small",
-            hints={"dim": 3, "normalize": True, "task": "retrieval.query"},
-        )
-        response = client.embed(request)
-
-        assert response.model == "mock-model"
-        assert response.vectors == [[1.0, 0.0, 0.0], [2.0, 0.0, 0.0]]
-        assert server.last_payload == {"input": ["a", "b"], "model": "text-embedding-3-small"}
-        assert server.last_headers["X-Embedding-Dim"] == "3"
-        assert server.last_headers["X-Embedding-Normalize"] == "true"
-        assert server.last_headers["X-Embedding-Task"] == "retrieval.query"
-        assert server.last_headers["X-Model-Hint"] == "text-embedding-3-small"
-    finally:
-        _stop_server(server)
-
-
-def test_openai_client_integration_success_with_normalization() -> None:
-    server, endpoint = _start_server(mode="ok")
-    try:
-        client = OpenAIEmbeddingsHttpClient(endpoint, timeout=1.0, max_retries=2)
-        request = EmbedRequestIR(texts=["a", "b"], model="text-embedding-3-small")
-        response = client.embed(request, normalize=True)
-        assert response.vectors[0] == pytest.approx([1.0, 0.0, 0.0], rel=1e-6)
-        assert response.vectors[1] == pytest.approx([1.0, 0.0, 0.0], rel=1e-6)
-    finally:
-        _stop_server(server)
-
-
-def test_openai_client_integration_400() -> None:
-    server, endpoint = _start_server(mode="400")
-    try:
-        client = OpenAIEmbeddingsHttpClient(endpoint, timeout=1.0, max_retries=2)
-        request = EmbedRequestIR(texts=["a"], model="text-embedding-3-small")
-        with pytest.raises(ValueError, match="bad request"):
-            client.embed(request)
-    finally:
-        _stop_server(server)
-
-
-def test_openai_client_integration_503_retry() -> None:
-    server, endpoint = _start_server(mode="503_once")
-    try:
-        client = OpenAIEmbeddingsHttpClient(
-            endpoint, timeout=1.0, max_retries=2, backoff_seconds=0.01
-        )
-        request = EmbedRequestIR(texts=["a"], model="text-embedding-3-small")
-        response = client.embed(request)
-        assert response.vectors == [[1.0, 0.0, 0.0]]
-        assert server.call_count == 2
-    finally:
-        _stop_server(server)
-
-
-def test_openai_client_integration_timeout() -> None:
-    server, endpoint = _start_server(mode="timeout")
-    try:
-        client = OpenAIEmbeddingsHttpClient(
-            endpoint, timeout=0.05, max_retries=2, backoff_seconds=0.01
-        )
-        request = EmbedRequestIR(texts=["a"], model="text-embedding-3-small")
-        with pytest.raises(RuntimeError, match="failed to obtain embeddings"):
-            client.embed(request)
-        assert server.call_count >= 2
-    finally:
-        _stop_server(server)
-
-
-def test_openai_client_embed_texts_accepts_string_input() -> None:
-    server, endpoint = _start_server(mode="ok")
-    try:
-        client = OpenAIEmbeddingsHttpClient(endpoint, timeout=1.0, max_retries=2)
-        response = client.embed_texts("single", model="text-embedding-3-small")
-        assert response.vectors == [[1.0, 0.0, 0.0]]
-        assert server.last_payload == {
-            "input": ["single"],
-            "model": "text-embedding-3-small",
-        }
-    finally:
-        _stop_server(server)
+def test_openai_client_integration_success(openai_server: _ThreadedServer) -> None:
+    endpoint = _configure_server(openai_server, "ok")
+    client = OpenAIEmbeddingsHttpClient(endpoint, timeout=1.0, max_retries=2)
+    request = EmbedRequestIR(
+        texts=["a", "b"],
+        model="text-embedding-3-small",
+        hints={"dim": 3, "normalize": True, "task": "retrieval.query"},
+    )
+    response = client.embed(request)
+
+    assert response.model == "mock-model"
+    assert response.vectors == [[1.0, 0.0, 0.0], [2.0, 0.0, 0.0]]
+    assert openai_server.endpoint.last_payload == {"input": ["a", "b"], "model": "text-embedding-3-small"}
+    assert openai_server.endpoint.last_headers["X-Embedding-Dim"] == "3"
+    assert openai_server.endpoint.last_headers["X-Embedding-Normalize"] == "true"
+    assert openai_server.endpoint.last_headers["X-Embedding-Task"] == "retrieval.query"
+    assert openai_server.endpoint.last_headers["X-Model-Hint"] == "text-embedding-3-small"
+
+
+def test_openai_client_integration_success_with_normalization(mock_endpoint: _MockEndpoint) -> None:
+    client = _mock_client(mock_endpoint, "ok", timeout=1.0, max_retries=2)
+    request = EmbedRequestIR(texts=["a", "b"], model="text-embedding-3-small")
+    response = client.embed(request, normalize=True)
+    assert response.vectors[0] == pytest.approx([1.0, 0.0, 0.0], rel=1e-6)
+    assert response.vectors[1] == pytest.approx([1.0, 0.0, 0.0], rel=1e-6)
+
+
+def test_openai_client_integration_400(mock_endpoint: _MockEndpoint) -> None:
+    client = _mock_client(mock_endpoint, "400", timeout=1.0, max_retries=2)
+    request = EmbedRequestIR(texts=["a"], model="text-embedding-3-small")
+    with pytest.raises(ValueError, match="bad request"):
+        client.embed(request)
+
+
+def test_openai_client_integration_503_retry(mock_endpoint: _MockEndpoint) -> None:
+    client = _mock_client(mock_endpoint, "503_once", timeout=1.0, max_retries=2, backoff_seconds=0.01)
+    request = EmbedRequestIR(texts=["a"], model="text-embedding-3-small")
+    response = client.embed(request)
+    assert response.vectors == [[1.0, 0.0, 0.0]]
+    assert mock_endpoint.call_count == 2
+
+
+def test_openai_client_integration_timeout(mock_endpoint: _MockEndpoint) -> None:
+    client = _mock_client(mock_endpoint, "timeout", timeout=0.05, max_retries=2, backoff_seconds=0.01)
+    request = EmbedRequestIR(texts=["a"], model="text-embedding-3-small")
+    with pytest.raises(RuntimeError, match="failed to obtain embeddings"):
+        client.embed(request)
+    assert mock_endpoint.call_count >= 2
+
+
+def test_openai_client_embed_texts_accepts_string_input(mock_endpoint: _MockEndpoint) -> None:
+    client = _mock_client(mock_endpoint, "ok", timeout=1.0, max_retries=2)
+    response = client.embed_texts("single", model="text-embedding-3-small")
+    assert response.vectors == [[1.0, 0.0, 0.0]]
+    assert mock_endpoint.last_payload == {
+        "input": ["single"],
+        "model": "text-embedding-3-small",
+    }
+
+
+def test_openai_client_decodes_base64_vectors(mock_endpoint: _MockEndpoint) -> None:
+    client = _mock_client(mock_endpoint, "ok", timeout=1.0, encoding_format="base64")
+    response = client.embed(EmbedRequestIR(texts=["a", "b"], model="m"))
+    assert mock_endpoint.last_payload["encoding_format"] == "base64"
+    assert isinstance(response.vectors, np.ndarray)
+    assert response.as_array().dtype == np.float32
+    assert response.as_array().tolist() == [[1.0, 0.0, 0.0], [2.0, 0.0, 0.0]]
+
+
+@pytest.mark.parametrize("mode", ["reject_base64", "reject_base64_422"])
+def test_openai_client_falls_back_when_base64_is_rejected(mock_endpoint: _MockEndpoint, mode: str) -> None:
+    client = _mock_client(mock_endpoint, mode, timeout=1.0, encoding_format="base64")
+    response = client.embed(EmbedRequestIR(texts=["a"], model="m"))
+    assert response.vectors == [[1.0, 0.0, 0.0]]
+    assert client.encoding_format == "float"
+    assert "encoding_format" not in mock_endpoint.last_payload
+
+
+def test_openai_client_keeps_base64_after_other_client_errors(mock_endpoint: _MockEndpoint) -> None:
+    client = _mock_client(mock_endpoint, "429", timeout=1.0, encoding_format="base64")
+    with pytest.raises(ValueError, match="status=429"):
+        client.embed(EmbedRequestIR(texts=["a"], model="m"))
+    assert mock_endpoint.call_count == 1
+    assert client.encoding_format == "base64"
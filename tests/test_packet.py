@@ -10,11 +10,16 @@ from cpm_core.packet import (
     EmbeddingSpec,
     PacketManifest,
     FaissFlatIP,
+    build_faiss_index,
+    configure_search,
+    gpu_requested,
     load_faiss_index,
     load_manifest,
+    mmap_requested,
     compute_checksums,
     read_docs_jsonl,
     read_vectors_f16,
+    to_gpu,
     write_docs_jsonl,
     write_manifest,
     write_vectors_f16,
@@ -64,6 +69,21 @@ def test_docs_roundtrip(tmp_path: Path) -> None:
     assert read_docs_jsonl(docs_path) == chunks
 
 
+def test_docs_jsonl_keeps_the_original_byte_format(tmp_path: Path) -> None:
+    chunks = [DocChunk(id="doc-1", text="caffè ✓", metadata={"path": "a.md", "score": 1e-5, "lines": [1, 2]})]
+    docs_path = tmp_path / "docs.jsonl"
+    write_docs_jsonl(chunks, docs_path)
+
+    expected = {
+        "id": "doc-1",
+        "text": "caffè ✓",
+        "hash": hashlib.sha256("caffè ✓".encode("utf-8")).hexdigest(),
+        "metadata": {"path": "a.md", "score": 1e-5, "lines": [1, 2]},
+    }
+    assert docs_path.read_bytes() == (json.dumps(expected, ensure_ascii=False) + "\n").encode("utf-8")
+    assert read_docs_jsonl(docs_path) == chunks
+
+
 def test_vectors_roundtrip(tmp_path: Path) -> None:
     vectors = np.arange(12, dtype=np.float32).reshape(3, 4)
     vec_path = tmp_path / "vectors.f16.bin"
@@ -102,3 +122,52 @@ def test_faiss_index_roundtrip(tmp_path: Path) -> None:
     loaded = load_faiss_index(index_path)
     scores, ids = loaded.search(vectors[:1], 1)
     assert ids[0][0] == 0
+
+
+def test_build_faiss_index_trains_ivf_and_applies_nprobe() -> None:
+    faiss = pytest.importorskip("faiss")
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((512, 8)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    index = build_faiss_index(vectors, index_spec="IVF8,Flat")
+    assert index.is_trained
+    assert index.ntotal == 512
+
+    configure_search(index, {"nprobe": 4})
+    assert faiss.extract_index_ivf(index).nprobe == 4
+    _, ids = index.search(vectors[:1], 1)
+    assert ids[0][0] == 0
+
+
+def test_load_faiss_index_mmap(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    pytest.importorskip("faiss")
+    vectors = np.eye(4, dtype=np.float32)
+    db = FaissFlatIP(dim=4)
+    db.add(vectors)
+    index_path = tmp_path / "index.faiss"
+    db.save(index_path)
+
+    loaded = load_faiss_index(index_path, mmap=True)
+    _, ids = loaded.search(vectors[2:3], 1)
+    assert ids[0][0] == 2
+
+    monkeypatch.setenv("RAG_FAISS_MMAP", "1")
+    assert mmap_requested({}) is True
+    monkeypatch.setenv("RAG_FAISS_MMAP", "0")
+    assert mmap_requested({"mmap": True}) is False
+    monkeypatch.delenv("RAG_FAISS_MMAP")
+    assert mmap_requested({"mmap": True}) is True
+
+
+def test_to_gpu_falls_back_to_cpu_index(monkeypatch: pytest.MonkeyPatch) -> None:
+    import cpm_core.packet.faiss_db as faiss_db
+
+    index = faiss_db.faiss.IndexFlatIP(4)
+    monkeypatch.setattr(faiss_db.faiss, "get_num_gpus", lambda: 0, raising=False)
+    assert to_gpu(index) is index
+
+    monkeypatch.setenv("RAG_FAISS_GPU", "0")
+    assert gpu_requested({"gpu": True}) is False
+    monkeypatch.delenv("RAG_FAISS_GPU")
+    assert gpu_requested({"gpu": True}) is True
+    assert gpu_requested(None) is False
@@ -3,6 +3,7 @@
 from pathlib import Path
 
 from cpm_builtin.packages import PackageManager
+from cpm_builtin.packages.io import read_simple_yml
 from cpm_builtin.packages.layout import version_dir
 
 
@@ -43,3 +44,10 @@ def test_prune_keeps_pinned_and_active(tmp_path: Path) -> None:
     assert not version_dir(workspace, "demo", "1.0.0").exists()
     assert version_dir(workspace, "demo", "1.1.0").exists()
     assert version_dir(workspace, "demo", "1.2.0").exists()
+
+
+def test_read_simple_yml_accepts_every_line_boundary(tmp_path: Path) -> None:
+    path = tmp_path / "cpm.yml"
+    path.write_bytes("a: 1\r\rb: 2\r\nc: 3\x0bd: 4\u2028e: 5\n  # f: 6\n\u3000g: 7\n".encode("utf-8"))
+
+    assert read_simple_yml(path) == {"a": "1", "b": "2", "c": "3", "d": "4", "e": "5", "g": "7"}
@@ -1,78 +1,68 @@
 from __future__ import annotations
 
-import json
+from functools import lru_cache
 from pathlib import Path
 
+import pytest
+
 from cpm_cli.main import main as cli_main
+from cpm_core.oci import OciPushResult
 
+_PUSH_DIGEST = "sha256:" + ("d" * 64)
 
-def _create_packet_dir(root: Path) -> Path:
-    packet = root / "demo" / "1.0.0"
-    (packet / "faiss").mkdir(parents=True, exist_ok=True)
-    (packet / "cpm.yml").write_text("name: demo\nversion: 1.0.0\n", encoding="utf-8")
-    (packet / "docs.jsonl").write_text("{\"id\":\"1\",\"text\":\"hello\"}\n", encoding="utf-8")
-    (packet / "vectors.f16.bin").write_bytes(b"\x00\x01")
-    (packet / "faiss" / "index.faiss").write_bytes(b"INDEX")
-    (packet / "manifest.json").write_text(
-        json.dumps(
-            {
-                "schema_version": "1.0",
-                "packet_id": "demo",
-                "embedding": {"provider": "x", "model": "m", "dim": 2, "dtype": "float16", "normalized": True},
-                "cpm": {"name": "demo", "version": "1.0.0"},
-            }
-        ),
-        encoding="utf-8",
-    )
-    return packet
 
+@lru_cache(maxsize=None)
+def _push_result(ref: str) -> OciPushResult:
+    # the result is frozen, so every push to the same ref can hand back one instance
+    return OciPushResult(ref=ref, digest=_PUSH_DIGEST)
 
-def test_publish_uses_oci_layout_and_reports_digest(monkeypatch, tmp_path: Path) -> None:
-    workspace_root = tmp_path / ".cpm"
-    monkeypatch.setenv("RAG_CPM_DIR", str(workspace_root))
-    packet_dir = _create_packet_dir(tmp_path)
-    captured: dict[str, object] = {}
 
-    class _FakeOciClient:
-        def __init__(self, config):
-            captured["config"] = config
+class _RecordingOciClient:
+    """Fake OCI client that records the pushed ref and files into ``captured``."""
+
+    def __init__(self, config, captured: dict[str, object]) -> None:
+        self.captured = captured
+        captured["config"] = config
 
-        def push(self, ref, spec):
-            captured["ref"] = ref
-            captured["files"] = [str(path) for path in spec.files]
-            return type("PushResult", (), {"ref": ref, "digest": "sha256:" + ("d" * 64)})()
+    def push(self, ref, spec):
+        self.captured["ref"] = ref
+        self.captured["files"] = [str(path) for path in spec.files]
+        return _push_result(ref)
 
+
+def _patch_oci_client(monkeypatch: pytest.MonkeyPatch) -> dict[str, object]:
     import cpm_core.builtins.publish as publish_mod
 
-    monkeypatch.setattr(publish_mod, "OciClient", _FakeOciClient)
-    code = cli_main(
-        ["publish", "--from-dir", str(packet_dir), "--registry", "registry.local/project"],
-        start_dir=tmp_path,
-    )
-    assert code == 0
-    assert str(captured["ref"]).endswith("/demo:1.0.0")
-    assert any("packet.manifest.json" in item for item in captured["files"])
+    captured: dict[str, object] = {}
+    monkeypatch.setattr(publish_mod, "OciClient", lambda config: _RecordingOciClient(config, captured))
+    return captured
 
 
-def test_publish_no_embed_excludes_vectors(monkeypatch, tmp_path: Path) -> None:
+@pytest.fixture
+def workspace(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """Point RAG_CPM_DIR at a per-test workspace; publish writes into it, so it cannot be shared."""
     workspace_root = tmp_path / ".cpm"
     monkeypatch.setenv("RAG_CPM_DIR", str(workspace_root))
-    packet_dir = _create_packet_dir(tmp_path)
-    captured: dict[str, object] = {}
+    return workspace_root
 
-    class _FakeOciClient:
-        def __init__(self, config):
-            captured["config"] = config
 
-        def push(self, ref, spec):
-            captured["files"] = [str(path) for path in spec.files]
-            return type("PushResult", (), {"ref": ref, "digest": "sha256:" + ("d" * 64)})()
+def test_publish_uses_oci_layout_and_reports_digest(
+    monkeypatch, tmp_path: Path, workspace: Path, demo_packet: Path
+) -> None:
+    captured = _patch_oci_client(monkeypatch)
+    code = cli_main(
+        ["publish", "--from-dir", str(demo_packet), "--registry", "registry.local/project"],
+        start_dir=tmp_path,
+    )
+    assert code == 0
+    assert str(captured["ref"]).endswith("/demo:1.0.0")
+    assert any("packet.manifest.json" in item for item in captured["files"])
 
-    import cpm_core.builtins.publish as publish_mod
 
-    monkeypatch.setattr(publish_mod, "OciClient", _FakeOciClient)
+def test_publish_no_embed_excludes_vectors(monkeypatch, tmp_path: Path, workspace: Path, demo_packet: Path) -> None:
+    captured = _patch_oci_client(monkeypatch)
     code = cli_main(
-        ["publish", "--from-dir", str(packet_dir), "--registry", "registry.local/project", "--no-embed"],
+        ["publish", "--from-dir", str(demo_packet), "--registry", "registry.local/project", "--no-embed"],
         start_dir=tmp_path,
     )
     assert code == 0
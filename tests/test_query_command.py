@@ -6,8 +6,9 @@ import faiss
 import numpy as np
 import pytest
 
-_PROJECT_ROOT = Path(__file__).resolve().parents[1]
-sys.path.insert(0, str(_PROJECT_ROOT / "cpm" / "src"))
+_LEGACY_SRC = str(Path(__file__).parent.parent / "cpm" / "src")
+if _LEGACY_SRC not in sys.path:
+    sys.path.insert(0, _LEGACY_SRC)
 
 try:
     from cli.commands.query import FaissRetriever, QueryCommand, RetrievalResult
@@ -25,14 +25,24 @@ def _prepare_packet(workspace_root: Path, *, name: str = "demo", version: str =
     return packet_dir
 
 
+_LOCK_PATH = Path("state", "install", "demo.lock.json")
+
+
+@pytest.fixture
+def workspace(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """Point RAG_CPM_DIR at a per-test ``.cpm``; query writes its install lock there."""
+    workspace_root = tmp_path / ".cpm"
+    monkeypatch.setenv("RAG_CPM_DIR", str(workspace_root))
+    return workspace_root
+
+
 def test_query_uses_selected_model_from_install_lock(
     monkeypatch: pytest.MonkeyPatch,
     tmp_path: Path,
+    workspace: Path,
 ) -> None:
-    workspace_root = tmp_path / ".cpm"
-    monkeypatch.setenv("RAG_CPM_DIR", str(workspace_root))
-    _prepare_packet(workspace_root)
-    lock_path = workspace_root / "state" / "install" / "demo.lock.json"
+    _prepare_packet(workspace)
+    lock_path = workspace / _LOCK_PATH
     lock_path.parent.mkdir(parents=True, exist_ok=True)
     lock_path.write_text(
         json.dumps(
@@ -64,10 +74,9 @@ def test_query_uses_selected_model_from_install_lock(
 def test_query_auto_writes_install_lock_when_missing(
     monkeypatch: pytest.MonkeyPatch,
     tmp_path: Path,
+    workspace: Path,
 ) -> None:
-    workspace_root = tmp_path / ".cpm"
-    monkeypatch.setenv("RAG_CPM_DIR", str(workspace_root))
-    _prepare_packet(workspace_root, model="auto-model")
+    _prepare_packet(workspace, model="auto-model")
 
     import cpm_core.builtins.query as query_mod
 
@@ -78,7 +87,7 @@ def test_query_auto_writes_install_lock_when_missing(
     monkeypatch.setattr(query_mod.NativeFaissRetriever, "retrieve", _fake_retrieve)
     code = cli_main(["query", "--packet", "demo", "--query", "hello"], start_dir=tmp_path)
     assert code == 0
-    lock_path = workspace_root / "state" / "install" / "demo.lock.json"
+    lock_path = workspace / _LOCK_PATH
     assert lock_path.exists()
     payload = json.loads(lock_path.read_text(encoding="utf-8"))
     assert payload["selected_model"] == "auto-model"
@@ -2,6 +2,11 @@
 
 from __future__ import annotations
 
+import pytest
+
+# skip before the imports below: cgi is gone in Python 3.13 and none of them are needed for a skipped module
+pytest.skip("legacy cli.* registry tests removed with legacy runtime", allow_module_level=True)
+
 import warnings
 
 warnings.filterwarnings("ignore", category=DeprecationWarning, message="'cgi' is deprecated and slated for removal in Python 3.13.*")
@@ -22,10 +27,6 @@ from types import SimpleNamespace
 from typing import Any, Dict, Tuple
 from urllib.parse import parse_qs, urlparse
 
-import pytest
-
-pytest.skip("legacy cli.* registry tests removed with legacy runtime", allow_module_level=True)
-
 try:
     from cli.commands.install import cmd_cpm_install
     from cli.commands.list_remote import cmd_cpm_list_remote